@@ -0,0 +1,36 @@
+from sdrcat_protocol.coordinator import ClientCoordinator
+from sdrcat_protocol.network import Packet, DataSection, EnumerationSection, ElementDescription
+from sdrcat_protocol.definitions import SectionTypes, DataTypes, DispositionTypes
+from sdrcat_protocol.action import GenerateFromClient as CliGen, GenerateFromComm as ComGen
+
+import timeit
+
+FRAMES_PER_READ = [1, 8, 64, 256]
+SAMPLES_PER_FRAME = 64
+
+def BuildClient(coalesce:bool) -> ClientCoordinator:
+    client = ClientCoordinator()
+    client.HandleActionItem(ComGen.Connect())
+    client.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.sint16, "samples")])]).Encode()))
+    client.HandleActionItem(CliGen.ConfigureStream("samples", False, coalesce=coalesce))
+    return client
+
+def Measure(func, number:int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+def Main():
+    element = ElementDescription(dataType=DataTypes.sint16)
+    frame = bytes(Packet([DataSection(SectionTypes.DeviceToClientStream, 5, element.EncodeStream(list(range(SAMPLES_PER_FRAME))), [])]).Encode())
+
+    print("Microseconds per read of {}-sample sint16 frames on the client".format(SAMPLES_PER_FRAME))
+    print("{:>8} | {:>10} | {:>10} | {:>8}".format("frames", "per frame", "coalesced", "actions"))
+
+    for count in FRAMES_PER_READ:
+        action = ComGen.Receive(frame * count)
+        clients = [BuildClient(False), BuildClient(True)]
+        times = [Measure(lambda c=c: c.HandleActionItem(action), 200) for c in clients]
+        actions = len(clients[1].HandleActionItem(action))
+        print("{:>8} | {:>10.1f} | {:>10.1f} | {:>8}".format(count, times[0], times[1], actions))
+
+if __name__ == "__main__":
+    Main()
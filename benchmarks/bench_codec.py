@@ -0,0 +1,124 @@
+from sdrcat_protocol.network import ElementDescription
+from sdrcat_protocol.definitions import DataTypes
+
+import struct
+import timeit
+
+STREAM_LENGTH = 256
+
+class LegacyElementDescription:
+    # the if/elif chains ElementDescription used before the codec table, kept for comparison
+    def __init__(self, dataType:DataTypes):
+        self.dataType = dataType.value
+
+    def EncodeValue(self, value) -> bytes:
+        if   self.dataType == DataTypes.raw.value and isinstance(value, bytes): return value
+        elif self.dataType == DataTypes.utf8.value:       return str(value).encode('utf-8')
+        elif self.dataType == DataTypes.sint8.value:      return int(value).to_bytes(1, 'big', signed=True)
+        elif self.dataType == DataTypes.uint8.value:      return int(value).to_bytes(1, 'big', signed=False)
+        elif self.dataType == DataTypes.sint16.value:     return int(value).to_bytes(2, 'big', signed=True)
+        elif self.dataType == DataTypes.uint16.value:     return int(value).to_bytes(2, 'big', signed=False)
+        elif self.dataType == DataTypes.sint32.value:     return int(value).to_bytes(4, 'big', signed=True)
+        elif self.dataType == DataTypes.uint32.value:     return int(value).to_bytes(4, 'big', signed=False)
+        elif self.dataType == DataTypes.sint64.value:     return int(value).to_bytes(8, 'big', signed=True)
+        elif self.dataType == DataTypes.uint64.value:     return int(value).to_bytes(8, 'big', signed=False)
+        elif self.dataType == DataTypes.float32.value:    return struct.pack(">f", float(value))
+        elif self.dataType == DataTypes.float64.value:    return struct.pack(">d", float(value))
+        elif self.dataType == DataTypes.complex64.value:  return struct.pack(">ff", complex(value).real, complex(value).imag)
+        elif self.dataType == DataTypes.complex128.value: return struct.pack(">dd", complex(value).real, complex(value).imag)
+        else: raise Exception("Unsupported data type {}".format(self.dataType))
+
+    def EncodeStream(self, streamValues) -> bytes:
+        if   self.dataType == DataTypes.raw.value        and isinstance(streamValues, bytes): return streamValues
+        elif self.dataType == DataTypes.utf8.value       and isinstance(streamValues, str):  return streamValues.encode('utf-8')
+        elif self.dataType == DataTypes.sint8.value      and isinstance(streamValues, list): return struct.pack('>{}b'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.uint8.value      and isinstance(streamValues, list): return struct.pack('>{}B'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.sint16.value     and isinstance(streamValues, list): return struct.pack('>{}h'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.uint16.value     and isinstance(streamValues, list): return struct.pack('>{}H'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.sint32.value     and isinstance(streamValues, list): return struct.pack('>{}i'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.uint32.value     and isinstance(streamValues, list): return struct.pack('>{}I'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.sint64.value     and isinstance(streamValues, list): return struct.pack('>{}q'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.uint64.value     and isinstance(streamValues, list): return struct.pack('>{}Q'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.float32.value    and isinstance(streamValues, list): return struct.pack('>{}f'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.float64.value    and isinstance(streamValues, list): return struct.pack('>{}d'.format(len(streamValues)), *streamValues)
+        elif self.dataType == DataTypes.complex64.value  and isinstance(streamValues, list): return struct.pack('>{0}f{0}f'.format(len(streamValues)), *[f for c in streamValues for f in [c.real, c.imag]])
+        elif self.dataType == DataTypes.complex128.value and isinstance(streamValues, list): return struct.pack('>{0}d{0}d'.format(len(streamValues)), *[f for c in streamValues for f in [c.real, c.imag]])
+        else: raise Exception("Unsupported data type {}".format(self.dataType))
+
+    def DecodeStream(self, streamBytes: bytes) -> any:
+        if   self.dataType == DataTypes.raw.value:        return streamBytes
+        elif self.dataType == DataTypes.utf8.value:       return streamBytes.decode('utf-8')
+        elif self.dataType == DataTypes.sint8.value:      return [u[0] for u in struct.iter_unpack('>b', streamBytes)]
+        elif self.dataType == DataTypes.uint8.value:      return [u[0] for u in struct.iter_unpack('>B', streamBytes)]
+        elif self.dataType == DataTypes.sint16.value:     return [u[0] for u in struct.iter_unpack('>h', streamBytes)]
+        elif self.dataType == DataTypes.uint16.value:     return [u[0] for u in struct.iter_unpack('>H', streamBytes)]
+        elif self.dataType == DataTypes.sint32.value:     return [u[0] for u in struct.iter_unpack('>i', streamBytes)]
+        elif self.dataType == DataTypes.uint32.value:     return [u[0] for u in struct.iter_unpack('>I', streamBytes)]
+        elif self.dataType == DataTypes.sint64.value:     return [u[0] for u in struct.iter_unpack('>q', streamBytes)]
+        elif self.dataType == DataTypes.uint64.value:     return [u[0] for u in struct.iter_unpack('>Q', streamBytes)]
+        elif self.dataType == DataTypes.float32.value:    return [u[0] for u in struct.iter_unpack(">f", streamBytes)]
+        elif self.dataType == DataTypes.float64.value:    return [u[0] for u in struct.iter_unpack(">d", streamBytes)]
+        elif self.dataType == DataTypes.complex64.value:  return [complex(u[0], u[1]) for u in struct.iter_unpack(">ff", streamBytes)]
+        elif self.dataType == DataTypes.complex128.value: return [complex(u[0], u[1]) for u in struct.iter_unpack(">dd", streamBytes)]
+        else: raise Exception("Unsupported data type {}".format(self.dataType))
+
+    def DecodeValue(self, valueBytes: bytes):
+        if   self.dataType == DataTypes.raw.value:                              return valueBytes
+        elif self.dataType == DataTypes.utf8.value:                             return valueBytes.decode('utf-8')
+        elif self.dataType == DataTypes.sint8.value   and len(valueBytes) == 1: return int.from_bytes(valueBytes, 'big', signed=True)
+        elif self.dataType == DataTypes.uint8.value   and len(valueBytes) == 1: return int.from_bytes(valueBytes, 'big', signed=False)
+        elif self.dataType == DataTypes.sint16.value  and len(valueBytes) == 2: return int.from_bytes(valueBytes, 'big', signed=True)
+        elif self.dataType == DataTypes.uint16.value  and len(valueBytes) == 2: return int.from_bytes(valueBytes, 'big', signed=False)
+        elif self.dataType == DataTypes.sint32.value  and len(valueBytes) == 4: return int.from_bytes(valueBytes, 'big', signed=True)
+        elif self.dataType == DataTypes.uint32.value  and len(valueBytes) == 4: return int.from_bytes(valueBytes, 'big', signed=False)
+        elif self.dataType == DataTypes.sint64.value  and len(valueBytes) == 8: return int.from_bytes(valueBytes, 'big', signed=True)
+        elif self.dataType == DataTypes.uint64.value  and len(valueBytes) == 8: return int.from_bytes(valueBytes, 'big', signed=False)
+        elif self.dataType == DataTypes.float32.value and len(valueBytes) == 4: return struct.unpack('>f', valueBytes)[0]
+        elif self.dataType == DataTypes.float64.value and len(valueBytes) == 8: return struct.unpack('>d', valueBytes)[0]
+        elif self.dataType == DataTypes.complex64.value and len(valueBytes) == 8:
+            unpacked = struct.unpack('>ff', valueBytes)
+            return complex(unpacked[0], unpacked[1])
+        elif self.dataType == DataTypes.complex128.value and len(valueBytes) == 16:
+            unpacked = struct.unpack('>dd', valueBytes)
+            return complex(unpacked[0], unpacked[1])
+        else: raise Exception("Unsupported data type {}".format(self.dataType))
+
+SAMPLE_VALUES = {
+    DataTypes.raw:        (b'\xDE\xAD\xBE\xEF', b'\xDE\xAD\xBE\xEF' * (STREAM_LENGTH // 4)),
+    DataTypes.utf8:       ("value", "s" * STREAM_LENGTH),
+    DataTypes.uint8:      (42, [i % 256 for i in range(STREAM_LENGTH)]),
+    DataTypes.sint8:      (-42, [i % 128 - 64 for i in range(STREAM_LENGTH)]),
+    DataTypes.uint16:     (4200, list(range(STREAM_LENGTH))),
+    DataTypes.sint16:     (-4200, [-i for i in range(STREAM_LENGTH)]),
+    DataTypes.uint32:     (420000, list(range(STREAM_LENGTH))),
+    DataTypes.sint32:     (-420000, [-i for i in range(STREAM_LENGTH)]),
+    DataTypes.uint64:     (4200000000, list(range(STREAM_LENGTH))),
+    DataTypes.sint64:     (-4200000000, [-i for i in range(STREAM_LENGTH)]),
+    DataTypes.float32:    (3.14, [i * 0.5 for i in range(STREAM_LENGTH)]),
+    DataTypes.float64:    (3.14, [i * 0.5 for i in range(STREAM_LENGTH)]),
+    DataTypes.complex64:  (1 + 2j, [complex(i, -i) for i in range(STREAM_LENGTH)]),
+    DataTypes.complex128: (1 + 2j, [complex(i, -i) for i in range(STREAM_LENGTH)]),
+}
+
+def Measure(func, argument, number:int) -> float:
+    return min(timeit.repeat(lambda: func(argument), number=number, repeat=3)) / number * 1e9
+
+def Main():
+    print("Nanoseconds per call ({} samples per stream), codec table vs if/elif chains".format(STREAM_LENGTH))
+    print("{:>11} | {:>17} | {:>17} | {:>17} | {:>17}".format("type", "EncodeValue", "DecodeValue", "EncodeStream", "DecodeStream"))
+
+    for dataType, (value, stream) in SAMPLE_VALUES.items():
+        current = ElementDescription(dataType=dataType)
+        legacy = LegacyElementDescription(dataType)
+
+        valueBytes = current.EncodeValue(value)
+        streamBytes = current.EncodeStream(stream)
+
+        columns = []
+        for name, argument, number in [("EncodeValue", value, 20000), ("DecodeValue", valueBytes, 20000), ("EncodeStream", stream, 500), ("DecodeStream", streamBytes, 500)]:
+            columns.append("{:>7.0f} / {:>7.0f}".format(Measure(getattr(current, name), argument, number), Measure(getattr(legacy, name), argument, number)))
+
+        print("{:>11} | {}".format(dataType.name, " | ".join(columns)))
+
+if __name__ == "__main__":
+    Main()
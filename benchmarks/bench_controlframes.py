@@ -0,0 +1,54 @@
+from sdrcat_protocol.coordinator import DeviceCoordinator
+from sdrcat_protocol.controlframes import ControlFrames
+from sdrcat_protocol.network import Packet, Section, DataSection, StreamReader
+from sdrcat_protocol.definitions import SectionTypes, DataTypes
+from sdrcat_protocol.action import GenerateFromDevice as DevGen, GenerateFromComm as ComGen
+
+import timeit
+
+ACK_COUNT = 10000
+
+def LegacyAck() -> bytes:
+    # how the device cores built every Confirmed reply before the frames were precomputed
+    return Packet([Section(SectionTypes.Confirmed)]).Encode()
+
+def SharedAck() -> bytes:
+    return ControlFrames.Confirmed
+
+def ReadAcks(stream:bytes, knownFrames) -> None:
+    reader = StreamReader(lazy=True, knownFrames=knownFrames)
+    reader.ProcessBytes(stream)
+    while reader.GetNextPacket() is not None:
+        pass
+
+def BuildDevice() -> tuple[DeviceCoordinator, int]:
+    device = DeviceCoordinator()
+    device.HandleActionItem(DevGen.Start({}))
+    device.HandleActionItem(DevGen.DefineStream("tx", DataTypes.uint8, False))
+    device.HandleActionItem(DevGen.Ready())
+    device.HandleActionItem(ComGen.Connect())
+    device.HandleActionItem(ComGen.Receive(ControlFrames.Enumerate))
+    return device, device._enumeration.GetPropertyByName("tx").elementId
+
+def Measure(func, number:int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+def Main():
+    print("Nanoseconds per operation on the device stream-ack path")
+    print("{:>28} | {:>10} | {:>10}".format("operation", "before", "after"))
+
+    print("{:>28} | {:>10.0f} | {:>10.0f}".format("build Confirmed reply", Measure(LegacyAck, 50000), Measure(SharedAck, 50000)))
+
+    stream = ControlFrames.Confirmed * ACK_COUNT
+    legacyRead = Measure(lambda: ReadAcks(stream, None), 5) / ACK_COUNT
+    sharedRead = Measure(lambda: ReadAcks(stream, ControlFrames.PACKETS), 5) / ACK_COUNT
+    print("{:>28} | {:>10.0f} | {:>10.0f}".format("client reads Confirmed", legacyRead, sharedRead))
+
+    device, streamId = BuildDevice()
+    frame = bytes(Packet([DataSection(SectionTypes.ClientToDeviceStream, streamId, bytes(64), [])]).Encode())
+    action = ComGen.Receive(frame)
+    total = Measure(lambda: device.HandleActionItem(action), 20000)
+    print("Whole device stream packet + ack: {:.0f} ns, the old reply construction alone would add {:.0f} ns".format(total, Measure(LegacyAck, 50000) - Measure(SharedAck, 50000)))
+
+if __name__ == "__main__":
+    Main()
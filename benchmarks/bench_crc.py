@@ -0,0 +1,54 @@
+from sdrcat_protocol.network import Packet, DataSection, StreamReader, Crc16, CRC16_INITIAL
+from sdrcat_protocol.definitions import SectionTypes
+
+import time
+
+FRAME_SIZES = [256, 4096, 16384, 65000]
+TOTAL_BYTES = 8 * 1024 * 1024
+
+def _BuildTable() -> list[int]:
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+PYTHON_TABLE = _BuildTable()
+
+def PythonCrc16(data:bytes, crc:int = CRC16_INITIAL) -> int:
+    # a pure Python table driven CRC-16/CCITT-FALSE, kept to show what the C implementation saves
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ PYTHON_TABLE[(crc >> 8) ^ b]
+    return crc
+
+def Throughput(func, count:int, byteCount:int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return byteCount * count / (time.perf_counter() - start) / 1e6
+
+def Main():
+    if PythonCrc16(b'123456789') != Crc16(b'123456789'):
+        raise Exception("CRC implementations disagree")
+
+    print("MB/s per frame size, CRC off vs on")
+    print("{:>8} | {:>12} | {:>12} | {:>12} | {:>12} | {:>12}".format("frame", "encode off", "encode on", "read off", "read on", "python crc"))
+
+    for frameSize in FRAME_SIZES:
+        packet = Packet([DataSection(SectionTypes.DeviceToClientStream, 3, bytes(frameSize - 11), [])])
+        frame = packet.Encode(crc=True)
+        count = max(1, TOTAL_BYTES // len(frame))
+        stream = bytes(frame) * count
+
+        encodeOff = Throughput(lambda: packet.Encode(), count, len(frame))
+        encodeOn = Throughput(lambda: packet.Encode(crc=True), count, len(frame))
+        readOff = Throughput(lambda: StreamReader(lazy=True).ProcessBytes(stream), 1, len(stream))
+        readOn = Throughput(lambda: StreamReader(lazy=True, verifyCrc=True).ProcessBytes(stream), 1, len(stream))
+        pythonCrc = Throughput(lambda: PythonCrc16(frame), max(1, count // 64), len(frame))
+
+        print("{:>8} | {:>12.1f} | {:>12.1f} | {:>12.1f} | {:>12.1f} | {:>12.1f}".format(len(frame), encodeOff, encodeOn, readOff, readOn, pythonCrc))
+
+if __name__ == "__main__":
+    Main()
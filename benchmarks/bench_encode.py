@@ -0,0 +1,60 @@
+from sdrcat_protocol.network import Packet, DataSection, PropertyValueSection, MetadataItem
+from sdrcat_protocol.definitions import SectionTypes
+
+import timeit
+
+PAYLOAD_SIZES = [16, 1024, 16384, 60000]
+
+def LegacyEncodeMetadataItem(m:MetadataItem) -> bytes:
+    return (4 + len(m.metadataValueBytes)).to_bytes(2, 'big')\
+        + m.metadataId.to_bytes(2, 'big')\
+        + m.metadataValueBytes
+
+def LegacyEncodeSection(s) -> bytes:
+    # the concatenating encoders Packet used before EncodeInto, kept for comparison
+    if isinstance(s, DataSection):
+        mresult = b''
+        for m in s.metadata:
+            mresult += LegacyEncodeMetadataItem(m)
+
+        result = s.sectionType.to_bytes(1, 'big')
+        result += s.streamId.to_bytes(2, 'big')
+        result += (2 + len(mresult)).to_bytes(2, 'big')
+        result += mresult
+        result += s.dataBytes
+        return (2 + len(result)).to_bytes(2, 'big') + result
+
+    return (len(s.propertyValueBytes) + 5).to_bytes(2, 'big')\
+        + s.sectionType.to_bytes(1, 'big')\
+        + s.elementId.to_bytes(2, 'big')\
+        + s.propertyValueBytes
+
+def LegacyEncodePacket(p:Packet) -> bytes:
+    result = b''
+    for s in p.sections:
+        result += LegacyEncodeSection(s)
+
+    result = b'\x00\x00' + result
+    return (2 + len(result)).to_bytes(2, 'big') + result
+
+def Measure(func, packet:Packet, number:int) -> float:
+    return min(timeit.repeat(lambda: func(packet), number=number, repeat=5)) / number * 1e9
+
+def Main():
+    print("Nanoseconds per Packet.Encode, preallocated EncodeInto vs concatenation")
+    print("{:>24} | {:>10} | {:>10}".format("frame", "EncodeInto", "legacy"))
+
+    propertyPacket = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 1024, b'\x00\x00\x00\x2A')])
+    if bytes(propertyPacket.Encode()) != LegacyEncodePacket(propertyPacket):
+        raise Exception("Encoders disagree on the NotifyProperty frame")
+    print("{:>24} | {:>10.0f} | {:>10.0f}".format("NotifyProperty", Measure(Packet.Encode, propertyPacket, 20000), Measure(LegacyEncodePacket, propertyPacket, 20000)))
+
+    metadata = [MetadataItem(i, i.to_bytes(8, 'big')) for i in range(4)]
+    for size in PAYLOAD_SIZES:
+        dataPacket = Packet([DataSection(SectionTypes.DeviceToClientStream, 3, bytes(size), metadata)])
+        if bytes(dataPacket.Encode()) != LegacyEncodePacket(dataPacket):
+            raise Exception("Encoders disagree on the {} byte stream frame".format(size))
+        print("{:>24} | {:>10.0f} | {:>10.0f}".format("stream, {} bytes".format(size), Measure(Packet.Encode, dataPacket, 5000), Measure(LegacyEncodePacket, dataPacket, 5000)))
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,114 @@
+from sdrcat_protocol.action import ActionHub, ActionItem, Communicator, Actions, GenerateFromDevice as DevGen, GenerateFromComm as ComGen
+from sdrcat_protocol.coordinator import DeviceCoordinator
+from sdrcat_protocol.definitions import DataTypes
+
+import time
+
+ACTION_COUNT = 200000
+STREAM_COUNT = 20000
+
+class LegacyHub(ActionHub):
+    # the list based drain loop the hub used before the dispatch tables, kept here for comparison
+    def SendAction(self, item:ActionItem):
+        if item is None:
+            return
+
+        queue = []
+        queue.append(item)
+
+        while len(queue) > 0:
+            inProgressItem:ActionItem = queue.pop(0)
+
+            if inProgressItem.target is None:
+                if self.strictRouting:
+                    raise Exception("Action item's target is null, so action item cannot be routed.")
+                continue
+
+            if self.registeredCommunicators[inProgressItem.target] is None and inProgressItem.target != "*":
+                continue
+
+            inProgressResults = self.registeredCommunicators[inProgressItem.target].HandleActionItem(inProgressItem)
+            queue.extend(inProgressResults)
+
+class Relay(Communicator):
+    # answers every ping with a pong to the other side, the way a coordinator turns one action into another
+    def __init__(self, other:str):
+        super().__init__()
+        self._reply = [ActionItem("relay", other, "pong")]
+
+    def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
+        if action.action == "ping":
+            return self._reply
+        return []
+
+class TableRelay(Relay):
+    def ActionHandlers(self) -> dict[str, callable]:
+        return {"ping": lambda a: self._reply, "pong": lambda a: []}
+
+class Sink(Communicator):
+    def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
+        return []
+
+class TableSink(Sink):
+    def ActionHandlers(self) -> dict[str, callable]:
+        return {Actions.ToCommTransmit: lambda a: []}
+
+def PingRate(hub:ActionHub, relay:type) -> float:
+    hub.Register(relay("b"), "a")
+    hub.Register(relay("a"), "b")
+    ping = ActionItem("bench", "a", "ping")
+
+    start = time.perf_counter()
+    for _ in range(ACTION_COUNT // 2):
+        hub.SendAction(ping)
+    return ACTION_COUNT / (time.perf_counter() - start)
+
+def BurstRate(hub:ActionHub, relay:type) -> float:
+    # one send that fans out into a long queue, where pop(0) on a list costs the most
+    hub.Register(relay("b"), "a")
+    hub.Register(relay("a"), "b")
+    burst = [ActionItem("bench", "a", "ping")] * 2000
+    hub.Register(type("Burst", (Communicator,), {"HandleActionItem": lambda self, a: burst})(), "burst")
+    start = time.perf_counter()
+    for _ in range(ACTION_COUNT // 4000):
+        hub.SendAction(ActionItem("bench", "burst", "go"))
+    return ACTION_COUNT / (time.perf_counter() - start)
+
+def StreamRate(hub:ActionHub, sink:type) -> float:
+    device = DeviceCoordinator()
+    hub.Register(device, "coordinator")
+    hub.Register(sink(), "comm")
+    hub.Register(Sink(), "device")
+
+    hub.SendAction(DevGen.Start({}))
+    hub.SendAction(DevGen.DefineStream("rx", DataTypes.uint8, True))
+    hub.SendAction(DevGen.Ready())
+    hub.SendAction(ComGen.Connect())
+    hub.SendAction(ComGen.Receive(b'\x00\x07\x00\x00\x00\x03\x00'))
+
+    action = DevGen.StreamData("rx", [1, 2, 3, 4], None)
+    start = time.perf_counter()
+    for _ in range(STREAM_COUNT):
+        hub.SendAction(action)
+    return STREAM_COUNT / (time.perf_counter() - start)
+
+def InstrumentedHub(sampleEvery:int) -> ActionHub:
+    hub = ActionHub()
+    hub.EnableInstrumentation(sampleEvery)
+    return hub
+
+def Main():
+    print("Actions per second through the hub")
+    print("{:>32} | {:>12} | {:>12}".format("scenario", "before", "after"))
+    print("{:>32} | {:>12.0f} | {:>12.0f}".format("ping/pong between two relays", PingRate(LegacyHub(), Relay), PingRate(ActionHub(), TableRelay)))
+    print("{:>32} | {:>12.0f} | {:>12.0f}".format("2000 action burst", BurstRate(LegacyHub(), Relay), BurstRate(ActionHub(), TableRelay)))
+    print("{:>32} | {:>12.0f} | {:>12.0f}".format("device stream data to comm", StreamRate(LegacyHub(), Sink), StreamRate(ActionHub(), TableSink)))
+
+    print()
+    print("Cost of instrumentation")
+    print("{:>32} | {:>13} | {:>13} | {:>13}".format("scenario", "off", "1 in 16 timed", "all timed"))
+    print("{:>32} | {:>13.0f} | {:>13.0f} | {:>13.0f}".format("ping/pong between two relays", PingRate(ActionHub(), TableRelay), PingRate(InstrumentedHub(16), TableRelay), PingRate(InstrumentedHub(1), TableRelay)))
+    print("{:>32} | {:>13.0f} | {:>13.0f} | {:>13.0f}".format("device stream data to comm", StreamRate(ActionHub(), TableSink), StreamRate(InstrumentedHub(16), TableSink), StreamRate(InstrumentedHub(1), TableSink)))
+
+if __name__ == "__main__":
+    Main()
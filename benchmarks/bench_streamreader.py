@@ -0,0 +1,68 @@
+from sdrcat_protocol.network import StreamReader, Packet, PropertyValueSection
+from sdrcat_protocol.definitions import SectionTypes
+
+import time
+
+TOTAL_BYTES = 1024 * 1024
+CHUNK_SIZES = [64, 1024, 4096, 65536, TOTAL_BYTES]
+
+class LegacyStreamReader:
+    # the bytes-concatenating reader this benchmark was written against, kept for comparison
+    def __init__(self):
+        self._buffer = b''
+        self._packets = []
+
+    def ProcessBytes(self, bytestream:bytes):
+        self._buffer += bytestream
+
+        while len(self._buffer) > 2:
+            expectedLength = int.from_bytes(self._buffer[:2], 'big')
+
+            if len(self._buffer) < expectedLength:
+                break
+
+            p = Packet.Decode(self._buffer[:expectedLength])
+            self._packets.append(p)
+            self._buffer = self._buffer[expectedLength:]
+
+    def GetNextPacket(self):
+        if len(self._packets) == 0:
+            return None
+
+        return self._packets.pop(0)
+
+def BuildStream(totalBytes:int) -> tuple[bytes, int]:
+    frame = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 1024, b'\x00\x00\x00\x2A')]).Encode()
+    count = totalBytes // len(frame)
+    return frame * count, count
+
+def Run(readerType, stream:bytes, frameCount:int, chunkSize:int) -> float:
+    reader = readerType()
+    start = time.perf_counter()
+
+    for i in range(0, len(stream), chunkSize):
+        reader.ProcessBytes(stream[i : i + chunkSize])
+
+    received = 0
+    while reader.GetNextPacket() is not None:
+        received += 1
+
+    elapsed = time.perf_counter() - start
+
+    if received != frameCount:
+        raise Exception("Expected {} packets but received {}".format(frameCount, received))
+
+    return elapsed
+
+def Main():
+    stream, frameCount = BuildStream(TOTAL_BYTES)
+    print("{} NotifyProperty frames, {} bytes".format(frameCount, len(stream)))
+    print("{:>10} | {:>12} | {:>12} | {:>12}".format("chunk", "reader (s)", "legacy (s)", "frames/s"))
+
+    for chunkSize in CHUNK_SIZES:
+        elapsed = Run(StreamReader, stream, frameCount, chunkSize)
+        legacyElapsed = Run(LegacyStreamReader, stream, frameCount, chunkSize)
+        print("{:>10} | {:>12.4f} | {:>12.4f} | {:>12.0f}".format(chunkSize, elapsed, legacyElapsed, frameCount / elapsed))
+
+if __name__ == "__main__":
+    Main()
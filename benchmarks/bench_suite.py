@@ -0,0 +1,166 @@
+from sdrcat_protocol.network import Packet, Section, GetPropertySection, PropertyValueSection, DataSection, EnumerationSection, ElementDescription, MetadataItem, StreamReader
+from sdrcat_protocol.definitions import SectionTypes, DataTypes, DispositionTypes
+from sdrcat_protocol.bufferpool import BufferPool
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+PAYLOAD_SIZES = [16, 256, 4096, 61440]
+READER_CHUNK_SIZES = [None, 65536, 1460, 536, 64]
+READER_STREAM_BYTES = 1024 * 1024
+
+ITEM_SIZES = {
+    DataTypes.raw: 1, DataTypes.utf8: 1,
+    DataTypes.uint8: 1, DataTypes.sint8: 1, DataTypes.uint16: 2, DataTypes.sint16: 2,
+    DataTypes.uint32: 4, DataTypes.sint32: 4, DataTypes.uint64: 8, DataTypes.sint64: 8,
+    DataTypes.float32: 4, DataTypes.float64: 8, DataTypes.complex64: 8, DataTypes.complex128: 16,
+    DataTypes.cs8: 2, DataTypes.cs16: 4, DataTypes.cs12: 3,
+}
+
+def StreamValues(dataType:DataTypes, payloadSize:int) -> any:
+    count = max(1, payloadSize // ITEM_SIZES[dataType])
+
+    if dataType == DataTypes.raw: return bytes(i % 256 for i in range(count))
+    if dataType == DataTypes.utf8: return "s" * count
+    if dataType in (DataTypes.uint8, DataTypes.uint16, DataTypes.uint32, DataTypes.uint64): return [i % 256 for i in range(count)]
+    if dataType in (DataTypes.sint8, DataTypes.sint16, DataTypes.sint32, DataTypes.sint64): return [i % 128 - 64 for i in range(count)]
+    if dataType in (DataTypes.float32, DataTypes.float64): return [i * 0.5 for i in range(count)]
+    return [complex(i % 128 - 64, 64 - i % 128) for i in range(count)]
+
+def Run(func, minimumSeconds:float) -> float:
+    # calls func in growing batches until a batch takes long enough to time reliably, returns seconds per call
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= minimumSeconds:
+            return elapsed / number
+
+        number *= 2 if elapsed == 0 else max(2, min(10, int(minimumSeconds / elapsed * 1.2) + 1))
+
+def Result(secondsPerOp:float, bytesPerOp:int, framesPerOp:int = 1) -> dict:
+    return {
+        "seconds_per_op": secondsPerOp,
+        "bytes_per_op": bytesPerOp,
+        "mb_per_s": bytesPerOp / secondsPerOp / 1e6,
+        "frames_per_s": framesPerOp / secondsPerOp,
+    }
+
+def PacketCases() -> list[tuple[str, Packet]]:
+    enumeration = EnumerationSection(0, [ElementDescription(1024 + i, DispositionTypes.EditableProperty, DataTypes.uint32, "property.{}".format(i)) for i in range(32)])
+    cases = [
+        ("control", Packet([Section(SectionTypes.Confirmed)])),
+        ("getproperty", Packet([GetPropertySection(1024)])),
+        ("setproperty", Packet([PropertyValueSection(SectionTypes.SetProperty, 1024, b'\x00\x00\x00\x2A')])),
+        ("enumeration", Packet([enumeration])),
+        ("multisection", Packet([DataSection(SectionTypes.DeviceToClientStream, 1024, bytes(256), []) for _ in range(8)])),
+    ]
+
+    for size in PAYLOAD_SIZES:
+        cases.append(("data.{}".format(size), Packet([DataSection(SectionTypes.DeviceToClientStream, 1024, bytes(size), [MetadataItem(1025, b'\x00\x00\xBB\x80')])])))
+
+    return cases
+
+def Benchmarks(minimumSeconds:float, nameFilter:str) -> dict[str, dict]:
+    results = {}
+
+    def Add(name:str, func, bytesPerOp:int, framesPerOp:int = 1):
+        if nameFilter is not None and nameFilter not in name:
+            return
+
+        results[name] = Result(Run(func, minimumSeconds), bytesPerOp, framesPerOp)
+        print("{:<40} {:>10.2f} MB/s {:>12.0f} frames/s".format(name, results[name]["mb_per_s"], results[name]["frames_per_s"]), flush=True)
+
+    for name, packet in PacketCases():
+        frame = bytes(packet.Encode())
+        Add("packet.encode.{}".format(name), packet.Encode, len(frame))
+        Add("packet.decode.{}".format(name), lambda f=frame: Packet.Decode(f), len(frame))
+        Add("packet.decode_lazy.{}".format(name), lambda f=frame: Packet.Decode(f, True), len(frame))
+
+    for size in PAYLOAD_SIZES:
+        frame = bytes(Packet([DataSection(SectionTypes.DeviceToClientStream, 1024, bytes(size), [])]).Encode())
+        count = max(1, READER_STREAM_BYTES // len(frame))
+        stream = frame * count
+
+        for chunkSize in READER_CHUNK_SIZES:
+            chunks = [stream] if chunkSize is None else [stream[i : i + chunkSize] for i in range(0, len(stream), chunkSize)]
+
+            def Read(chunks=chunks, pool=None):
+                reader = StreamReader(lazy=True, pool=pool)
+                for chunk in chunks:
+                    reader.ProcessBytes(chunk)
+                    while reader.GetNextPacket() is not None:
+                        pass
+
+            chunkName = "all" if chunkSize is None else chunkSize
+            Add("streamreader.{}.chunk_{}".format(size, chunkName), Read, len(stream), count)
+            Add("streamreader_pooled.{}.chunk_{}".format(size, chunkName), lambda chunks=chunks, pool=BufferPool(): Read(chunks, pool), len(stream), count)
+
+    for dataType in DataTypes:
+        element = ElementDescription(dataType=dataType)
+        for size in PAYLOAD_SIZES:
+            values = StreamValues(dataType, size)
+            encoded = element.EncodeStream(values)
+            Add("codec.encode.{}.{}".format(dataType.name, size), lambda v=values: element.EncodeStream(v), len(encoded))
+            Add("codec.decode.{}.{}".format(dataType.name, size), lambda e=encoded: element.DecodeStream(e), len(encoded))
+
+    return results
+
+def Compare(results:dict[str, dict], baseline:dict[str, dict], threshold:float) -> list[str]:
+    regressions = []
+    print()
+    print("{:<40} {:>12} {:>12} {:>8}".format("benchmark", "baseline", "current", "change"))
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        before = baseline[name]["mb_per_s"]
+        after = result["mb_per_s"]
+        change = after / before - 1
+        flag = ""
+        if change < -threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+
+        print("{:<40} {:>12.2f} {:>12.2f} {:>+7.1%} {}".format(name, before, after, change, flag))
+
+    return regressions
+
+def Main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmarks for sdrcat_protocol.network")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file from an earlier --output run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative MB/s drop that counts as a regression (default 0.10)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds each benchmark runs for (default 0.2)")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    arguments = parser.parse_args()
+
+    results = Benchmarks(arguments.min_time, arguments.filter)
+
+    if arguments.output is not None:
+        with open(arguments.output, "w") as f:
+            json.dump({
+                "python": sys.version,
+                "platform": platform.platform(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            }, f, indent=2)
+
+    if arguments.compare is not None:
+        with open(arguments.compare) as f:
+            baseline = json.load(f)["results"]
+
+        regressions = Compare(results, baseline, arguments.threshold)
+        if len(regressions) > 0:
+            print("{} benchmark(s) regressed by more than {:.0%}".format(len(regressions), arguments.threshold))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    Main()
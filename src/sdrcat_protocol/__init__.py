@@ -1,2 +1,2 @@
-from .definitions import SectionTypes, DataTypes, DispositionTypes, DeviceProtocolState, ClientProtocolState
+from .definitions import SectionTypes, DataTypes, DispositionTypes, CompressionTypes, Capabilities, DeviceProtocolState, ClientProtocolState, DiagnosticLevels
 from .deviceinfo import DeviceInfo, DeviceElement
@@ -1,4 +1,6 @@
 from .action import ActionItem
 from .definitions import Actions
 from .generators import GenerateFromClient, GenerateFromDevice, GenerateFromComm, GenerateFromClientCoordinator, GenerateFromDeviceCoordinator
-from .actionhub import ActionHub, Communicator
\ No newline at end of file
+from .actionhub import ActionHub, Communicator
+from .actionqueue import ActionQueue, QueuePolicies
+from .hubstatistics import HubStatistics
\ No newline at end of file
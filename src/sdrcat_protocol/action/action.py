@@ -15,6 +15,8 @@ PropertyParam = namedtuple("PropertyParam", ["name"])
 StreamDataParams = namedtuple("StreamDataParams", ["name", "data", "metadata"])
 CommConnectParams = namedtuple("CommConnectParams", ["connectionParams"])
 AppendEnumerationParams = namedtuple("AppendEnumerationParams", ["elementDescription"])
+SetCapabilitiesParams = namedtuple("SetCapabilitiesParams", ["capabilities"])
+StreamConfigurationParams = namedtuple("StreamConfigurationParams", ["name", "useNumpy", "scale", "coalesce"], defaults=["", False, False, False])
 
 
 
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
 from . import ActionItem
+from .actionqueue import ActionQueue
+from .hubstatistics import HubStatistics
+from collections import deque
+
+import traceback
 
 
 class ActionHub:
@@ -8,45 +13,149 @@ class ActionHub:
         self.strictRouting = strictRouting
         self.registeredCommunicators = {}
 
+        # target name -> (action -> bound handler, fallback HandleActionItem), rebuilt at registration and when instrumentation is switched
+        self._routes:dict[str, tuple[dict[str, callable], callable]] = {}
+
+        # HandleActionItem of each communicator once, however many names it is registered under
+        self._broadcast:list[callable] = []
+
+        # actions sent while the queue is being drained are appended to it and picked up by the running loop
+        self._queue = deque()
+        self._draining = False
+
+        # the queues of the async communicators, socket reads pause while a blocking one is full
+        self._queues:list[ActionQueue] = []
+
+        # None unless EnableInstrumentation was called, the routes then lead through its timing wrappers
+        self.statistics:HubStatistics = None
+
     def Register(self, communicator:Communicator, name:str):
         if name in self.registeredCommunicators.keys():
             raise Exception(f"A communicator with the name {name} is already registered.")
 
         self.registeredCommunicators[name] = communicator
+        self._BuildRoutes()
         communicator.HandleRegistrationResponse(self)
 
+        queue = communicator.actionQueue
+        if queue is not None and queue not in self._queues:
+            self._queues.append(queue)
+            queue.onError = lambda ex: self.ReportError(name, ex)
+
+    def EnableInstrumentation(self, sampleEvery:int = 16):
+        # starts over with empty statistics if it was already on, sampleEvery = 1 times every call
+        self.statistics = HubStatistics(sampleEvery)
+        self._BuildRoutes()
+
+    def DisableInstrumentation(self):
+        self.statistics = None
+        self._BuildRoutes()
+
+    def InstrumentationSnapshot(self) -> dict:
+        if self.statistics is None:
+            return None
+
+        snapshot = self.statistics.Snapshot()
+        snapshot["queues"] = {name: {"depth": c.actionQueue.depth, "peak_depth": c.actionQueue.peakDepth, "dropped": c.actionQueue.dropped, "overflowed": c.actionQueue.overflowed, "errors": c.actionQueue.errors}
+                              for name, c in self.registeredCommunicators.items() if c.actionQueue is not None}
+        return snapshot
+
+    def Saturated(self) -> bool:
+        for queue in self._queues:
+            if queue.Saturated():
+                return True
+
+        return False
+
+    async def WaitForSpaceAsync(self, ignore:ActionQueue = None):
+        # a communicator waiting from one of its own callbacks passes its queue as ignore, only its own worker could make room there
+        # checked again after every wait, a queue that had room can fill up while another one is awaited
+        while True:
+            for queue in self._queues:
+                if queue is not ignore and queue.Saturated():
+                    await queue.WaitForSpaceAsync()
+                    break
+            else:
+                return
+
+    def ReportError(self, source:str, exception:Exception):
+        # offered to every communicator, printed when none of them takes it
+        reported = False
+        for communicator in {id(c): c for c in self.registeredCommunicators.values()}.values():
+            if communicator.OnError(source, exception):
+                reported = True
+
+        if not reported:
+            traceback.print_exception(type(exception), exception, exception.__traceback__)
+
     def SendAction(self, item:ActionItem):
         if item is None:
             return
 
-        queue = []
-
+        queue = self._queue
         queue.append(item)
 
-        while len(queue) > 0:
-            inProgressItem:ActionItem = queue.pop(0)
+        if self._draining:
+            return
 
-            if inProgressItem.target is None:
-                if self.strictRouting:
-                    raise Exception("Action item's target is null, so action item cannot be routed.")
+        self._draining = True
+        try:
+            while len(queue) > 0:
+                inProgressItem:ActionItem = queue.popleft()
+                target = inProgressItem.target
 
-                continue
+                route = self._routes.get(target)
+                if route is not None:
+                    handlers, fallback = route
+                    inProgressResults = handlers.get(inProgressItem.action, fallback)(inProgressItem)
+                    if inProgressResults:
+                        queue.extend(inProgressResults)
 
-            if self.registeredCommunicators[inProgressItem.target] is None and inProgressItem.target != "*":
-                if (StrictRouting):
-                    raise Exception(f"Action item's target {inProgressItem.target} is not registered, so action item has nowhere to go.")
+                elif target == "*":
+                    for handle in self._broadcast:
+                        inProgressResults = handle(inProgressItem)
+                        if inProgressResults:
+                            queue.extend(inProgressResults)
 
-                continue
+                elif self.strictRouting:
+                    if target is None:
+                        raise Exception("Action item's target is null, so action item cannot be routed.")
+
+                    raise Exception(f"Action item's target {target} is not registered, so action item has nowhere to go.")
+
+        finally:
+            # an exception abandons whatever was still queued, as it did when the queue lived on the stack
+            queue.clear()
+            self._draining = False
+
+    def _BuildRoutes(self):
+        statistics = self.statistics
+        routes = {}
+        broadcast = {}
+
+        for name, communicator in self.registeredCommunicators.items():
+            handlers = dict(communicator._ActionHandlerTable())
+            fallback = communicator.HandleActionItem
+
+            if statistics is not None:
+                handlers = {action: statistics.Instrument(self._queue, name, handler) for action, handler in handlers.items()}
+                fallback = statistics.Instrument(self._queue, name, fallback)
+
+            routes[name] = (handlers, fallback)
+
+            # a communicator registered under several names still sees a broadcast only once
+            broadcast.setdefault(id(communicator), fallback)
+
+        self._routes = routes
+        self._broadcast = list(broadcast.values())
 
-            if inProgressItem.target == "*":
-                for k in _registeredCommunicators:
-                    _registeredCommunicators[k].HandleActionItemAsync(inProgressItem)
-            else:
-                inProgressResults = self.registeredCommunicators[inProgressItem.target].HandleActionItem(inProgressItem)
-                queue.extend(inProgressResults)
 
-    
 class Communicator:
+    # communicators whose callbacks are async have one of these, their handlers queue the work on it instead of running it
+    actionQueue:ActionQueue = None
+
+    _actionHandlerTable:dict[str, callable] = None
+
     def __init__(self):
         self.hub:ActionHub = None
 
@@ -55,4 +164,21 @@ class Communicator:
 
     # OVERRIDE THIS
     def HandleActionItem(action:ActionItem) -> list[ActionItem]:
-        pass
\ No newline at end of file
+        pass
+
+    # optionally override this with action -> handler(action) returning follow-up actions like HandleActionItem does,
+    # the hub calls these directly and only falls back to HandleActionItem for actions missing here
+    def ActionHandlers(self) -> dict[str, callable]:
+        return {}
+
+    # optionally override this, the hub calls it with the name of the communicator whose async callback raised,
+    # return True once the error is reported so the hub does not print it
+    def OnError(self, source:str, exception:Exception) -> bool:
+        return False
+
+    def _ActionHandlerTable(self) -> dict[str, callable]:
+        # ActionHandlers() is built once, for the hub's routes and for HandleActionItem implementations that look actions up in it
+        if self._actionHandlerTable is None:
+            self._actionHandlerTable = self.ActionHandlers()
+
+        return self._actionHandlerTable
@@ -0,0 +1,134 @@
+from collections import deque
+
+import asyncio
+import traceback
+
+class QueuePolicies:
+    Block = 0           # a full queue reports itself saturated so socket reads and producers that can wait hold off, past its ceiling actions are dropped as overflowed
+    DropOldest = 1      # a full queue discards the action that has waited longest to make room
+    DropNewest = 2      # a full queue discards the action being added
+
+class ActionQueue:
+    # a communicator's async callbacks, awaited one at a time in the order they were queued by a single worker task
+    # the callback and its arguments are queued rather than a coroutine, so a dropped action never creates one
+    def __init__(self, limit:int = 1024, policy:int = QueuePolicies.Block, ceiling:int = None):
+        # ceiling is Block's hard cap, the room past limit for what a single socket read or a producer that does not wait still adds
+        if ceiling is None:
+            ceiling = 4 * limit
+
+        if ceiling < limit:
+            raise Exception(f"The queue's ceiling {ceiling} is below its limit {limit}.")
+
+        self.limit = limit
+        self.policy = policy
+        self.ceiling = ceiling
+
+        self._items = deque()
+        self._worker:asyncio.Task = None
+        self._wakeup:asyncio.Event = None
+        self._space:asyncio.Event = None
+        self._idle:asyncio.Event = None
+
+        # called with the exception when a callback raises, the hub points it at its ReportError on registration
+        self.onError:callable = None
+
+        # dropped counts actions discarded by the policy, overflowed those Block discarded at its ceiling,
+        # peakDepth is the most that were ever waiting at once, errors the callbacks that raised
+        self.dropped = 0
+        self.overflowed = 0
+        self.peakDepth = 0
+        self.errors = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def Saturated(self) -> bool:
+        return self.policy == QueuePolicies.Block and len(self._items) >= self.limit
+
+    def Put(self, function:callable, args:tuple):
+        items = self._items
+
+        if len(items) >= self.limit:
+            if self.policy == QueuePolicies.DropNewest:
+                self.dropped += 1
+                return
+
+            if self.policy == QueuePolicies.DropOldest:
+                items.popleft()
+                self.dropped += 1
+
+            elif len(items) >= self.ceiling:
+                self.overflowed += 1
+                return
+
+        items.append((function, args))
+        if len(items) > self.peakDepth:
+            self.peakDepth = len(items)
+
+        if self._worker is None or self._worker.done():
+            self._Start()
+
+        if len(items) >= self.limit:
+            self._space.clear()
+
+        self._idle.clear()
+        self._wakeup.set()
+
+    async def WaitForSpaceAsync(self):
+        if self._space is not None:
+            await self._space.wait()
+
+    async def JoinAsync(self):
+        # returns once everything queued so far has been awaited
+        if self._idle is not None:
+            await self._idle.wait()
+
+    def Close(self):
+        # whatever is still queued is discarded
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+        self._items.clear()
+        if self._space is not None:
+            self._space.set()
+            self._idle.set()
+
+    def _Start(self):
+        # the events are made here so they belong to the running loop, a queue outliving one asyncio.run starts over in the next
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._idle = asyncio.Event()
+        self._worker = asyncio.get_running_loop().create_task(self._WorkAsync())
+
+    async def _WorkAsync(self):
+        items = self._items
+
+        while True:
+            while len(items) == 0:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            function, args = items.popleft()
+            if len(items) < self.limit:
+                self._space.set()
+
+            try:
+                await function(*args)
+            except Exception as ex:
+                self.errors += 1
+                self._ReportError(ex)
+
+    def _ReportError(self, ex:Exception):
+        # an error while reporting is printed instead of reported again, so it cannot feed itself
+        if self.onError is not None:
+            try:
+                self.onError(ex)
+                return
+            except Exception as reportEx:
+                traceback.print_exception(type(reportEx), reportEx, reportEx.__traceback__)
+
+        traceback.print_exception(type(ex), ex, ex.__traceback__)
@@ -1,45 +1,55 @@
 class Actions:
-    FromDeviceStartup = 'device.startup'
-    FromDeviceReady = 'device.ready'
-    FromDeviceReset = 'device.reset'
-    FromDevicePropertyValue = 'device.reportpropertyvalue'
-    FromDeviceStreamData = 'device.senddatatoclient'
-    FromDeviceDefineProperty = 'device.defineavailableproperty'
-    FromDeviceDefineMetadata = 'device.defineavailablemetadata'
-    FromDeviceDefineStream = 'device.defineavailablestream'
-
-    ToDeviceReset = 'device.receivedresetrequest'
-    ToDeviceGetProperty = 'device.propertygetrequested'
-    ToDeviceSetProperty = 'device.propertysetrequested'
-    ToDeviceStreamData = 'device.datareceivedfromclient'
-
-    FromCommReceive = 'comm.receive'
-    FromCommConnect = 'comm.connected'
-    FromCommDisconnect = 'comm.disconnected'
-
-    ToCommTransmit = 'comm.transmit'
-    ToCommConnect = 'comm.connect'
-    ToCommDisconnect = 'comm.disconnect'
-
-    FromClientStartup = 'client.startup'
-    FromClientGetProperty = 'client.gettingpropertyvalue'
-    FromClientSetProperty = 'client.settingpropertyvalue'
-    FromClientStreamData = 'client.sendingdatatodevice'
-    FromClientReset = 'clent.reseitting'
-    FromClientConnect = 'client.connecting'
-    FromClientDisconnect = 'client.disconnecting'
-
-    ToClientStatus = 'client.statuschange'
-    ToClientDeviceInfo = 'client.deviceinfoavailable'
-    ToClientPropertyValue = 'client.propertyvaluereported'
-    ToClientStreamData = 'client.datareceivedfromdevice'
+    # small integer codes, the hub and the coordinators only hash and compare them, Name() gives the readable form for logging
+    FromDeviceStartup = 0
+    FromDeviceReady = 1
+    FromDeviceReset = 2
+    FromDevicePropertyValue = 3
+    FromDeviceStreamData = 4
+    FromDeviceDefineProperty = 5
+    FromDeviceDefineMetadata = 6
+    FromDeviceDefineStream = 7
+
+    ToDeviceReset = 8
+    ToDeviceGetProperty = 9
+    ToDeviceSetProperty = 10
+    ToDeviceStreamData = 11
+
+    FromCommReceive = 12
+    FromCommConnect = 13
+    FromCommDisconnect = 14
+
+    ToCommTransmit = 15
+    ToCommConnect = 16
+    ToCommDisconnect = 17
+
+    FromClientStartup = 18
+    FromClientGetProperty = 19
+    FromClientSetProperty = 20
+    FromClientStreamData = 21
+    FromClientReset = 22
+    FromClientConnect = 23
+    FromClientDisconnect = 24
+    FromClientConfigureStream = 25
+
+    ToClientStatus = 26
+    ToClientDeviceInfo = 27
+    ToClientPropertyValue = 28
+    ToClientStreamData = 29
     
-    CoordinatorState = 'changestate'
-    CoordinatorClearEnumeration = 'clearenumeration'
-    CoordinatorSetEnumeration = 'setenumeration'
-    CoordinatorResetNextElementId = 'resetnextelementid'
-    CoordinatorIncrementNextElementId = 'incrementnextelementid'
-    CoordinatorAppendEnumeration = 'appendenumeration'
-    CoordinatorInformation = 'information'
-
-    Exit = 'exit'
\ No newline at end of file
+    CoordinatorState = 30
+    CoordinatorClearEnumeration = 31
+    CoordinatorSetEnumeration = 32
+    CoordinatorResetNextElementId = 33
+    CoordinatorIncrementNextElementId = 34
+    CoordinatorAppendEnumeration = 35
+    CoordinatorInformation = 36
+    CoordinatorSetStreamConfiguration = 37
+    CoordinatorSetCapabilities = 38
+
+    Exit = 39
+
+    @staticmethod
+    def Name(action) -> str:
+        return _ACTION_NAMES.get(action, str(action))
+
+_ACTION_NAMES = {value: name for name, value in vars(Actions).items() if isinstance(value, int)}
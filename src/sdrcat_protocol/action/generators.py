@@ -1,17 +1,19 @@
-from sdrcat_protocol.action.action import ActionItem, DefineStreamParams, DefinePropertyParams, DefineMetadataParams, CommPayloadParams, InformationParams, StateChangeParams, SetEnumerationParams, DeviceInfoParams, PropertyValueParams, PropertyParam, StreamDataParams, CommConnectParams, AppendEnumerationParams
+from sdrcat_protocol.action.action import ActionItem, DefineStreamParams, DefinePropertyParams, DefineMetadataParams, CommPayloadParams, InformationParams, StateChangeParams, SetEnumerationParams, DeviceInfoParams, PropertyValueParams, PropertyParam, StreamDataParams, CommConnectParams, AppendEnumerationParams, StreamConfigurationParams, SetCapabilitiesParams
 from sdrcat_protocol.action.definitions import Actions
 
 from sdrcat_protocol.network import EnumerationSection, ElementDescription
 from sdrcat_protocol.deviceinfo import DeviceInfo
 from sdrcat_protocol.definitions import DataTypes
+from sdrcat_protocol.compression import COMPRESSION_METADATA_NAME
 
 class GenerateFromClient:
-    def Connect(connectionParams:dict[str, any]):              return ActionItem("client", "coordinator", Actions.FromClientConnect,        CommConnectParams(connectionParams))
-    def Disconnect():                                          return ActionItem("client", "coordinator", Actions.FromClientDisconnect,     None)
-    def Reset():                                               return ActionItem("client", "coordinator", Actions.FromClientReset,          None)
-    def GetProperty(name: str):                                return ActionItem("client", "coordinator", Actions.FromClientGetProperty,    PropertyParam(name))
-    def SetProperty(name:str, value:any):                      return ActionItem("client", "coordinator", Actions.FromClientSetProperty,    PropertyValueParams(name, value))
-    def SendData(name:str, data:any, metadata:dict[str, any]): return ActionItem("client", "coordinator", Actions.FromClientStreamData,     StreamDataParams(name, data, metadata))
+    def Connect(connectionParams:dict[str, any]):                                        return ActionItem("client", "coordinator", Actions.FromClientConnect,        CommConnectParams(connectionParams))
+    def Disconnect():                                                                    return ActionItem("client", "coordinator", Actions.FromClientDisconnect,     None)
+    def Reset():                                                                         return ActionItem("client", "coordinator", Actions.FromClientReset,          None)
+    def GetProperty(name: str):                                                          return ActionItem("client", "coordinator", Actions.FromClientGetProperty,    PropertyParam(name))
+    def SetProperty(name:str, value:any):                                                return ActionItem("client", "coordinator", Actions.FromClientSetProperty,    PropertyValueParams(name, value))
+    def SendData(name:str, data:any, metadata:dict[str, any]):                           return ActionItem("client", "coordinator", Actions.FromClientStreamData,     StreamDataParams(name, data, metadata))
+    def ConfigureStream(name:str, useNumpy:bool, scale:bool=False, coalesce:bool=False): return ActionItem("client", "coordinator", Actions.FromClientConfigureStream, StreamConfigurationParams(name, useNumpy, scale, coalesce))
 
 class GenerateFromDevice:
     def Start(connectionParams:dict[str,any]):                               return ActionItem("device", "coordinator", Actions.FromDeviceStartup,        CommConnectParams(connectionParams))
@@ -22,6 +24,7 @@ class GenerateFromDevice:
     def DefineMetadata(name:str, dataType:DataTypes):                        return ActionItem("device", "coordinator", Actions.FromDeviceDefineMetadata, DefineMetadataParams(name, dataType))
     def PropertyValue(name:str, value:any):                                  return ActionItem("device", "coordinator", Actions.FromDevicePropertyValue,  PropertyValueParams(name, value))
     def StreamData(name:str, data:any, metadata:dict[str, any]):             return ActionItem("device", "coordinator", Actions.FromDeviceStreamData,     StreamDataParams(name, data, metadata))
+    def DefineCompression():                                                 return GenerateFromDevice.DefineMetadata(COMPRESSION_METADATA_NAME, DataTypes.uint8)
     def Exit():                                                              return ActionItem("*",    "*",             Actions.Exit,               None)
 
 class GenerateFromComm:
@@ -35,6 +38,7 @@ class GenerateFromClientCoordinator:
     def ClearEnumeration():                                            return ActionItem("coordinator", "coordinator", Actions.CoordinatorClearEnumeration,       None)
     def ChangeState(state:int):                                        return ActionItem("coordinator", "coordinator", Actions.CoordinatorState,                  StateChangeParams(state))
     def SetEnumeration(enumeration:EnumerationSection):                return ActionItem("coordinator", "coordinator", Actions.CoordinatorSetEnumeration,         SetEnumerationParams(enumeration))
+    def SetStreamConfiguration(configuration:StreamConfigurationParams): return ActionItem("coordinator", "coordinator", Actions.CoordinatorSetStreamConfiguration, configuration)
 
     def ClientStatus(state:int):                                       return ActionItem("coordinator", "client",      Actions.ToClientStatus,                    StateChangeParams(state))
     def ClientDeviceInfo(deviceInfo:DeviceInfo):                       return ActionItem("coordinator", "client",      Actions.ToClientDeviceInfo,                DeviceInfoParams(deviceInfo))
@@ -52,6 +56,7 @@ class GenerateFromDeviceCoordinator:
     def ResetNextElementId():                                          return ActionItem("coordinator", "coordinator", Actions.CoordinatorResetNextElementId,     None)
     def IncrementNextElementId():                                      return ActionItem("coordinator", "coordinator", Actions.CoordinatorIncrementNextElementId, None)
     def AppendEnumeration(elementDescription:ElementDescription):      return ActionItem("coordinator", "coordinator", Actions.CoordinatorAppendEnumeration,      AppendEnumerationParams(elementDescription))
+    def SetCapabilities(capabilities:int):                             return ActionItem("coordinator", "coordinator", Actions.CoordinatorSetCapabilities,        SetCapabilitiesParams(capabilities))
 
     def CommTransmit(data:bytes):                                      return ActionItem("coordinator", "comm",        Actions.ToCommTransmit,                    CommPayloadParams(data))
     def CommConnect(connectionParams:dict[str,any]):                   return ActionItem("coordinator", "comm",        Actions.ToCommConnect,                     CommConnectParams(connectionParams))
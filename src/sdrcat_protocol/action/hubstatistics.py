@@ -0,0 +1,80 @@
+from .definitions import Actions
+
+from time import perf_counter_ns
+
+# follow-up actions per handled action are counted in power of two buckets, 0, 1, 2-3, 4-7, 8-15, 16-31 and 32 or more
+PRODUCED_BUCKETS = ["0", "1", "2-3", "4-7", "8-15", "16-31", "32+"]
+
+class HubStatistics:
+    # filled by wrappers the hub puts around every handler while instrumentation is on, so a hub without it runs the bare handlers
+    # every call is counted, but only one in sampleEvery is timed, the clock reads cost more than a trivial handler
+    def __init__(self, sampleEvery:int = 16):
+        if sampleEvery < 1:
+            raise ValueError(f"sampleEvery must be 1 or more, one call in sampleEvery is timed, but it was {sampleEvery}.")
+
+        self.sampleEvery = sampleEvery
+
+        # communicator name -> action -> [count, timed count, total timed ns, max ns, produced histogram]
+        self._records:dict[str, dict[any, list]] = {}
+        self.maxQueueDepth = 0
+
+    def Instrument(self, queue, name:str, handler:callable) -> callable:
+        byAction = self._records.setdefault(name, {})
+        lastBucket = len(PRODUCED_BUCKETS) - 1
+        sampleEvery = self.sampleEvery
+
+        def Handle(item):
+            record = byAction.get(item.action)
+            if record is None:
+                record = byAction[item.action] = [0, 0, 0, 0, [0] * len(PRODUCED_BUCKETS)]
+
+            count = record[0]
+            record[0] = count + 1
+
+            if count % sampleEvery == 0:
+                start = perf_counter_ns()
+                results = handler(item)
+                elapsed = perf_counter_ns() - start
+
+                record[1] += 1
+                record[2] += elapsed
+                if elapsed > record[3]:
+                    record[3] = elapsed
+            else:
+                results = handler(item)
+
+            if not results:
+                record[4][0] += 1
+                return results
+
+            produced = len(results)
+            record[4][min(produced.bit_length(), lastBucket)] += 1
+
+            # the hub appends the results right after this returns
+            depth = len(queue) + produced
+            if depth > self.maxQueueDepth:
+                self.maxQueueDepth = depth
+
+            return results
+
+        return Handle
+
+    def Snapshot(self) -> dict:
+        communicators = {}
+        for name, byAction in self._records.items():
+            actions = {}
+            for action, (count, timed, totalNs, maxNs, produced) in byAction.items():
+                # the first call of each action is always timed, so timed is never 0 here
+                actions[Actions.Name(action)] = {
+                    "count": count,
+                    "timed": timed,
+                    "total_ns": totalNs,
+                    "mean_ns": totalNs // timed,
+                    "max_ns": maxNs,
+                    "produced": dict(zip(PRODUCED_BUCKETS, produced)),
+                }
+
+            if len(actions) > 0:
+                communicators[name] = actions
+
+        return {"max_queue_depth": self.maxQueueDepth, "communicators": communicators}
@@ -0,0 +1,51 @@
+from collections import deque
+
+def IsViewed(buffer:bytearray) -> bool:
+    # a bytearray refuses to change size while any memoryview of it (or an array built on one) is alive,
+    # so a pop and append round trip tells whether decoded frames still point into it without allocating
+    try:
+        buffer.append(buffer.pop())
+    except BufferError:
+        return True
+
+    return False
+
+class BufferPool:
+    # fixed size bytearrays for socket reads and received frames, a released buffer is handed out again once nothing views it
+    def __init__(self, bufferSize:int = 64 * 1024, maxBuffers:int = 16):
+        self.bufferSize = bufferSize
+        self.maxBuffers = maxBuffers
+        self._free:list[bytearray] = []
+        self._parked = deque()
+
+        # hits reused a buffer, misses allocated one, dropped buffers were over the limit and left to the garbage collector
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+    def Acquire(self) -> bytearray:
+        if len(self._free) == 0:
+            self._Reclaim()
+
+        if len(self._free) > 0:
+            self.hits += 1
+            return self._free.pop()
+
+        self.misses += 1
+        return bytearray(self.bufferSize)
+
+    def Release(self, buffer:bytearray):
+        if len(buffer) != self.bufferSize or len(self._free) + len(self._parked) >= self.maxBuffers:
+            self.dropped += 1
+            return
+
+        # checked when the free list runs dry, by then most consumers have finished with the frames in it
+        self._parked.append(buffer)
+
+    def _Reclaim(self):
+        for _ in range(len(self._parked)):
+            buffer = self._parked.popleft()
+            if IsViewed(buffer):
+                self._parked.append(buffer)
+            else:
+                self._free.append(buffer)
@@ -1,12 +1,17 @@
-from sdrcat_protocol.action import ActionItem, GenerateFromClient, Actions, ActionHub, Communicator
+from sdrcat_protocol.action import ActionItem, GenerateFromClient, Actions, ActionHub, Communicator, ActionQueue
 from sdrcat_protocol.deviceinfo import DeviceInfo
 
-import asyncio
-
 class ClientBase(Communicator):
     def __init__(self):
         super().__init__()
 
+    def HandleRegistrationResponse(self, hub:ActionHub):
+        # callbacks are awaited one at a time in arrival order, assign an ActionQueue before registering to pick another limit or policy
+        if self.actionQueue is None:
+            self.actionQueue = ActionQueue()
+
+        super().HandleRegistrationResponse(hub)
+
     def Reset(self):
         self.hub.SendAction(GenerateFromClient.Reset())
 
@@ -16,9 +21,18 @@ class ClientBase(Communicator):
     def SetPropertyValue(self, name:str, value:any):
         self.hub.SendAction(GenerateFromClient.SetProperty(name, value))
 
+    # does not wait, past a blocking queue's ceiling downstream the data is dropped, SendDataAsync is the way to send a steady flow
     def SendData(self, name:str, data:any, metadata:dict[str, any]):
         self.hub.SendAction(GenerateFromClient.SendData(name, data, metadata))
 
+    async def SendDataAsync(self, name:str, data:any, metadata:dict[str, any]):
+        # waits first while a blocking queue downstream is full, usually the comm's writes when the socket drains slower than data is sent
+        await self.hub.WaitForSpaceAsync(self.actionQueue)
+        self.SendData(name, data, metadata)
+
+    def ConfigureStream(self, name:str, useNumpy:bool = False, scale:bool = False, coalesce:bool = False):
+        self.hub.SendAction(GenerateFromClient.ConfigureStream(name, useNumpy, scale, coalesce))
+
     def Connect(self, connectionParams:dict[str, any]):
         self.hub.SendAction(GenerateFromClient.Connect(connectionParams))
 
@@ -31,23 +45,25 @@ class ClientBase(Communicator):
     async def OnReceivePropertyValueAsync(self, name:str, value:any): pass
     async def OnReveiveInformation(self, message:str): pass
 
+    def ActionHandlers(self) -> dict[str, callable]:
+        return {
+            Actions.ToClientDeviceInfo:     lambda a: self._Run(self.OnReceiveDeviceInfoAsync, a.params.deviceInfo),
+            Actions.ToClientPropertyValue:  lambda a: self._Run(self.OnReceivePropertyValueAsync, a.params.name, a.params.value),
+            Actions.ToClientStatus:         lambda a: self._Run(self.OnReceiveStatusChangeAsync, a.params.state),
+            Actions.ToClientStreamData:     lambda a: self._Run(self.OnReceiveDataAsync, a.params.name, a.params.data, a.params.metadata),
+            Actions.CoordinatorInformation: lambda a: self._Run(self.OnReveiveInformation, a.params.message),
+        }
+
     def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
         if action.target != "client" and action.target != "*":
             raise Exception("Received action that is not destined for 'client'.  There might have been a routing error somehwere.")
 
-        if action.action == Actions.ToClientDeviceInfo:
-            asyncio.create_task(self.OnReceiveDeviceInfoAsync(action.params.deviceInfo))
-
-        elif action.action == Actions.ToClientPropertyValue:
-            asyncio.create_task(self.OnReceivePropertyValueAsync(action.params.name, action.params.value))
-
-        elif action.action == Actions.ToClientStatus:
-            asyncio.create_task(self.OnReceiveStatusChangeAsync(action.params.state))
+        handler = self._ActionHandlerTable().get(action.action)
+        if handler is not None:
+            handler(action)
 
-        elif action.action == Actions.ToClientStreamData:
-            asyncio.create_task(self.OnReceiveDataAsync(action.params.name, action.params.data, action.params.metadata))
-
-        elif action.action == Actions.CoordinatorInformation:
-            asyncio.create_task(self.OnReveiveInformation(action.params.message))
+        return []
 
+    def _Run(self, function:callable, *args) -> list[ActionItem]:
+        self.actionQueue.Put(function, args)
         return []
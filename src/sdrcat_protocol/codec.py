@@ -0,0 +1,428 @@
+from __future__ import annotations
+from sdrcat_protocol.definitions import DataTypes
+
+from array import array
+from functools import lru_cache
+from operator import attrgetter
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BIG_ENDIAN = '>'
+LITTLE_ENDIAN = '<'
+
+def _NeedsSwap(byteOrder:str) -> bool:
+    # array works in host order, so only a wire order that differs from the host needs a byteswap pass
+    return (byteOrder == LITTLE_ENDIAN) != (sys.byteorder == 'little')
+
+STREAM_PACKER_CACHE_SIZE = 64
+
+_REAL = attrgetter('real')
+_IMAG = attrgetter('imag')
+
+def _ArrayTypeCode(candidates:str, size:int) -> str:
+    for typeCode in candidates:
+        if array(typeCode).itemsize == size:
+            return typeCode
+
+    raise Exception("No array type code with an item size of {} bytes is available".format(size))
+
+def HasNumpySupport() -> bool:
+    return numpy is not None
+
+class DataTypeCodec:
+    def __init__(self,
+            dataType: int,
+            encodeValue,
+            decodeValue,
+            encodeStream,
+            decodeStream,
+            numpyDtype: str = None,
+            decodeStreamAsNumpy = None,
+            fullScale: int = None,
+            decodeScaledStream = None,
+            decodeScaledStreamAsNumpy = None):
+
+        self.dataType = dataType
+        self.EncodeValue = encodeValue
+        self.DecodeValue = decodeValue
+        self.EncodeStream = encodeStream
+        self.DecodeStream = decodeStream
+        self.numpyDtype = numpyDtype
+
+        if decodeStreamAsNumpy is not None:
+            self.DecodeStreamAsNumpy = self._RequiringNumpy(decodeStreamAsNumpy)
+        elif numpyDtype is None:
+            self.DecodeStreamAsNumpy = decodeStream
+        else:
+            self.DecodeStreamAsNumpy = self._RequiringNumpy(self._DecodeStreamAsNumpy)
+
+        # integer IQ types can be scaled to floats in [-1, 1), every other type decodes the same with or without scaling
+        self.fullScale = fullScale
+        self.DecodeScaledStream = decodeStream if decodeScaledStream is None else decodeScaledStream
+        self.DecodeScaledStreamAsNumpy = self.DecodeStreamAsNumpy if decodeScaledStreamAsNumpy is None else self._RequiringNumpy(decodeScaledStreamAsNumpy)
+
+    def _RequiringNumpy(self, decode):
+        def Decode(streamBytes):
+            if numpy is None:
+                raise Exception("Decoding data type {} into a NumPy array was requested, but NumPy is not installed.".format(self.dataType))
+
+            return decode(streamBytes)
+
+        return Decode
+
+    def _DecodeStreamAsNumpy(self, streamBytes):
+        return numpy.frombuffer(streamBytes, dtype=self.numpyDtype)
+
+def _Unsupported(dataType:int, message:str):
+    def Raise(*args):
+        raise Exception(message.format(dataType))
+
+    return Raise
+
+_VALUE_ERROR = "Either data type {} is not supported or the value passed is not compatible with that data type."
+_DECODE_ERROR = "Either data type {} is not supported or value byte length does not match the data type."
+
+def _UnsupportedCodec(dataType:int) -> DataTypeCodec:
+    return DataTypeCodec(dataType,
+        _Unsupported(dataType, _VALUE_ERROR),
+        _Unsupported(dataType, _DECODE_ERROR),
+        _Unsupported(dataType, _VALUE_ERROR),
+        _Unsupported(dataType, _VALUE_ERROR))
+
+def _RawCodec() -> DataTypeCodec:
+    dataType = DataTypes.raw.value
+
+    def EncodeValue(value):
+        if not isinstance(value, bytes):
+            raise Exception(_VALUE_ERROR.format(dataType))
+        return value
+
+    def Decode(valueBytes):
+        # lazily decoded sections hand over memoryviews, so always give callers bytes
+        return bytes(valueBytes)
+
+    return DataTypeCodec(dataType, EncodeValue, Decode, EncodeValue, Decode)
+
+def _Utf8Codec() -> DataTypeCodec:
+    dataType = DataTypes.utf8.value
+
+    def EncodeValue(value):
+        return str(value).encode('utf-8')
+
+    def EncodeStream(streamValues):
+        if not isinstance(streamValues, str):
+            raise Exception(_VALUE_ERROR.format(dataType))
+        return streamValues.encode('utf-8')
+
+    def Decode(valueBytes):
+        return str(valueBytes, 'utf-8')
+
+    return DataTypeCodec(dataType, EncodeValue, Decode, EncodeStream, Decode)
+
+def _StreamPacker(byteOrder:str, formatChar:str):
+    # frames of a stream nearly always carry the same sample count, so one Struct per length is reused
+    @lru_cache(maxsize=STREAM_PACKER_CACHE_SIZE)
+    def Packer(count:int):
+        return struct.Struct('{}{}{}'.format(byteOrder, count, formatChar)).pack
+
+    return Packer
+
+def _NumericStreamCodecs(dataType:int, byteOrder:str, formatChar:str, typeCode:str, numpyDtype:str):
+    streamPacker = _StreamPacker(byteOrder, formatChar)
+    swap = _NeedsSwap(byteOrder)
+
+    def EncodeStream(streamValues):
+        if numpy is not None and isinstance(streamValues, numpy.ndarray):
+            return streamValues.astype(numpyDtype, copy=False).tobytes()
+
+        if not isinstance(streamValues, list):
+            raise Exception(_VALUE_ERROR.format(dataType))
+
+        return streamPacker(len(streamValues))(*streamValues)
+
+    def DecodeStream(streamBytes):
+        values = array(typeCode)
+        values.frombytes(streamBytes)
+        if swap:
+            values.byteswap()
+        return values.tolist()
+
+    return EncodeStream, DecodeStream
+
+def _IntegerCodec(dataType:DataTypes, byteOrder:str, formatChar:str, size:int) -> DataTypeCodec:
+    packer = struct.Struct(byteOrder + formatChar)
+    pack = packer.pack
+    unpack = packer.unpack
+    signed = formatChar.islower()
+    typeCode = _ArrayTypeCode('bhilq' if signed else 'BHILQ', size)
+    numpyDtype = '{}{}{}'.format(byteOrder, 'i' if signed else 'u', size)
+
+    def EncodeValue(value):
+        return pack(int(value))
+
+    def DecodeValue(valueBytes):
+        if len(valueBytes) != size:
+            raise Exception(_DECODE_ERROR.format(dataType.value))
+        return unpack(valueBytes)[0]
+
+    encodeStream, decodeStream = _NumericStreamCodecs(dataType.value, byteOrder, formatChar, typeCode, numpyDtype)
+    return DataTypeCodec(dataType.value, EncodeValue, DecodeValue, encodeStream, decodeStream, numpyDtype)
+
+def _FloatCodec(dataType:DataTypes, byteOrder:str, size:int) -> DataTypeCodec:
+    packer = struct.Struct(byteOrder + ('f' if size == 4 else 'd'))
+    pack = packer.pack
+    unpack = packer.unpack
+    typeCode = 'f' if size == 4 else 'd'
+    numpyDtype = '{}f{}'.format(byteOrder, size)
+
+    def EncodeValue(value):
+        return pack(float(value))
+
+    def DecodeValue(valueBytes):
+        if len(valueBytes) != size:
+            raise Exception(_DECODE_ERROR.format(dataType.value))
+        return unpack(valueBytes)[0]
+
+    encodeStream, decodeStream = _NumericStreamCodecs(dataType.value, byteOrder, typeCode, typeCode, numpyDtype)
+    return DataTypeCodec(dataType.value, EncodeValue, DecodeValue, encodeStream, decodeStream, numpyDtype)
+
+def _ComplexCodec(dataType:DataTypes, byteOrder:str, size:int) -> DataTypeCodec:
+    packer = struct.Struct(byteOrder + ('ff' if size == 8 else 'dd'))
+    pack = packer.pack
+    unpack = packer.unpack
+    typeCode = 'f' if size == 8 else 'd'
+    numpyDtype = '{}c{}'.format(byteOrder, size)
+    streamPacker = _StreamPacker(byteOrder, typeCode)
+    swap = _NeedsSwap(byteOrder)
+
+    def EncodeValue(value):
+        value = complex(value)
+        return pack(value.real, value.imag)
+
+    def DecodeValue(valueBytes):
+        if len(valueBytes) != size:
+            raise Exception(_DECODE_ERROR.format(dataType.value))
+        return complex(*unpack(valueBytes))
+
+    def EncodeStream(streamValues):
+        if numpy is not None and isinstance(streamValues, numpy.ndarray):
+            return streamValues.astype(numpyDtype, copy=False).tobytes()
+
+        if not isinstance(streamValues, list):
+            raise Exception(_VALUE_ERROR.format(dataType.value))
+
+        parts = [0.0] * (2 * len(streamValues))
+        parts[0::2] = [c.real for c in streamValues]
+        parts[1::2] = [c.imag for c in streamValues]
+        return streamPacker(len(parts))(*parts)
+
+    def DecodeStream(streamBytes):
+        values = array(typeCode)
+        values.frombytes(streamBytes)
+        if swap:
+            values.byteswap()
+        return list(map(complex, values[0::2], values[1::2]))
+
+    return DataTypeCodec(dataType.value, EncodeValue, DecodeValue, EncodeStream, DecodeStream, numpyDtype)
+
+def _IqArrayParts(dataType:int, streamValues) -> tuple[any, any]:
+    # integer IQ streams take complex values, or integers already interleaved as I, Q, I, Q...
+    if streamValues.dtype.kind == 'c':
+        return streamValues.real, streamValues.imag
+
+    if streamValues.size % 2 != 0:
+        raise Exception(_VALUE_ERROR.format(dataType))
+
+    flat = streamValues.reshape(-1)
+    return flat[0::2], flat[1::2]
+
+def _IqListParts(dataType:int, streamValues) -> list[int]:
+    if not isinstance(streamValues, list):
+        raise Exception(_VALUE_ERROR.format(dataType))
+
+    parts = [0] * (2 * len(streamValues))
+    parts[0::2] = map(int, map(_REAL, streamValues))
+    parts[1::2] = map(int, map(_IMAG, streamValues))
+    return parts
+
+def _ComplexIntegerCodec(dataType:DataTypes, byteOrder:str, formatChar:str, size:int) -> DataTypeCodec:
+    packer = struct.Struct(byteOrder + formatChar * 2)
+    pack = packer.pack
+    unpack = packer.unpack
+    typeCode = _ArrayTypeCode('bhilq', size)
+    numpyDtype = '{}i{}'.format(byteOrder, size)
+    streamPacker = _StreamPacker(byteOrder, formatChar)
+    swap = _NeedsSwap(byteOrder) and size > 1
+    scale = 1.0 / (1 << (8 * size - 1))
+
+    def EncodeValue(value):
+        value = complex(value)
+        return pack(int(value.real), int(value.imag))
+
+    def DecodeValue(valueBytes):
+        if len(valueBytes) != 2 * size:
+            raise Exception(_DECODE_ERROR.format(dataType.value))
+        return complex(*unpack(valueBytes))
+
+    def EncodeStream(streamValues):
+        if numpy is not None and isinstance(streamValues, numpy.ndarray):
+            real, imag = _IqArrayParts(dataType.value, streamValues)
+            result = numpy.empty(2 * len(real), dtype=numpyDtype)
+            result[0::2] = real
+            result[1::2] = imag
+            return result.tobytes()
+
+        parts = _IqListParts(dataType.value, streamValues)
+        return streamPacker(len(parts))(*parts)
+
+    def Interleaved(streamBytes):
+        if len(streamBytes) % (2 * size) != 0:
+            raise Exception(_DECODE_ERROR.format(dataType.value))
+
+        values = array(typeCode)
+        values.frombytes(streamBytes)
+        if swap:
+            values.byteswap()
+        return values
+
+    def DecodeStream(streamBytes):
+        values = Interleaved(streamBytes)
+        return list(map(complex, values[0::2], values[1::2]))
+
+    def DecodeScaledStream(streamBytes):
+        values = Interleaved(streamBytes)
+        return [complex(i * scale, q * scale) for i, q in zip(values[0::2], values[1::2])]
+
+    def DecodeStreamAsNumpy(streamBytes):
+        if len(streamBytes) % (2 * size) != 0:
+            raise Exception(_DECODE_ERROR.format(dataType.value))
+        return numpy.frombuffer(streamBytes, dtype=numpyDtype).astype(numpy.float32).view(numpy.complex64)
+
+    def DecodeScaledStreamAsNumpy(streamBytes):
+        values = DecodeStreamAsNumpy(streamBytes)
+        values *= numpy.float32(scale)
+        return values
+
+    return DataTypeCodec(dataType.value, EncodeValue, DecodeValue, EncodeStream, DecodeStream, None,
+        DecodeStreamAsNumpy, 1 << (8 * size - 1), DecodeScaledStream, DecodeScaledStreamAsNumpy)
+
+def _PackedComplex12Codec() -> DataTypeCodec:
+    # each sample is 3 bytes: the top 8 bits of I, the low 4 bits of I with the top 4 bits of Q, then the low 8 bits of Q
+    # the bit packing is the same whichever byte order was negotiated
+    dataType = DataTypes.cs12.value
+    signExtend = [v - 4096 if v & 2048 else v for v in range(4096)]
+    scale = 1.0 / 2048
+
+    def Pack(real, imag) -> bytes:
+        if min(real, default=0) < -2048 or max(real, default=0) > 2047 or min(imag, default=0) < -2048 or max(imag, default=0) > 2047:
+            raise Exception(_VALUE_ERROR.format(dataType))
+
+        result = bytearray(3 * len(real))
+        result[0::3] = bytes([(i >> 4) & 0xFF for i in real])
+        result[1::3] = bytes([((i & 0x0F) << 4) | ((q >> 8) & 0x0F) for i, q in zip(real, imag)])
+        result[2::3] = bytes([q & 0xFF for q in imag])
+        return bytes(result)
+
+    def Unpacked(streamBytes):
+        if len(streamBytes) % 3 != 0:
+            raise Exception(_DECODE_ERROR.format(dataType))
+
+        streamBytes = bytes(streamBytes)
+        real = [signExtend[(h << 4) | (m >> 4)] for h, m in zip(streamBytes[0::3], streamBytes[1::3])]
+        imag = [signExtend[((m & 0x0F) << 8) | l] for m, l in zip(streamBytes[1::3], streamBytes[2::3])]
+        return real, imag
+
+    def EncodeValue(value):
+        value = complex(value)
+        return Pack([int(value.real)], [int(value.imag)])
+
+    def DecodeValue(valueBytes):
+        if len(valueBytes) != 3:
+            raise Exception(_DECODE_ERROR.format(dataType))
+        real, imag = Unpacked(valueBytes)
+        return complex(real[0], imag[0])
+
+    def EncodeStream(streamValues):
+        if numpy is not None and isinstance(streamValues, numpy.ndarray):
+            real, imag = _IqArrayParts(dataType, streamValues)
+            real = real.astype(numpy.int16)
+            imag = imag.astype(numpy.int16)
+            if real.size > 0 and (min(real.min(), imag.min()) < -2048 or max(real.max(), imag.max()) > 2047):
+                raise Exception(_VALUE_ERROR.format(dataType))
+
+            result = numpy.empty((real.size, 3), dtype=numpy.uint8)
+            result[:, 0] = (real >> 4) & 0xFF
+            result[:, 1] = ((real & 0x0F) << 4) | ((imag >> 8) & 0x0F)
+            result[:, 2] = imag & 0xFF
+            return result.tobytes()
+
+        parts = _IqListParts(dataType, streamValues)
+        return Pack(parts[0::2], parts[1::2])
+
+    def DecodeStream(streamBytes):
+        real, imag = Unpacked(streamBytes)
+        return list(map(complex, real, imag))
+
+    def DecodeScaledStream(streamBytes):
+        real, imag = Unpacked(streamBytes)
+        return [complex(i * scale, q * scale) for i, q in zip(real, imag)]
+
+    def DecodeStreamAsNumpy(streamBytes):
+        if len(streamBytes) % 3 != 0:
+            raise Exception(_DECODE_ERROR.format(dataType))
+
+        packed = numpy.frombuffer(streamBytes, dtype=numpy.uint8).reshape(-1, 3).astype(numpy.int16)
+        values = numpy.empty((len(packed), 2), dtype=numpy.int16)
+        values[:, 0] = (packed[:, 0] << 4) | (packed[:, 1] >> 4)
+        values[:, 1] = ((packed[:, 1] & 0x0F) << 8) | packed[:, 2]
+        # move bit 11 up to the int16 sign bit and shift back down to sign extend
+        values = (values << 4) >> 4
+        return values.astype(numpy.float32).view(numpy.complex64).reshape(-1)
+
+    def DecodeScaledStreamAsNumpy(streamBytes):
+        values = DecodeStreamAsNumpy(streamBytes)
+        values *= numpy.float32(scale)
+        return values
+
+    return DataTypeCodec(dataType, EncodeValue, DecodeValue, EncodeStream, DecodeStream, None,
+        DecodeStreamAsNumpy, 2048, DecodeScaledStream, DecodeScaledStreamAsNumpy)
+
+def _BuildCodecs(byteOrder:str) -> dict[int, DataTypeCodec]:
+    codecs = [
+        _RawCodec(),
+        _Utf8Codec(),
+        _IntegerCodec(DataTypes.uint8, byteOrder, 'B', 1),
+        _IntegerCodec(DataTypes.sint8, byteOrder, 'b', 1),
+        _IntegerCodec(DataTypes.uint16, byteOrder, 'H', 2),
+        _IntegerCodec(DataTypes.sint16, byteOrder, 'h', 2),
+        _IntegerCodec(DataTypes.uint32, byteOrder, 'I', 4),
+        _IntegerCodec(DataTypes.sint32, byteOrder, 'i', 4),
+        _IntegerCodec(DataTypes.uint64, byteOrder, 'Q', 8),
+        _IntegerCodec(DataTypes.sint64, byteOrder, 'q', 8),
+        _FloatCodec(DataTypes.float32, byteOrder, 4),
+        _FloatCodec(DataTypes.float64, byteOrder, 8),
+        _ComplexCodec(DataTypes.complex64, byteOrder, 8),
+        _ComplexCodec(DataTypes.complex128, byteOrder, 16),
+        _ComplexIntegerCodec(DataTypes.cs8, byteOrder, 'b', 1),
+        _ComplexIntegerCodec(DataTypes.cs16, byteOrder, 'h', 2),
+        _PackedComplex12Codec(),
+    ]
+
+    return {c.dataType: c for c in codecs}
+
+CODECS = _BuildCodecs(BIG_ENDIAN)
+
+# used once both ends have negotiated little endian payloads, the frame headers stay big endian
+LITTLE_ENDIAN_CODECS = _BuildCodecs(LITTLE_ENDIAN)
+
+def GetCodec(dataType:int, littleEndian:bool = False) -> DataTypeCodec:
+    codec = (LITTLE_ENDIAN_CODECS if littleEndian else CODECS).get(dataType)
+    if codec is None:
+        return _UnsupportedCodec(dataType)
+
+    return codec
@@ -1,11 +1,16 @@
-from sdrcat_protocol.action import GenerateFromComm, ActionHub, Communicator, ActionItem, Actions
-
-import asyncio
+from sdrcat_protocol.action import GenerateFromComm, ActionHub, Communicator, ActionItem, Actions, ActionQueue
 
 class CommBase(Communicator):
     def __init__(self):
         super().__init__()
 
+    def HandleRegistrationResponse(self, hub:ActionHub):
+        # callbacks are awaited one at a time in arrival order, assign an ActionQueue before registering to pick another limit or policy
+        if self.actionQueue is None:
+            self.actionQueue = ActionQueue()
+
+        super().HandleRegistrationResponse(hub)
+
     def CommReceiving(self, data:bytes):
         self.hub.SendAction(GenerateFromComm.Receive(data))
 
@@ -19,17 +24,23 @@ class CommBase(Communicator):
     async def OnCommRequestDisconnectAsync(self): pass
     async def OnCommRequestConnectAsync(self, connectionParams:dict[str, any]): pass
 
+    def ActionHandlers(self) -> dict[str, callable]:
+        return {
+            Actions.ToCommTransmit:   lambda a: self._Run(self.OnCommRequestWriteAsync, a.params.data),
+            Actions.ToCommConnect:    lambda a: self._Run(self.OnCommRequestConnectAsync, a.params.connectionParams),
+            Actions.ToCommDisconnect: lambda a: self._Run(self.OnCommRequestDisconnectAsync),
+        }
+
     def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
         if action.target != "comm" and action.target != "*":
             raise Exception("Received action that is not destined for 'comm'.  There might have been a routing error somehwere.")
 
-        if action.action == Actions.ToCommTransmit:
-            asyncio.create_task(self.OnCommRequestWriteAsync(action.params.data))
-
-        elif action.action == Actions.ToCommConnect:
-            asyncio.create_task(self.OnCommRequestConnectAsync(action.params.connectionParams))
+        handler = self._ActionHandlerTable().get(action.action)
+        if handler is not None:
+            handler(action)
 
-        elif action.action == Actions.ToCommDisconnect:
-            asyncio.create_task(self.OnCommRequestDisconnectAsync())
+        return []
 
+    def _Run(self, function:callable, *args) -> list[ActionItem]:
+        self.actionQueue.Put(function, args)
         return []
\ No newline at end of file
@@ -1,49 +1,42 @@
 from sdrcat_protocol.comm.commbase import CommBase
+from sdrcat_protocol.comm.receiveprotocol import ReceiveProtocol
+from sdrcat_protocol.bufferpool import BufferPool
 
 import asyncio
 
 class CommClientTCP(CommBase):
     def __init__(self):
         super().__init__()
-        self.writer : asyncio.StreamWriter = None
+        self.protocol : ReceiveProtocol = None
         self.serverTasks: list[Task] = []
 
+        # socket reads land in these buffers instead of a new bytes object per read
+        self.readPool = BufferPool()
+
     async def OnCommRequestWriteAsync(self, data:bytes):
-        if self.writer is None:
+        if self.protocol is None:
             return
 
-        self.writer.write(data)
-        await self.writer.drain()
+        await self.protocol.WriteAsync(data)
 
     async def OnCommRequestDisconnectAsync(self):
-        if self.writer is None:
+        if self.protocol is None:
             return
 
-        self.writer.close()
-        await self.writer.wait_closed()
+        await self.protocol.CloseAsync()
         
     async def OnCommRequestConnectAsync(self, connectionParams:dict[str, any]):
-        if self.writer is not None:
+        if self.protocol is not None:
             return
 
-        reader:asyncio.StreamReader = None
-        writer:asyncio.StreamReader = None
-
-        reader, writer = await asyncio.open_connection(connectionParams["host"], connectionParams["port"])
+        loop = asyncio.get_running_loop()
+        await loop.create_connection(lambda: ReceiveProtocol(self, self.readPool), connectionParams["host"], connectionParams["port"])
 
-        self.writer = writer
+    def OnProtocolConnected(self, protocol:ReceiveProtocol) -> bool:
+        self.protocol = protocol
         self.CommConnecting()
+        return True
 
-        try:
-            while True:
-                payload:bytes = await reader.read(1024)
-                if len(payload) == 0:
-                    break
-
-                self.CommReceiving(payload)
-            
-        except Exception as ex:
-            print(ex)
-
+    def OnProtocolDisconnected(self, protocol:ReceiveProtocol):
         self.CommDisconnecting()
-        self.writer = None
\ No newline at end of file
+        self.protocol = None
\ No newline at end of file
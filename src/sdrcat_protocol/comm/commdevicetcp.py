@@ -1,49 +1,49 @@
 from sdrcat_protocol.comm.commbase import CommBase
+from sdrcat_protocol.comm.receiveprotocol import ReceiveProtocol
+from sdrcat_protocol.bufferpool import BufferPool
 
 import asyncio
 
 class CommDeviceTCP(CommBase):
     def __init__(self):
         super().__init__()
-        self.writer : asyncio.StreamWriter = None
+        self.protocol : ReceiveProtocol = None
         self.serverTasks: list[Task] = []
 
+        # socket reads land in these buffers instead of a new bytes object per read
+        self.readPool = BufferPool()
+
     async def OnCommRequestWriteAsync(self, data:bytes):
-        if self.writer is None:
+        if self.protocol is None:
             return
 
-        self.writer.write(data)
-        await self.writer.drain()
+        await self.protocol.WriteAsync(data)
         
     async def OnCommRequestConnectAsync(self, connectionParams:dict[str, any]):
-        asyncio.create_task(self._TcpConnectionListenLoop(connectionParams["host"], connectionParams["port"]))
+        # kept so the listen loop is not garbage collected while it serves
+        self.serverTasks.append(asyncio.create_task(self._TcpConnectionListenLoop(connectionParams["host"], connectionParams["port"])))
 
     async def _TcpConnectionListenLoop(self, host:str, port:int):
         try:    
-            server = await asyncio.start_server(self._HandleClient, host, port, limit=1)
+            loop = asyncio.get_running_loop()
+            server = await loop.create_server(lambda: ReceiveProtocol(self, self.readPool), host, port)
             async with server:
                 await server.serve_forever()
         except Exception as ex:
             print(ex)
 
-    async def _HandleClient(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
-        if self.writer is not None:
-            writer.close()
-            return
+    def OnProtocolConnected(self, protocol:ReceiveProtocol) -> bool:
+        # one client at a time, later connections are closed right away
+        if self.protocol is not None:
+            return False
 
-        self.writer = writer
+        self.protocol = protocol
         self.CommConnecting()
+        return True
 
-        try:
-            while True:
-                payload:bytes = await reader.read(1024)
-                if len(payload) == 0:
-                    break
-
-                self.CommReceiving(payload)
-            
-        except Exception as ex:
-            print(ex)
+    def OnProtocolDisconnected(self, protocol:ReceiveProtocol):
+        if self.protocol is not protocol:
+            return
 
         self.CommDisconnecting()
-        self.writer = None
\ No newline at end of file
+        self.protocol = None
\ No newline at end of file
@@ -0,0 +1,87 @@
+from sdrcat_protocol.bufferpool import BufferPool, IsViewed
+
+import asyncio
+
+class ReceiveProtocol(asyncio.BufferedProtocol):
+    # the event loop reads straight into a pooled buffer, which is handed to the comm and reused for the next read
+    # unless something downstream kept a view of it, the coordinators copy what they keep before the dispatch returns
+    def __init__(self, comm, pool:BufferPool):
+        self._comm = comm
+        self._pool = pool
+        self._buffer:bytearray = None
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._resuming:asyncio.Task = None
+
+        self.transport:asyncio.Transport = None
+        self.closed = asyncio.get_running_loop().create_future()
+
+    def connection_made(self, transport:asyncio.Transport):
+        self.transport = transport
+
+        if not self._comm.OnProtocolConnected(self):
+            transport.close()
+
+    def get_buffer(self, sizehint:int) -> bytearray:
+        if self._buffer is None:
+            self._buffer = self._pool.Acquire()
+
+        return self._buffer
+
+    def buffer_updated(self, nbytes:int):
+        with memoryview(self._buffer) as view:
+            self._comm.CommReceiving(view[:nbytes])
+
+        if IsViewed(self._buffer):
+            self._pool.Release(self._buffer)
+            self._buffer = None
+
+        # a communicator whose blocking queue is full stops the socket reads until it has caught up
+        if self._resuming is None and self._comm.hub.Saturated():
+            self.transport.pause_reading()
+            self._resuming = asyncio.get_running_loop().create_task(self._ResumeReadingAsync())
+
+    def eof_received(self) -> bool:
+        return False
+
+    def connection_lost(self, ex:Exception):
+        if ex is not None:
+            print(ex)
+
+        if self._buffer is not None:
+            self._pool.Release(self._buffer)
+            self._buffer = None
+
+        if self._resuming is not None:
+            self._resuming.cancel()
+            self._resuming = None
+
+        self._writable.set()
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+        self._comm.OnProtocolDisconnected(self)
+
+    def pause_writing(self):
+        self._writable.clear()
+
+    def resume_writing(self):
+        self._writable.set()
+
+    async def _ResumeReadingAsync(self):
+        await self._comm.hub.WaitForSpaceAsync()
+        self._resuming = None
+
+        if not self.transport.is_closing():
+            self.transport.resume_reading()
+
+    async def WriteAsync(self, data:bytes):
+        if self.transport.is_closing():
+            return
+
+        self.transport.write(data)
+        await self._writable.wait()
+
+    async def CloseAsync(self):
+        self.transport.close()
+        await self.closed
@@ -0,0 +1,79 @@
+from sdrcat_protocol.definitions import CompressionTypes
+
+import bz2
+import lzma
+import zlib
+
+# a device advertises compressed streams by defining a metadata element with this name, every compressed section carries it with the CompressionTypes value
+COMPRESSION_METADATA_NAME = "sdrcat.compression"
+
+_COMPRESSORS = {
+    CompressionTypes.zlib.value: (zlib.compress, zlib.decompress),
+    CompressionTypes.lzma.value: (lzma.compress, lzma.decompress),
+    CompressionTypes.bz2.value: (bz2.compress, bz2.decompress),
+}
+
+def Compress(compressionType:int, data:bytes) -> bytes:
+    if compressionType not in _COMPRESSORS:
+        raise Exception("Unsupported compression type {}".format(compressionType))
+
+    return _COMPRESSORS[compressionType][0](data)
+
+def Decompress(compressionType:int, data:bytes) -> bytes:
+    if compressionType not in _COMPRESSORS:
+        raise Exception("Unsupported compression type {}".format(compressionType))
+
+    return _COMPRESSORS[compressionType][1](data)
+
+class StreamCompressor:
+    def __init__(self,
+            compressionType: CompressionTypes = CompressionTypes.zlib,
+            minimumBytes: int = 1024,
+            minimumRatio: float = 1.2,
+            retryInterval: int = 16,
+            onRatio = None):
+
+        if int(compressionType) not in _COMPRESSORS:
+            raise Exception("Unsupported compression type {}".format(compressionType))
+
+        self.compressionType = int(compressionType)
+        self.minimumBytes = minimumBytes
+        self.minimumRatio = minimumRatio
+
+        # after a frame that did not compress well enough, this many frames are sent as they are before trying again
+        self.retryInterval = retryInterval
+
+        # called with (rawLength, compressedLength) for every frame that was compressed
+        self.onRatio = onRatio
+
+        # totals over every frame that went through the compressor, whether the result was sent or not
+        self.rawBytes = 0
+        self.compressedBytes = 0
+        self._skipFrames = 0
+
+    def Ratio(self) -> float:
+        if self.compressedBytes == 0:
+            return 1.0
+
+        return self.rawBytes / self.compressedBytes
+
+    def Compress(self, payload:bytes) -> tuple[bytes, int]:
+        if len(payload) < self.minimumBytes:
+            return payload, CompressionTypes.none.value
+
+        if self._skipFrames > 0:
+            self._skipFrames -= 1
+            return payload, CompressionTypes.none.value
+
+        compressed = Compress(self.compressionType, payload)
+
+        self.rawBytes += len(payload)
+        self.compressedBytes += len(compressed)
+        if self.onRatio is not None:
+            self.onRatio(len(payload), len(compressed))
+
+        if len(compressed) * self.minimumRatio > len(payload):
+            self._skipFrames = self.retryInterval
+            return payload, CompressionTypes.none.value
+
+        return compressed, self.compressionType
@@ -0,0 +1,30 @@
+from sdrcat_protocol.definitions import SectionTypes, Capabilities
+from sdrcat_protocol.network import Packet, Section, EnumerateSection
+
+def _Frame(section:Section, crc:bool = False) -> bytes:
+    return bytes(Packet([section]).Encode(crc))
+
+class ControlFrames:
+    NotAllowed = _Frame(Section(SectionTypes.NotAllowed))
+    Confirmed = _Frame(Section(SectionTypes.Confirmed))
+    Reset = _Frame(Section(SectionTypes.Reset))
+    Enumerate = _Frame(EnumerateSection())
+
+    # Enumerate commands keyed by the capabilities they ask for, the entry for none is Enumerate itself
+    ENUMERATE_REQUESTS: dict[int, bytes] = {}
+
+    # every control frame as it may arrive, with a zeroed or a real CRC, mapped to one shared decoded packet
+    PACKETS: dict[bytes, Packet] = {}
+
+    # the same frames with their CRC already stamped, for coordinators that send CRCs
+    STAMPED: dict[bytes, bytes] = {}
+
+# every combination of capability flags
+for _capabilities in range(2 * max(Capabilities)):
+    ControlFrames.ENUMERATE_REQUESTS[_capabilities] = _Frame(EnumerateSection(_capabilities))
+
+for _section in [Section(SectionTypes.NotAllowed), Section(SectionTypes.Confirmed), Section(SectionTypes.Reset)] + [EnumerateSection(c) for c in ControlFrames.ENUMERATE_REQUESTS]:
+    _packet = Packet([_section])
+    ControlFrames.PACKETS[_Frame(_section)] = _packet
+    ControlFrames.PACKETS[_Frame(_section, True)] = _packet
+    ControlFrames.STAMPED[_Frame(_section)] = _Frame(_section, True)
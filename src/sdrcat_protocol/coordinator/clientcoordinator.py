@@ -1,52 +1,67 @@
 from . import clientcoordinatorcore as core
 
-from sdrcat_protocol.definitions import ClientProtocolState
+from sdrcat_protocol.definitions import ClientProtocolState, Capabilities, DiagnosticLevels
 from sdrcat_protocol.action import ActionItem, Actions, Communicator
-from sdrcat_protocol.network import EnumerationSection, StreamReader
+from sdrcat_protocol.network import EnumerationSection, StreamReader, MAX_FRAME_LENGTH
+from sdrcat_protocol.controlframes import ControlFrames
+from sdrcat_protocol.bufferpool import BufferPool
+from .transmitter import Transmitter
+from .diagnostics import Diagnostics, NO_DIAGNOSTICS
 
 class ClientCoordinator(Communicator):
     def __init__(self):
         super().__init__()
         
+        # information actions up to this level are built and passed on, include_informational_messages = True is the same as Trace
+        self.diagnostics_level = DiagnosticLevels.Off
         self.include_informational_messages = False
+        self._diagnostics = NO_DIAGNOSTICS
+
+        # CRC16 is off by default so frames stay compatible with peers that leave the field zeroed
+        self.encode_crc = False
+        self.verify_crc = False
+
+        # when the window is above zero, outgoing frames queued within it (or until the byte cap) are sent as one multi-section packet
+        self.coalesce_window_us = 0
+        self.coalesce_max_bytes = MAX_FRAME_LENGTH
+        self._transmitter = Transmitter(self)
+
+        # ask the device for little endian values, which it may decline, frame headers stay big endian either way
+        self.little_endian_payloads = False
+
+        # received frames are kept in recycled buffers, its hits and misses show how often a buffer still had to be allocated
+        self.frame_pool = BufferPool()
 
         # Coordinator State
         self._enumeration = EnumerationSection()
-        self._reader = StreamReader()
+        self._reader = StreamReader(lazy=True, knownFrames=ControlFrames.PACKETS, pool=self.frame_pool)
         self._state = ClientProtocolState.Disconnected
-        
+        self._streamConfiguration = {}
+
+        # incoming action -> core function producing the intermediate actions
+        self._actionHandlers = {
+            Actions.FromClientGetProperty:     lambda a: core.ClientGettingPropertyValue(self._state, self._enumeration, a.params.name, diagnostics=self._diagnostics),
+            Actions.FromClientSetProperty:     lambda a: core.ClientSettingPropertyValue(self._state, self._enumeration, a.params.name, a.params.value, diagnostics=self._diagnostics),
+            Actions.FromClientStreamData:      lambda a: core.ClientSendingDataToDevice(self._state, self._enumeration, a.params.name, a.params.data, a.params.metadata, diagnostics=self._diagnostics),
+            Actions.FromClientReset:           lambda a: core.ClientResetting(self._state, diagnostics=self._diagnostics),
+            Actions.FromClientConfigureStream: lambda a: core.ClientConfiguringStream(a.params, diagnostics=self._diagnostics),
+            Actions.FromClientConnect:         lambda a: core.ClientConnecting(self._state, a.params.connectionParams, diagnostics=self._diagnostics),
+            Actions.FromClientDisconnect:      lambda a: core.ClientDisconnecting(self._state, diagnostics=self._diagnostics),
+            Actions.FromCommConnect:           lambda a: core.CommConnectiong(self._state, self._RequestedCapabilities(), diagnostics=self._diagnostics),
+            Actions.FromCommDisconnect:        lambda a: core.CommDisconnecting(self._state, diagnostics=self._diagnostics),
+            Actions.FromCommReceive:           self._CommReceiving,
+        }
+
     def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
         if action.target != "coordinator" and aciton.target != "*":
             raise Exception("Action was misrouted.")
 
-        intermediateActions:list[ActionItem] = []
-
-        if action.action == Actions.FromClientGetProperty:
-            intermediateActions = core.ClientGettingPropertyValue(self._state, self._enumeration, action.params.name)
-
-        elif action.action == Actions.FromClientSetProperty:
-            intermediateActions = core.ClientSettingPropertyValue(self._state, self._enumeration, action.params.name, action.params.value)
-
-        elif action.action == Actions.FromClientStreamData:
-            intermediateActions = core.ClientSendingDataToDevice(self._state, self._enumeration, action.params.name, action.params.data, action.params.metadata)
-
-        elif action.action == Actions.FromClientReset:
-            intermediateActions = core.ClientResetting(self._state)
+        level = DiagnosticLevels.Trace if self.include_informational_messages else self.diagnostics_level
+        if level != self._diagnostics.level:
+            self._diagnostics = Diagnostics(level)
 
-        elif action.action == Actions.FromClientConnect:
-            intermediateActions = core.ClientConnecting(self._state, action.params.connectionParams)
-
-        elif action.action == Actions.FromClientDisconnect:
-            intermediateActions = core.ClientDisconnecting(self._state)
-
-        elif action.action == Actions.FromCommConnect:
-            intermediateActions = core.CommConnectiong(self._state)
-
-        elif action.action == Actions.FromCommDisconnect:
-            intermediateActions = core.CommDisconnecting(self._state)
-
-        elif action.action == Actions.FromCommReceive:
-            intermediateActions = core.CommReceivingData(self._state, self._enumeration, self._reader, action.params.data)
+        handler = self._actionHandlers.get(action.action)
+        intermediateActions:list[ActionItem] = [] if handler is None else handler(action)
 
         resultActions:list[ActionItem] = []
 
@@ -61,7 +76,22 @@ class ClientCoordinator(Communicator):
                 elif action.action == Actions.CoordinatorSetEnumeration:
                     self._enumeration = action.params[0]
 
-            elif action.action != Actions.CoordinatorInformation or (action.action == Actions.CoordinatorInformation and self.include_informational_messages):
+                elif action.action == Actions.CoordinatorSetStreamConfiguration:
+                    self._streamConfiguration[action.params.name] = action.params
+
+            elif action.action == Actions.ToCommTransmit:
+                resultActions.extend(self._transmitter.Transmit(action))
+
+            else:
                 resultActions.append(action)
 
-        return resultActions
\ No newline at end of file
+        resultActions.extend(self._transmitter.Drain())
+
+        return resultActions
+
+    def _RequestedCapabilities(self) -> int:
+        return Capabilities.LittleEndian if self.little_endian_payloads else Capabilities.none
+
+    def _CommReceiving(self, action:ActionItem) -> list[ActionItem]:
+        self._reader.verifyCrc = self.verify_crc
+        return core.CommReceivingData(self._state, self._enumeration, self._streamConfiguration, self._reader, action.params.data, self._RequestedCapabilities(), diagnostics=self._diagnostics)
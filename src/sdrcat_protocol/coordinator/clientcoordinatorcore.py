@@ -1,104 +1,138 @@
-from sdrcat_protocol.definitions import DataTypes, DispositionTypes, SectionTypes, ClientProtocolState
+from sdrcat_protocol.definitions import DataTypes, DispositionTypes, SectionTypes, CompressionTypes, ClientProtocolState
 from sdrcat_protocol.network import *
+from sdrcat_protocol.controlframes import ControlFrames
+from sdrcat_protocol.codec import HasNumpySupport
+from sdrcat_protocol.compression import Decompress, COMPRESSION_METADATA_NAME
 from sdrcat_protocol.action import ActionItem, GenerateFromClientCoordinator as Generate
+from sdrcat_protocol.action.action import StreamConfigurationParams
 from sdrcat_protocol.deviceinfo import DeviceInfo
+from .diagnostics import Diagnostics, NO_DIAGNOSTICS
 
-def ClientGettingPropertyValue(currentState:int, currentEnumeration:EnumerationSection, propertyName:str) -> list[ActionItem]:
+def ClientGettingPropertyValue(currentState:int, currentEnumeration:EnumerationSection, propertyName:str, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information(f"Sending GetProperty for '{propertyName}'"))
+    if diagnostics.trace:
+        actions.append(Generate.Information(f"Sending GetProperty for '{propertyName}'"))
 
     if currentState != ClientProtocolState.LinkEstablished:
-        actions.append(Generate.Information("Link is not established. Aborting."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Link is not established. Aborting."))
         return actions
 
     element = currentEnumeration.GetPropertyByName(propertyName)
     if element is None or (element.disposition != DispositionTypes.EditableProperty.value and element.disposition != DispositionTypes.ReadonlyProperty.value):
-        actions.append(Generate.Information("Property with that name has not been defined. Aborting."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Property with that name has not been defined. Aborting."))
         return actions
 
     actions.append(Generate.CommTransmit(Packet([GetPropertySection(element.elementId)]).Encode()))
     return actions
 
 
-def ClientSettingPropertyValue(currentState:int, currentEnumeration:EnumerationSection, propertyName:str, value) -> list[ActionItem]:
+def ClientSettingPropertyValue(currentState:int, currentEnumeration:EnumerationSection, propertyName:str, value, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information(f"Sending SetProperty for {propertyName}"))
+    if diagnostics.trace:
+        actions.append(Generate.Information(f"Sending SetProperty for {propertyName}"))
 
     if currentState != ClientProtocolState.LinkEstablished:
-        actions.append(Generate.Information("Link is not established. Aborting."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Link is not established. Aborting."))
         return actions
 
     element = currentEnumeration.GetPropertyByName(propertyName)
     encodedValue = element.EncodeValue(value)
     if element is None or element.disposition != DispositionTypes.EditableProperty.value:
-        actions.append(Generate.Information("Editable property with that name has not been defined. Aborting."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Editable property with that name has not been defined. Aborting."))
         return actions
 
     actions.append(Generate.CommTransmit(Packet([PropertyValueSection(SectionTypes.SetProperty, element.elementId, encodedValue)]).Encode()))
     return actions
 
 
-def ClientSendingDataToDevice(currentState:int, currentEnumeration:EnumerationSection, streamName, data, metadata) -> list[ActionItem]:
+def ClientSendingDataToDevice(currentState:int, currentEnumeration:EnumerationSection, streamName, data, metadata, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information(f"Sending data through stream {streamName}"))
+    if diagnostics.trace:
+        actions.append(Generate.Information(f"Sending data through stream {streamName}"))
 
     if currentState != ClientProtocolState.LinkEstablished:
-        actions.append(Generate.Information("Link is not established. Aborting."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Link is not established. Aborting."))
         return actions
 
     element = currentEnumeration.GetPropertyByName(streamName)
     if element is None or element.disposition != DispositionTypes.ClientToDeviceStream.value:
-        actions.append(Generate.Information("Stream name is invalid. Aborting."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Stream name is invalid. Aborting."))
         return actions
 
     encodedMetadata = []
-    for k in metadata:
-        metaElement = currentEnumeration.GetPropertyByName(k)
-        if metaElement is None or metaElement.disposition != DispositionTypes.Metadata.value:
-            actions.append(Generate.Information(f"Supplied metadata with name {k} has not been defined. Ignoring."))
-            continue
+    if metadata is not None:
+        template = currentEnumeration.GetMetadataTemplate(metadata)
+        for k in template.unknownNames:
+            if diagnostics.info:
+                actions.append(Generate.Information(f"Supplied metadata with name {k} has not been defined. Ignoring."))
 
-        item = MetadataItem(metaElement.metadataId, metaElement.EncodeValue(metadata[k]))
-        encodedMetadata.append(item)
+        encodedMetadata = template.Encode(metadata)
 
     section = DataSection(SectionTypes.ClientToDeviceStream, element.elementId, element.EncodeStream(data), encodedMetadata)
     actions.append(Generate.CommTransmit(Packet([section]).Encode()))
     return actions
 
 
-def ClientResetting(currentState:int) -> list[ActionItem]:
+def ClientConfiguringStream(configuration:StreamConfigurationParams, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information("Requesting reset."))
+    if diagnostics.info:
+        actions.append(Generate.Information(f"Configuring stream {configuration.name}"))
+
+    if configuration.useNumpy and not HasNumpySupport():
+        if diagnostics.info:
+            actions.append(Generate.Information("NumPy decoding was requested, but NumPy is not installed. Aborting."))
+        return actions
+
+    actions.append(Generate.SetStreamConfiguration(configuration))
+    return actions
+
+
+def ClientResetting(currentState:int, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
+    actions = []
+    if diagnostics.info:
+        actions.append(Generate.Information("Requesting reset."))
 
     if currentState != ClientProtocolState.LinkEstablished:
-        actions.append(Generate.Information("Link is not established. Aborting."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Link is not established. Aborting."))
         return actions
 
-    actions.append(Generate.CommTransmit(Packet([Section(SectionTypes.Reset)]).Encode()))
+    actions.append(Generate.CommTransmit(ControlFrames.Reset))
     return actions
 
 
-def CommConnectiong(currentState:int) -> list[ActionItem]:
+def CommConnectiong(currentState:int, capabilities:int = 0, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information("Connecting."))
+    if diagnostics.info:
+        actions.append(Generate.Information("Connecting."))
 
     if currentState == ClientProtocolState.Disconnected:
-        actions.append(Generate.Information("Changing state to Enumerating."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Changing state to Enumerating."))
         actions.append(Generate.ChangeState(ClientProtocolState.Enumerating))
         actions.append(Generate.ClientStatus(ClientProtocolState.Enumerating))
 
-        actions.append(Generate.Information("Sending Enumerate."))
-        actions.append(Generate.CommTransmit(Packet([Section(SectionTypes.Enumerate)]).Encode()))
+        if diagnostics.info:
+            actions.append(Generate.Information("Sending Enumerate."))
+        actions.append(Generate.CommTransmit(ControlFrames.ENUMERATE_REQUESTS[capabilities]))
 
     return actions
 
 
-def CommDisconnecting(currentState:int) -> list[ActionItem]:
+def CommDisconnecting(currentState:int, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information("Disconnecting."))
+    if diagnostics.info:
+        actions.append(Generate.Information("Disconnecting."))
 
     if currentState == ClientProtocolState.Enumerating or currentState == ClientProtocolState.LinkEstablished:
-        actions.append(Generate.Information("Changing state to Disconnected."))
+        if diagnostics.info:
+            actions.append(Generate.Information("Changing state to Disconnected."))
         actions.append(Generate.ChangeState(ClientProtocolState.Disconnected))
         actions.append(Generate.ClientStatus(ClientProtocolState.Disconnected))
         actions.append(Generate.ClearEnumeration())
@@ -106,9 +140,10 @@ def CommDisconnecting(currentState:int) -> list[ActionItem]:
     return actions
 
 
-def ClientConnecting(currentState:int, params: dict) -> list[ActionItem]:
+def ClientConnecting(currentState:int, params: dict, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information("Requesting connection"))
+    if diagnostics.info:
+        actions.append(Generate.Information("Requesting connection"))
 
     if currentState == ClientProtocolState.Disconnected:
         actions.append(Generate.CommConnect(params))
@@ -116,9 +151,10 @@ def ClientConnecting(currentState:int, params: dict) -> list[ActionItem]:
     return actions
 
 
-def ClientDisconnecting(currentState:int) -> list[ActionItem]:
+def ClientDisconnecting(currentState:int, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information("Requesting disconnection"))
+    if diagnostics.info:
+        actions.append(Generate.Information("Requesting disconnection"))
 
     if currentState == ClientProtocolState.Enumerating or currentState == ClientProtocolState.LinkEstablished:
         actions.append(Generate.CommDisconnect())
@@ -126,87 +162,169 @@ def ClientDisconnecting(currentState:int) -> list[ActionItem]:
     return actions
 
 
-def CommReceivingData(currentState:int, currentEnumeration:EnumerationSection, reader:StreamReader, data) -> list[ActionItem]:
+class _StreamRun:
+    # consecutive frames of one coalescing stream with equal metadata, decoded together and delivered once
+    def __init__(self, diagnostics:Diagnostics):
+        self.diagnostics = diagnostics
+        self.element:ElementDescription = None
+        self.configuration:StreamConfigurationParams = None
+        self.metadata:dict[str, any] = None
+        self.chunks = []
+
+    def Continues(self, section:Section) -> bool:
+        return len(self.chunks) > 0 and section.sectionType == SectionTypes.DeviceToClientStream.value and section.streamId == self.element.elementId
+
+    def Add(self, element:ElementDescription, configuration:StreamConfigurationParams, metadata:dict[str, any], dataBytes) -> list[ActionItem]:
+        actions = []
+        if len(self.chunks) > 0 and (element is not self.element or metadata != self.metadata):
+            actions = self.Flush()
+
+        self.element = element
+        self.configuration = configuration
+        self.metadata = metadata
+        self.chunks.append(dataBytes)
+        return actions
+
+    def Flush(self) -> list[ActionItem]:
+        if len(self.chunks) == 0:
+            return []
+
+        dataBytes = self.chunks[0] if len(self.chunks) == 1 else b''.join(self.chunks)
+        decodedData = self.element.DecodeStream(dataBytes, self.configuration.useNumpy, self.configuration.scale)
+
+        actions = []
+        if self.diagnostics.trace:
+            actions.append(Generate.Information(f"Forwarding data stream coalesced from {len(self.chunks)} sections."))
+        actions.append(Generate.ClientStreamData(self.element.name, decodedData, self.metadata))
+
+        self.chunks = []
+        return actions
+
+
+def CommReceivingData(currentState:int, currentEnumeration:EnumerationSection, streamConfiguration:dict[str, StreamConfigurationParams], reader:StreamReader, data, capabilities:int = 0, diagnostics:Diagnostics = NO_DIAGNOSTICS) -> list[ActionItem]:
     actions = []
-    actions.append(Generate.Information("Receiving data."))
+    if diagnostics.trace:
+        actions.append(Generate.Information("Receiving data."))
 
     reader.ProcessBytes(data)
 
+    # streams configured to coalesce are gathered here until a section that does not continue the run arrives
+    run = _StreamRun(diagnostics)
+
     while True:
         packet:Packet = reader.GetNextPacket()
         if packet is None:
             break
         
-        if len(packet.sections) != 1:
-            actions.append(Generate.Information("Packet does not have exactly one section. This is not supported. Ignoring packet."))
-            continue
+        for section in packet.sections:
+            if not run.Continues(section):
+                actions.extend(run.Flush())
 
-        section = packet.sections[0]
-
-        actions.append(Generate.Information(f"Received {SectionTypes(section.sectionType).name}."))
+            if diagnostics.trace:
+                actions.append(Generate.Information(f"Received {SectionTypes(section.sectionType).name}."))
         
-        if currentState == ClientProtocolState.Enumerating:
-            if section.sectionType == SectionTypes.Enumeration.value:
-                actions.append(Generate.SetEnumeration(section))
-
-                actions.append(Generate.Information("Forwarding DeviceInfo."))
-                actions.append(Generate.ClientDeviceInfo(DeviceInfo(section)))
-
-                actions.append(Generate.Information("Changing state to LinkEstablished."))
-                actions.append(Generate.ChangeState(ClientProtocolState.LinkEstablished))
-                actions.append(Generate.ClientStatus(ClientProtocolState.LinkEstablished))
+            if currentState == ClientProtocolState.Enumerating:
+                if section.sectionType == SectionTypes.Enumeration.value:
+                    actions.append(Generate.SetEnumeration(section))
+                    currentEnumeration = section
+
+                    if diagnostics.info:
+                        actions.append(Generate.Information("Forwarding DeviceInfo."))
+                    actions.append(Generate.ClientDeviceInfo(DeviceInfo(section)))
+
+                    if diagnostics.info:
+                        actions.append(Generate.Information("Changing state to LinkEstablished."))
+                    actions.append(Generate.ChangeState(ClientProtocolState.LinkEstablished))
+                    currentState = ClientProtocolState.LinkEstablished
+                    actions.append(Generate.ClientStatus(ClientProtocolState.LinkEstablished))
             
-            else:
-                actions.append(Generate.Information("Ignoring packet."))
+                else:
+                    if diagnostics.info:
+                        actions.append(Generate.Information("Ignoring section."))
 
-        elif currentState == ClientProtocolState.LinkEstablished:
-            if section.sectionType == SectionTypes.NotAllowed.value:
-                pass
+            elif currentState == ClientProtocolState.LinkEstablished:
+                if section.sectionType == SectionTypes.NotAllowed.value:
+                    pass
 
-            elif section.sectionType == SectionTypes.Confirmed.value:
-                pass
+                elif section.sectionType == SectionTypes.Confirmed.value:
+                    pass
                 
-            elif section.sectionType == SectionTypes.NotifyProperty.value:
-                element = currentEnumeration.GetPropertyById(section.elementId)
-                if element is None or (element.disposition != DispositionTypes.ReadonlyProperty.value and element.disposition != DispositionTypes.EditableProperty.value):
-                    actions.append(Generate.Information("Referenced element does not exist or is not ReadonlyProperty or Editable Property. Aborting packet."))
-                    continue
+                elif section.sectionType == SectionTypes.NotifyProperty.value:
+                    element = currentEnumeration.GetPropertyById(section.elementId)
+                    if element is None or (element.disposition != DispositionTypes.ReadonlyProperty.value and element.disposition != DispositionTypes.EditableProperty.value):
+                        if diagnostics.info:
+                            actions.append(Generate.Information("Referenced element does not exist or is not ReadonlyProperty or Editable Property. Skipping section."))
+                        continue
                 
-                actions.append(Generate.Information("Forwarding property value."))
-                actions.append(Generate.ClientPropertyValue(element.name, element.DecodeValue(section.propertyValueBytes)))
-
-            elif section.sectionType == SectionTypes.DeviceToClientStream.value:
-                element = currentEnumeration.GetPropertyById(section.streamId)
-                if element is None or element.disposition != DispositionTypes.DeviceToClientStream.value:
-                    actions.append(Generate.Information("Referenced stream does not exist or is not DeviceToClientStream. Aborting packet."))
-                    continue
-
-                metadata = {}
-                metadataOk = True
-                for m in section.metadata:
-                    metaElement = currentEnumeration.GetPropertyById(m.metadataId)
-                    if metaElement is None or metaElement.disposition != DispositionTypes.Metadata:
-                        metadataOk = False
-                        break
-
-                    metadata[metaElement.name] = metaElement.DecodeValue(m.metadataValueBytes)
-
-                if not metadataOk:
-                    actions.append(Generate.Information("Encountered at least one metadata element with an invalid ID. Aborting packet."))
-                    continue
+                    if diagnostics.trace:
+                        actions.append(Generate.Information("Forwarding property value."))
+                    actions.append(Generate.ClientPropertyValue(element.name, element.DecodeValue(section.propertyValueBytes)))
+
+                elif section.sectionType == SectionTypes.DeviceToClientStream.value:
+                    element = currentEnumeration.ElementsWithDisposition(DispositionTypes.DeviceToClientStream).get(section.streamId)
+                    if element is None:
+                        if diagnostics.info:
+                            actions.append(Generate.Information("Referenced stream does not exist or is not DeviceToClientStream. Skipping section."))
+                        continue
+
+                    metadata = {}
+                    metadataOk = True
+                    compressionType = CompressionTypes.none.value
+                    metadataElements = currentEnumeration.ElementsWithDisposition(DispositionTypes.Metadata)
+                    for m in section.metadata:
+                        metaElement = metadataElements.get(m.metadataId)
+                        if metaElement is None:
+                            metadataOk = False
+                            break
+
+                        if metaElement.name == COMPRESSION_METADATA_NAME:
+                            compressionType = metaElement.DecodeValue(m.metadataValueBytes)
+                            continue
+
+                        metadata[metaElement.name] = metaElement.DecodeValue(m.metadataValueBytes)
+
+                    if not metadataOk:
+                        actions.extend(run.Flush())
+                        if diagnostics.info:
+                            actions.append(Generate.Information("Encountered at least one metadata element with an invalid ID. Skipping section."))
+                        continue
+
+                    dataBytes = section.dataBytes
+                    if compressionType != CompressionTypes.none.value:
+                        try:
+                            dataBytes = Decompress(compressionType, dataBytes)
+                        except Exception as e:
+                            actions.extend(run.Flush())
+                            if diagnostics.info:
+                                actions.append(Generate.Information(f"Could not decompress stream data ({e}). Skipping section."))
+                            continue
                 
-                decodedData = element.DecodeStream(section.dataBytes)
-
-                actions.append(Generate.Information("Forwarding data stream."))
-                actions.append(Generate.ClientStreamData(element.name, decodedData, metadata))
-
-            elif section.sectionType == SectionTypes.Reset.value:
-                actions.append(Generate.Information("Changing state to Enumerating."))
-                actions.append(Generate.ChangeState(ClientProtocolState.Enumerating))
-                actions.append(Generate.ClientStatus(ClientProtocolState.Enumerating))
-                actions.append(Generate.ClearEnumeration())
-
-                actions.append(Generate.Information("Sending Enumerate."))
-                actions.append(Generate.CommTransmit(Packet([Section(SectionTypes.Enumerate)]).Encode()))
+                    configuration = streamConfiguration.get(element.name)
+                    if configuration is not None and configuration.coalesce:
+                        actions.extend(run.Add(element, configuration, metadata, dataBytes))
+                        continue
+
+                    if configuration is None:
+                        decodedData = element.DecodeStream(dataBytes)
+                    else:
+                        decodedData = element.DecodeStream(dataBytes, configuration.useNumpy, configuration.scale)
+
+                    if diagnostics.trace:
+                        actions.append(Generate.Information("Forwarding data stream."))
+                    actions.append(Generate.ClientStreamData(element.name, decodedData, metadata))
+
+                elif section.sectionType == SectionTypes.Reset.value:
+                    if diagnostics.info:
+                        actions.append(Generate.Information("Changing state to Enumerating."))
+                    actions.append(Generate.ChangeState(ClientProtocolState.Enumerating))
+                    currentState = ClientProtocolState.Enumerating
+                    actions.append(Generate.ClientStatus(ClientProtocolState.Enumerating))
+                    actions.append(Generate.ClearEnumeration())
+
+                    if diagnostics.info:
+                        actions.append(Generate.Information("Sending Enumerate."))
+                    actions.append(Generate.CommTransmit(ControlFrames.ENUMERATE_REQUESTS[capabilities]))
+
+    actions.extend(run.Flush())
 
     return actions
\ No newline at end of file
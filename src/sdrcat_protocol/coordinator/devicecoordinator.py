@@ -1,59 +1,72 @@
 from . import devicecoordinatorcore as core
 
-from sdrcat_protocol.definitions import DeviceProtocolState
+from sdrcat_protocol.definitions import DeviceProtocolState, Capabilities, DiagnosticLevels
 from sdrcat_protocol.action import ActionItem, Actions, Communicator
-from sdrcat_protocol.network import EnumerationSection, StreamReader
+from sdrcat_protocol.network import EnumerationSection, StreamReader, MAX_FRAME_LENGTH
+from sdrcat_protocol.controlframes import ControlFrames
+from sdrcat_protocol.bufferpool import BufferPool
+from sdrcat_protocol.compression import StreamCompressor
+from .transmitter import Transmitter
+from .diagnostics import Diagnostics, NO_DIAGNOSTICS
 
 class DeviceCoordinator(Communicator):
     def __init__(self):
         super().__init__()
 
+        # information actions up to this level are built and passed on, include_informational_messages = True is the same as Trace
+        self.diagnostics_level = DiagnosticLevels.Off
         self.include_informational_messages = False
+        self._diagnostics = NO_DIAGNOSTICS
 
-        # Coordinator State
-        self._enumeration = EnumerationSection()
-        self._nextElementId = 1024
-        self._reader = StreamReader()
-        self._state = DeviceProtocolState.Startup
-        
-    def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
-        if action.target != "coordinator" and aciton.target != "*":
-            raise Exception("Coordinator received action that was not destined for it. There might be an issue with routing somewhere.")
-
-        intermediateActions:list[ActionItem] = []
-
-        if action.action == Actions.FromDeviceStartup:
-            intermediateActions = core.DeviceStarting(self._state, action.params.connectionParams)
+        # CRC16 is off by default so frames stay compatible with peers that leave the field zeroed
+        self.encode_crc = False
+        self.verify_crc = False
 
-        if action.action == Actions.FromDevicePropertyValue:
-            intermediateActions = core.DeviceReportingPropertyValue(self._state, self._enumeration, action.params.name, action.params.value)
+        # when the window is above zero, outgoing frames queued within it (or until the byte cap) are sent as one multi-section packet
+        self.coalesce_window_us = 0
+        self.coalesce_max_bytes = MAX_FRAME_LENGTH
+        self._transmitter = Transmitter(self)
 
-        elif action.action == Actions.FromDeviceStreamData:
-            intermediateActions = core.DeviceSendingDataToClient(self._state, self._enumeration, action.params.name, action.params.data, action.params.metadata)
+        # outgoing stream name -> StreamCompressor, only used once the compression metadata has been defined (see GenerateFromDevice.DefineCompression)
+        self.stream_compression:dict[str, StreamCompressor] = {}
 
-        elif action.action == Actions.FromDeviceReady:
-            intermediateActions = core.DeviceReadying(self._state, self._enumeration)
+        # accept a client's request for little endian values, frame headers stay big endian either way
+        self.little_endian_payloads = False
 
-        elif action.action == Actions.FromDeviceReset:
-            intermediateActions = core.DeviceResetting(self._state)
+        # received frames are kept in recycled buffers, its hits and misses show how often a buffer still had to be allocated
+        self.frame_pool = BufferPool()
 
-        elif action.action == Actions.FromDeviceDefineProperty:
-            intermediateActions = core.DeviceDefiningAvailableProperty(self._state, self._nextElementId, action.params.name, action.params.dataType, action.params.isReadOnly)
-
-        elif action.action == Actions.FromDeviceDefineMetadata:
-            intermediateActions = core.DeviceDefiningAvailableMetadata(self._state, self._nextElementId, action.params.name, action.params.dataType)
+        # Coordinator State
+        self._enumeration = EnumerationSection()
+        self._nextElementId = 1024
+        self._reader = StreamReader(lazy=True, knownFrames=ControlFrames.PACKETS, pool=self.frame_pool)
+        self._state = DeviceProtocolState.Startup
 
-        elif action.action == Actions.FromDeviceDefineStream:
-            intermediateActions = core.DeviceDefiningAvailableStream(self._state, self._nextElementId, action.params.name, action.params.dataType, action.params.isOutgoing)
+        # incoming action -> core function producing the intermediate actions
+        self._actionHandlers = {
+            Actions.FromDeviceStartup:        lambda a: core.DeviceStarting(self._state, a.params.connectionParams, diagnostics=self._diagnostics),
+            Actions.FromDevicePropertyValue:  lambda a: core.DeviceReportingPropertyValue(self._state, self._enumeration, a.params.name, a.params.value, diagnostics=self._diagnostics),
+            Actions.FromDeviceStreamData:     lambda a: core.DeviceSendingDataToClient(self._state, self._enumeration, a.params.name, a.params.data, a.params.metadata, self.stream_compression.get(a.params.name), diagnostics=self._diagnostics),
+            Actions.FromDeviceReady:          lambda a: core.DeviceReadying(self._state, self._enumeration, diagnostics=self._diagnostics),
+            Actions.FromDeviceReset:          lambda a: core.DeviceResetting(self._state, diagnostics=self._diagnostics),
+            Actions.FromDeviceDefineProperty: lambda a: core.DeviceDefiningAvailableProperty(self._state, self._nextElementId, a.params.name, a.params.dataType, a.params.isReadOnly, diagnostics=self._diagnostics),
+            Actions.FromDeviceDefineMetadata: lambda a: core.DeviceDefiningAvailableMetadata(self._state, self._nextElementId, a.params.name, a.params.dataType, diagnostics=self._diagnostics),
+            Actions.FromDeviceDefineStream:   lambda a: core.DeviceDefiningAvailableStream(self._state, self._nextElementId, a.params.name, a.params.dataType, a.params.isOutgoing, diagnostics=self._diagnostics),
+            Actions.FromCommReceive:          self._CommReceiving,
+            Actions.FromCommConnect:          lambda a: core.CommConnectiong(self._state, diagnostics=self._diagnostics),
+            Actions.FromCommDisconnect:       lambda a: core.CommDisconnecting(self._state, diagnostics=self._diagnostics),
+        }
 
-        elif action.action == Actions.FromCommReceive:
-            intermediateActions = core.CommReceivingData(self._state, self._enumeration, self._reader, action.params.data)
+    def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
+        if action.target != "coordinator" and aciton.target != "*":
+            raise Exception("Coordinator received action that was not destined for it. There might be an issue with routing somewhere.")
 
-        elif action.action == Actions.FromCommConnect:
-            intermediateActions = core.CommConnectiong(self._state)
+        level = DiagnosticLevels.Trace if self.include_informational_messages else self.diagnostics_level
+        if level != self._diagnostics.level:
+            self._diagnostics = Diagnostics(level)
 
-        elif action.action == Actions.FromCommDisconnect:
-            intermediateActions = core.CommDisconnecting(self._state)
+        handler = self._actionHandlers.get(action.action)
+        intermediateActions:list[ActionItem] = [] if handler is None else handler(action)
 
         resultActions:list[ActionItem] = []
 
@@ -62,20 +75,35 @@ class DeviceCoordinator(Communicator):
                 if action.action == Actions.CoordinatorState:
                     self._state = action.params[0]
 
-                elif action.action == Actions.CoordinatorSetEnumeration:
-                    self._enumeration = EnumerationSection()
+                elif action.action == Actions.CoordinatorClearEnumeration:
+                    self._enumeration.Clear()
 
                 elif action.action == Actions.CoordinatorResetNextElementId:
                     self._nextElementId = 1024
-                    self._reader = StreamReader()
+                    self._reader = StreamReader(lazy=True, knownFrames=ControlFrames.PACKETS, pool=self.frame_pool)
 
                 elif action.action == Actions.CoordinatorIncrementNextElementId:
                     self._nextElementId += 1 
 
                 elif action.action == Actions.CoordinatorAppendEnumeration:
-                    self._enumeration.elements.append(action.params[0])
+                    self._enumeration.Append(action.params[0])
 
-            elif action.action != Actions.CoordinatorInformation or (action.action == Actions.CoordinatorInformation and self.include_informational_messages):
+                elif action.action == Actions.CoordinatorSetCapabilities:
+                    self._enumeration.SetCapabilities(action.params.capabilities)
+
+            elif action.action == Actions.ToCommTransmit:
+                resultActions.extend(self._transmitter.Transmit(action))
+
+            else:
                 resultActions.append(action)
 
-        return resultActions
\ No newline at end of file
+        resultActions.extend(self._transmitter.Drain())
+
+        return resultActions
+
+    def _SupportedCapabilities(self) -> int:
+        return Capabilities.LittleEndian if self.little_endian_payloads else Capabilities.none
+
+    def _CommReceiving(self, action:ActionItem) -> list[ActionItem]:
+        self._reader.verifyCrc = self.verify_crc
+        return core.CommReceivingData(self._state, self._enumeration, self._reader, action.params.data, self._SupportedCapabilities(), diagnostics=self._diagnostics)
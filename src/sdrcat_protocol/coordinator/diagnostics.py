@@ -0,0 +1,14 @@
+from sdrcat_protocol.definitions import DiagnosticLevels
+
+class Diagnostics:
+    # the information actions a coordinator wants, each coordinator passes its own to the core functions
+    # and they test these flags before building an action, so messages nobody listens to are never formatted
+    __slots__ = ('level', 'info', 'trace')
+
+    def __init__(self, level:int = DiagnosticLevels.Off):
+        self.level = level
+        self.info = level >= DiagnosticLevels.Info
+        self.trace = level >= DiagnosticLevels.Trace
+
+# used by core functions called without a coordinator's diagnostics
+NO_DIAGNOSTICS = Diagnostics()
@@ -0,0 +1,65 @@
+from sdrcat_protocol.action import ActionItem, Actions
+from sdrcat_protocol.action.action import CommPayloadParams
+from sdrcat_protocol.network import FrameCoalescer, StampCrc
+from sdrcat_protocol.controlframes import ControlFrames
+
+import asyncio
+
+class Transmitter:
+    # applies a coordinator's encode_crc and coalescing settings to every frame headed for comm
+    def __init__(self, coordinator):
+        self._coordinator = coordinator
+        self._coalescer = FrameCoalescer()
+        self._flushHandle = None
+
+    def Transmit(self, action:ActionItem) -> list[ActionItem]:
+        if self._coordinator.coalesce_window_us <= 0:
+            return self.Flush() + [self._ToAction(action.params.data)]
+
+        self._coalescer.maxBytes = self._coordinator.coalesce_max_bytes
+        result = [self._ToAction(f) for f in self._coalescer.Add(action.params.data)]
+        self._ScheduleFlush()
+        return result
+
+    def Drain(self) -> list[ActionItem]:
+        # without a running event loop nothing fires the window timer, so pending frames leave at the end of each dispatch
+        if self._flushHandle is not None:
+            return []
+
+        return self.Flush()
+
+    def Flush(self) -> list[ActionItem]:
+        if self._flushHandle is not None:
+            self._flushHandle.cancel()
+            self._flushHandle = None
+
+        frame = self._coalescer.Flush()
+        if frame is None:
+            return []
+
+        return [self._ToAction(frame)]
+
+    def _ScheduleFlush(self):
+        if self._flushHandle is not None or self._coalescer.IsEmpty():
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._flushHandle = loop.call_later(self._coordinator.coalesce_window_us / 1000000, self._OnWindowElapsed)
+
+    def _OnWindowElapsed(self):
+        self._flushHandle = None
+
+        for action in self.Flush():
+            self._coordinator.hub.SendAction(action)
+
+    def _ToAction(self, frame:bytes) -> ActionItem:
+        if self._coordinator.encode_crc:
+            # frames built by Packet.Encode are bytearrays, only the shared control frames are bytes
+            stamped = ControlFrames.STAMPED.get(frame) if isinstance(frame, bytes) else None
+            frame = stamped if stamped is not None else StampCrc(frame)
+
+        return ActionItem("coordinator", "comm", Actions.ToCommTransmit, CommPayloadParams(frame))
@@ -1,7 +1,8 @@
-from enum import IntEnum
+from enum import IntEnum, IntFlag
 
 class SectionTypes(IntEnum):
     Reset = 0x01                   # either->either
+    Fragment = 0x0A                # either->either
          
     Confirmed = 0x09               # device->client
     NotAllowed = 0x08              # device->client
@@ -31,6 +32,9 @@ class DataTypes(IntEnum):
     complex64 = 0x0B
     complex128 = 0x0C
     utf8 = 0x0D
+    cs8 = 0x0E          # interleaved signed 8 bit I and Q
+    cs16 = 0x0F         # interleaved signed 16 bit I and Q
+    cs12 = 0x10         # signed 12 bit I and Q packed into 3 bytes per sample
 
 class DispositionTypes(IntEnum):
     EditableProperty = 0x00
@@ -39,6 +43,16 @@ class DispositionTypes(IntEnum):
     ClientToDeviceStream = 0x03
     DeviceToClientStream = 0x04
 
+class CompressionTypes(IntEnum):
+    none = 0x00
+    zlib = 0x01
+    lzma = 0x02
+    bz2 = 0x03
+
+class Capabilities(IntFlag):
+    none = 0x00
+    LittleEndian = 0x01     # stream, property and metadata values travel little endian
+
 class DeviceProtocolState:
     Startup = -1
     NotReadyDisconnected = 0
@@ -54,4 +68,7 @@ class ClientProtocolState:
     LinkEstablished = 2
     
 
-
+class DiagnosticLevels:
+    Off = 0         # no information actions are built
+    Info = 1        # state changes, and requests that were aborted, ignored or refused
+    Trace = 2       # also the routine per packet and per section messages
@@ -57,30 +57,35 @@ class DeviceAllInOne(DeviceBase, CommBase):
         self.OnDefine()
         self.hub.SendAction(GenerateFromDevice.Ready())
 
+    def ActionHandlers(self) -> dict[str, callable]:
+        # one table for both of the names this communicator is registered under, every handler runs synchronously
+        handlers = {
+            Actions.ToDeviceGetProperty: lambda a: self._DoGetProperty(a.params.name),
+            Actions.ToDeviceSetProperty: lambda a: self._DoSetProperty(a.params.name, a.params.value),
+            Actions.ToDeviceStreamData:  lambda a: self.OnReceiveStreamData(a.params.name, a.params.data, a.params.metadata),
+            Actions.ToDeviceReset:       lambda a: self._DoReset(),
+            Actions.ToCommTransmit:      lambda a: self.OnCommRequestWrite(a.params.data),
+            Actions.ToCommConnect:       lambda a: self.OnCommRequestConnectAsync(a.params.connectionParams),
+            Actions.ToCommDisconnect:    lambda a: self.OnCommRequestDisconnectAsync(),
+        }
+
+        # the callbacks may return anything, so their results are dropped and no follow-up actions are reported
+        return {action: self._WithoutResult(handler) for action, handler in handlers.items()}
+
+    def _WithoutResult(self, handler:callable) -> callable:
+        def Handle(action:ActionItem) -> list[ActionItem]:
+            handler(action)
+            return []
+
+        return Handle
+
     def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
         if action.target != "device" and action.target != "comm" and action.target != "*":
             raise Exception("Received action that is not destined for 'device' or 'comm'.  There might have been a routing error somehwere.")
 
-        if action.action == Actions.ToDeviceGetProperty:
-            self._DoGetProperty(action.params.name)
-
-        elif action.action == Actions.ToDeviceSetProperty:
-            self._DoSetProperty(action.params.name, action.params.value)
-
-        elif action.action == Actions.ToDeviceStreamData: 
-            self.OnReceiveStreamData(action.params.name, action.params.data, action.params.metadata)
-
-        elif action.action == Actions.ToDeviceReset:
-            self._DoReset()
-
-        elif action.action == Actions.ToCommTransmit:
-            self.OnCommRequestWrite(action.params.data)
-
-        elif action.action == Actions.ToCommConnect:
-            self.OnCommRequestConnectAsync(action.params.connectionParams)
-
-        elif action.action == Actions.ToCommDisconnect:
-            self.OnCommRequestDisconnectAsync()
+        handler = self._ActionHandlerTable().get(action.action)
+        if handler is not None:
+            handler(action)
 
         return []
 
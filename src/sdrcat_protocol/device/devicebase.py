@@ -1,13 +1,18 @@
-from sdrcat_protocol.action import ActionItem, GenerateFromDevice, Actions, ActionHub, Communicator
+from sdrcat_protocol.action import ActionItem, GenerateFromDevice, Actions, ActionHub, Communicator, ActionQueue
 from sdrcat_protocol.deviceinfo import DeviceInfo
 from sdrcat_protocol.definitions import DataTypes
 
-import asyncio
-
 class DeviceBase(Communicator):
     def __init__(self):
         super().__init__()
 
+    def HandleRegistrationResponse(self, hub:ActionHub):
+        # callbacks are awaited one at a time in arrival order, assign an ActionQueue before registering to pick another limit or policy
+        if self.actionQueue is None:
+            self.actionQueue = ActionQueue()
+
+        super().HandleRegistrationResponse(hub)
+
     def DefineProperty(self, name:str, dataType:DataTypes, isReadOnly:bool = False):
         self.hub.SendAction(GenerateFromDevice.DefineProperty(name, dataType, isReadOnly))
 
@@ -20,9 +25,15 @@ class DeviceBase(Communicator):
     def ReportPropertyChanged(self, name:str, value: any):
         self.hub.SendAction(GenerateFromDevice.PropertyValue(name, value))
 
+    # does not wait, past a blocking queue's ceiling downstream the data is dropped, ReportStreamDataAsync is the way to send a steady flow
     def ReportStreamData(self, name:str, data:any, metadata:dict[str,any]):
         self.hub.SendAction(GenerateFromDevice.StreamData(name, data, metadata))
 
+    async def ReportStreamDataAsync(self, name:str, data:any, metadata:dict[str,any]):
+        # waits first while a blocking queue downstream is full, usually the comm's writes when the socket drains slower than data is reported
+        await self.hub.WaitForSpaceAsync(self.actionQueue)
+        self.ReportStreamData(name, data, metadata)
+
     def Start(self, connectionParams:dict[str,any]):
         self.hub.SendAction(GenerateFromDevice.Start(connectionParams))
 
@@ -47,22 +58,26 @@ class DeviceBase(Communicator):
         await self.OnDefine()
         self.hub.SendAction(GenerateFromDevice.Ready())
 
+    def ActionHandlers(self) -> dict[str, callable]:
+        return {
+            Actions.ToDeviceGetProperty: lambda a: self._Run(self._DoGetProperty, a.params.name),
+            Actions.ToDeviceSetProperty: lambda a: self._Run(self._DoSetProperty, a.params.name, a.params.value),
+            Actions.ToDeviceStreamData:  lambda a: self._Run(self.OnReceiveStreamData, a.params.name, a.params.data, a.params.metadata),
+            Actions.ToDeviceReset:       lambda a: self._Run(self._DoReset),
+        }
+
     def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
         if action.target != "device" and action.target != "*":
             raise Exception("Received action that is not destined for 'device'.  There might have been a routing error somehwere.")
 
-        if action.action == Actions.ToDeviceGetProperty:
-            asyncio.create_task(self._DoGetProperty(action.params.name))
-
-        elif action.action == Actions.ToDeviceSetProperty:
-            asyncio.create_task(self._DoSetProperty(action.params.name, action.params.value))
+        handler = self._ActionHandlerTable().get(action.action)
+        if handler is not None:
+            handler(action)
 
-        elif action.action == Actions.ToDeviceStreamData: 
-            asyncio.create_task(self.OnReceiveStreamData(action.params.name, action.params.data, action.params.metadata))
-
-        elif action.action == Actions.ToDeviceReset:
-            asyncio.create_task(self._DoReset())
+        return []
 
+    def _Run(self, function:callable, *args) -> list[ActionItem]:
+        self.actionQueue.Put(function, args)
         return []
 
 
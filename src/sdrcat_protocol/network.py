@@ -1,6 +1,60 @@
 from __future__ import annotations
-from sdrcat_protocol.definitions import DataTypes, SectionTypes, DispositionTypes
+from sdrcat_protocol.definitions import DataTypes, SectionTypes, DispositionTypes, Capabilities
+from sdrcat_protocol.codec import GetCodec
+from sdrcat_protocol.bufferpool import BufferPool
+import binascii
+import math
 import struct
+from collections import deque
+
+_LENGTH = struct.Struct('>H')
+_PACKET_HEADER = struct.Struct('>HH')
+_SECTION_HEADER = struct.Struct('>HB')
+_ELEMENT_SECTION_HEADER = struct.Struct('>HBH')
+_DATA_SECTION_HEADER = struct.Struct('>HBHH')
+_ENUMERATION_HEADER = struct.Struct('>HBB')
+_ELEMENT_DESCRIPTION_HEADER = struct.Struct('>HHBB')
+_METADATA_HEADER = struct.Struct('>HH')
+_FRAGMENT_HEADER = struct.Struct('>HBII')
+
+MAX_FRAME_LENGTH = 0xFFFF
+
+# largest packet a StreamReader reassembles from fragments by default, the total length is the peer's word and could ask for 4 GiB
+MAX_REASSEMBLY_LENGTH = 16 * 1024 * 1024
+
+# from this protocol version on an enumeration carries a capabilities byte after the version
+CAPABILITIES_PROTOCOL_VERSION = 2
+
+def _SectionLength(size:int) -> int:
+    # sections too long for the 16-bit length field only travel inside fragments, where the reassembled size is known
+    return size if size <= MAX_FRAME_LENGTH else 0
+
+CRC16_INITIAL = 0xFFFF
+
+def Crc16(data:bytes, crc:int = CRC16_INITIAL) -> int:
+    # CRC-16/CCITT-FALSE; binascii.crc_hqx is table driven, accepts any buffer and can be fed chunk by chunk
+    return binascii.crc_hqx(data, crc)
+
+def PacketCrc(frame:bytes, offset:int = 0) -> int:
+    # covers the length field and every section, but not the CRC field itself
+    length = _LENGTH.unpack_from(frame, offset)[0]
+    with memoryview(frame) as view:
+        return Crc16(view[offset + 4 : offset + length], Crc16(view[offset : offset + 2]))
+
+def StampCrc(frames:bytearray) -> bytearray:
+    if not isinstance(frames, bytearray):
+        frames = bytearray(frames)
+
+    # a fragmented packet encodes to several consecutive frames, each gets its own CRC
+    offset = 0
+    while offset < len(frames):
+        _LENGTH.pack_into(frames, offset + 2, PacketCrc(frames, offset))
+        offset += _LENGTH.unpack_from(frames, offset)[0]
+
+    return frames
+
+def VerifyCrc(frame:bytes) -> bool:
+    return _LENGTH.unpack_from(frame, 2)[0] == PacketCrc(frame)
 
 def GetNextChunk(bytestream: bytes, offset: int = 0) -> bytes:
     if len(bytestream) < offset + 2:
@@ -24,115 +78,424 @@ def VerifyLength(bytstreamSection: bytes) -> int:
 
     return expectedLength
 
-def DecodeSection(data:bytes) -> Section:
-    VerifyLength(data)
-    sectionType = int.from_bytes(data[2:3], 'big')
+def DecodeSection(data:bytes, lazy:bool = False) -> Section:
+    return _DecodeSectionSpan(data, 0, VerifyLength(data), lazy)
 
-    if sectionType == SectionTypes.Enumerate.value\
-        or sectionType == SectionTypes.Reset.value\
-        or sectionType == SectionTypes.NotAllowed.value\
-        or sectionType == SectionTypes.Confirmed.value:
-        return Section.Decode(data)
+def _DecodeSectionSpan(data:bytes, offset:int, end:int, lazy:bool) -> Section:
+    if end - offset < 3:
+        raise Exception("Invalid section: length {} is shorter than the section header".format(end - offset))
 
-    elif sectionType == SectionTypes.GetProperty.value:
-        return GetPropertySection.Decode(data)
+    decoder = (_LAZY_SECTION_DECODERS if lazy else _SECTION_DECODERS).get(data[offset + 2])
+    if decoder is None:
+        raise Exception("Unexpected section type {}".format(data[offset + 2]))
 
-    elif sectionType == SectionTypes.SetProperty.value\
-        or sectionType == SectionTypes.NotifyProperty.value:
-        return PropertyValueSection.Decode(data)
-
-    elif sectionType == SectionTypes.ClientToDeviceStream.value\
-        or sectionType == SectionTypes.DeviceToClientStream.value:
-        return DataSection.Decode(data)
-
-    elif sectionType == SectionTypes.Enumeration.value:
-        return EnumerationSection.Decode(data)
-
-    else:
-        raise Exception("Unexpected section type {}".format(sectionType))
+    return decoder(data, offset, end)
 
 class StreamReader:
-    def __init__(self):
-        self._buffer = b''
-        self._packets = []
+    # consumed bytes are only discarded from the front of the buffer once at least this many have piled up
+    COMPACT_THRESHOLD = 64 * 1024
+
+    def __init__(self, lazy:bool = False, verifyCrc:bool = False, knownFrames:dict[bytes, Packet] = None, pool:BufferPool = None, maxReassemblyLength:int = MAX_REASSEMBLY_LENGTH):
+        self._buffer = bytearray()
+        self._readOffset = 0
+        self._packets = deque()
+        self._lazy = lazy
+
+        # frames matching one of these byte for byte skip decoding and yield the shared packet instead
+        self._knownFrames = knownFrames
+        self._knownFrameLength = -1 if knownFrames is None else max((len(f) for f in knownFrames), default=-1)
+
+        # frames failing the CRC check are dropped and counted rather than raising
+        self.verifyCrc = verifyCrc
+        self.crcErrors = 0
+
+        # fragments are copied into a buffer sized from the first fragment, incomplete, out of order or oversized ones are dropped and counted
+        self.maxReassemblyLength = maxReassemblyLength
+        self._fragmentBuffer = None
+        self._fragmentReceived = 0
+        self.fragmentErrors = 0
+
+        # lazy readers with a pool copy frames back to back into pooled slabs instead of allocating a bytes object per frame,
+        # a slab goes back to the pool when full and is reused once the sections decoded from it are gone
+        self.pool = pool
+        self._slab:bytearray = None
+        self._slabView:memoryview = None
+        self._slabOffset = 0
 
     def ProcessBytes(self, bytestream:bytes):
+        # _ReadFrames moves _readOffset past each frame as it takes it, so when decoding one raises the frames before it
+        # (and the bad one) are not read again by the next call
+        if len(self._buffer) == 0:
+            # nothing is carried over from the last call, so frames are cut straight from the received bytes and only an incomplete tail is kept
+            self._readOffset = 0
+            try:
+                self._ReadFrames(bytestream)
+            finally:
+                offset = self._readOffset
+                if offset < len(bytestream):
+                    self._buffer += memoryview(bytestream)[offset:]
+                self._readOffset = 0
+            return
+
         self._buffer += bytestream
 
-        while len(self._buffer) > 2:
-            expectedLength = int.from_bytes(self._buffer[:2], 'big')
-            
-            if len(self._buffer) < expectedLength:
-                break
+        buffer = self._buffer
+        try:
+            self._ReadFrames(buffer)
+        finally:
+            offset = self._readOffset
+
+            if offset == len(buffer):
+                buffer.clear()
+                offset = 0
+            elif offset >= self.COMPACT_THRESHOLD:
+                del buffer[:offset]
+                offset = 0
+
+            self._readOffset = offset
+
+    def _ReadFrames(self, data:bytes):
+        # every frame is copied out before this returns, so callers may reuse data afterwards
+        available = len(data)
+        offset = self._readOffset
+        pooled = self.pool is not None and self._lazy
+
+        with memoryview(data) as view:
+            while available - offset > 2:
+                expectedLength = _LENGTH.unpack_from(data, offset)[0]
+
+                if expectedLength < 4:
+                    raise Exception("Invalid packet: length {} is shorter than the packet header".format(expectedLength))
+
+                end = offset + expectedLength
+                if available < end:
+                    break
+
+                start = offset
+                offset = end
+                self._readOffset = end
+
+                if self.verifyCrc and _LENGTH.unpack_from(data, start + 2)[0] != PacketCrc(data, start):
+                    self.crcErrors += 1
+                    continue
+
+                if expectedLength <= self._knownFrameLength:
+                    packet = self._knownFrames.get(bytes(view[start : end]))
+                    if packet is not None:
+                        self._packets.append(packet)
+                        continue
+
+                if pooled and expectedLength <= self.pool.bufferSize:
+                    frame = self._PooledFrame(view, start, end)
+                else:
+                    frame = bytes(view[start : end])
+
+                packet = Packet.Decode(frame, self._lazy)
+
+                # the encoder always sends a fragment as the only section of its frame
+                if len(packet.sections) == 1 and packet.sections[0].sectionType == SectionTypes.Fragment.value:
+                    packet = self._Reassemble(packet.sections[0])
+                    if packet is None:
+                        continue
+
+                self._packets.append(packet)
+
+    def _PooledFrame(self, view:memoryview, start:int, end:int) -> memoryview:
+        slabEnd = self._slabOffset + end - start
+
+        if self._slab is None or slabEnd > len(self._slab):
+            if self._slab is not None:
+                self._slabView.release()
+                self.pool.Release(self._slab)
+
+            self._slab = self.pool.Acquire()
+            self._slabView = memoryview(self._slab)
+            self._slabOffset = 0
+            slabEnd = end - start
+
+        frame = self._slabView[self._slabOffset : slabEnd]
+        frame[:] = view[start : end]
+        self._slabOffset = slabEnd
+        return frame
+
+    def _Reassemble(self, fragment:FragmentSection) -> Packet:
+        if fragment.fragmentOffset == 0:
+            if self._fragmentBuffer is not None:
+                self.fragmentErrors += 1
+
+            if fragment.totalLength > self.maxReassemblyLength:
+                self._fragmentBuffer = None
+                self.fragmentErrors += 1
+                return None
+
+            self._fragmentBuffer = bytearray(fragment.totalLength)
+            self._fragmentReceived = 0
+
+        elif self._fragmentBuffer is None\
+            or fragment.fragmentOffset != self._fragmentReceived\
+            or fragment.totalLength != len(self._fragmentBuffer):
+            self._fragmentBuffer = None
+            self.fragmentErrors += 1
+            return None
+
+        end = fragment.fragmentOffset + len(fragment.fragmentBytes)
+        if end > len(self._fragmentBuffer):
+            self._fragmentBuffer = None
+            self.fragmentErrors += 1
+            return None
+
+        self._fragmentBuffer[fragment.fragmentOffset : end] = fragment.fragmentBytes
+        self._fragmentReceived = end
+
+        if end < len(self._fragmentBuffer):
+            return None
+
+        buffer = self._fragmentBuffer
+        self._fragmentBuffer = None
 
-            p = Packet.Decode(self._buffer[:expectedLength])
-            self._packets.append(p)
-            self._buffer = self._buffer[expectedLength:]
+        # a reassembled section longer than a frame has a zero length field, so it is decoded as spanning the whole buffer,
+        # the eager decoders slice their values out of it so the buffer itself is not copied again
+        data = memoryview(buffer) if self._lazy else buffer
+        return Packet([_DecodeSectionSpan(data, 0, len(data), self._lazy)])
 
     def GetNextPacket(self):
         if len(self._packets) == 0:
             return None
 
-        return self._packets.pop(0)
+        return self._packets.popleft()
         
+class FrameCoalescer:
+    # merges consecutive frames into one multi-section packet by moving their sections under a single header
+    def __init__(self, maxBytes:int = MAX_FRAME_LENGTH):
+        self.maxBytes = maxBytes
+        self._pending = bytearray()
+
+    def IsEmpty(self) -> bool:
+        return len(self._pending) == 0
+
+    def Add(self, frames:bytes) -> list[bytearray]:
+        ready = []
+        length = _LENGTH.unpack_from(frames)[0]
+        maxBytes = min(self.maxBytes, MAX_FRAME_LENGTH)
+
+        # fragmented packets span several frames and must stay as sent, so they go out untouched after anything pending
+        if length != len(frames) or length > maxBytes:
+            if not self.IsEmpty():
+                ready.append(self.Flush())
+            ready.append(frames)
+            return ready
+
+        if len(self._pending) + length - 4 > maxBytes:
+            ready.append(self.Flush())
+
+        if self.IsEmpty():
+            self._pending += frames
+        else:
+            self._pending += memoryview(frames)[4:]
+
+        if len(self._pending) >= maxBytes:
+            ready.append(self.Flush())
+
+        return ready
+
+    def Flush(self) -> bytearray:
+        if self.IsEmpty():
+            return None
+
+        frame = self._pending
+        self._pending = bytearray()
+        _PACKET_HEADER.pack_into(frame, 0, len(frame), 0)
+        return frame
+
 class Packet:
+    __slots__ = ('sections',)
+
     def __init__(self,
-            sections:list[Section] = []):
+            sections:list[Section] = None):
+
+        # the list is taken over, not copied
+        self.sections:list[Section] = [] if sections is None else sections
 
-        self.sections:list[Section] = sections.copy()
+    def EncodedSize(self) -> int:
+        size = 4
+        for s in self.sections:
+            size += s.EncodedSize()
+        return size
 
-    def Encode(self) -> bytes:
-        result = b''
+    def EncodeInto(self, buffer:bytearray, offset:int = 0) -> int:
+        start = offset
+        offset += 4
         for s in self.sections:
-            result += s.Encode()
+            offset = s.EncodeInto(buffer, offset)
+
+        _PACKET_HEADER.pack_into(buffer, start, offset - start, 0)
+        return offset
 
-        result = b'\x00\x00' + result # TODO: replace with CRC16 calculation of result
+    def Encode(self, crc:bool = False, maxFrameLength:int = MAX_FRAME_LENGTH) -> bytearray:
+        size = self.EncodedSize()
+        if size <= maxFrameLength:
+            result = bytearray(size)
+            self.EncodeInto(result, 0)
+        else:
+            result = self._EncodeFragmented(maxFrameLength)
 
-        result = (2 + len(result)).to_bytes(2, 'big') + result
+        if crc:
+            StampCrc(result)
 
         return result
 
-    def Decode(data:bytes) -> Packet:
+    def _EncodeFragmented(self, maxFrameLength:int) -> bytearray:
+        # sections that fit are grouped into ordinary frames, each oversized one is encoded once and split across fragment frames
+        chunkSize = maxFrameLength - 4 - FragmentSection.HEADER_LENGTH
+        if chunkSize <= 0:
+            raise Exception("A maximum frame length of {} bytes leaves no room for fragment data".format(maxFrameLength))
+
+        frames:list[Packet] = []
+        pending:list[Section] = []
+        pendingSize = 4
+
+        for s in self.sections:
+            sectionSize = s.EncodedSize()
+
+            if 4 + sectionSize <= maxFrameLength:
+                if pendingSize + sectionSize > maxFrameLength:
+                    frames.append(Packet(pending))
+                    pending = []
+                    pendingSize = 4
+
+                pending.append(s)
+                pendingSize += sectionSize
+                continue
+
+            if len(pending) > 0:
+                frames.append(Packet(pending))
+                pending = []
+                pendingSize = 4
+
+            encoded = bytearray(sectionSize)
+            s.EncodeInto(encoded, 0)
+            view = memoryview(encoded)
+            for offset in range(0, sectionSize, chunkSize):
+                frames.append(Packet([FragmentSection(sectionSize, offset, view[offset : offset + chunkSize])]))
+
+        if len(pending) > 0:
+            frames.append(Packet(pending))
+
+        result = bytearray(sum(f.EncodedSize() for f in frames))
+        offset = 0
+        for f in frames:
+            offset = f.EncodeInto(result, offset)
+
+        return result
+
+    def Decode(data:bytes, lazy:bool = False, verifyCrc:bool = False) -> Packet:
         expectedLength = VerifyLength(data)
         result = Packet()
-        expectedCRC = data[2:4]
+
+        if verifyCrc and not VerifyCrc(data):
+            raise Exception("Invalid packet: CRC {:04X} does not match the calculated {:04X}".format(_LENGTH.unpack_from(data, 2)[0], PacketCrc(data)))
+
+        if lazy:
+            data = memoryview(data)
+
+        # the frame was bounds checked above, each section only has to fit inside it and every decoder reads at offsets into the one buffer
+        decoders = _LAZY_SECTION_DECODERS if lazy else _SECTION_DECODERS
+        sections = result.sections
+        unpackHeader = _SECTION_HEADER.unpack_from
+
         i = 4 # start of sections
         while i < expectedLength:
-            sectionData = GetNextChunk(data, i)
-            result.sections.append(DecodeSection(sectionData))
-            i += len(sectionData)
-        
-        # TODO: calculate and validate CRC
+            if expectedLength - i < 3:
+                raise Exception("Invalid packet: {} trailing bytes at position {} are too short for a section header".format(expectedLength - i, i))
+
+            sectionLength, sectionType = unpackHeader(data, i)
+            end = i + sectionLength
+
+            if sectionLength < 3 or end > expectedLength:
+                raise Exception("Invalid packet: section at position {} has length {} but the packet is only {} bytes long".format(i, sectionLength, expectedLength))
+
+            decoder = decoders.get(sectionType)
+            if decoder is None:
+                raise Exception("Unexpected section type {}".format(sectionType))
+
+            sections.append(decoder(data, i, end))
+            i = end
+
         return result
 
     def __repr__(self):
         return "[" + ", ".join(s.__repr__() for s in self.sections) + "]"
 
 class Section:
+    # sections are created for every frame, so none of these classes carry an instance __dict__
+    __slots__ = ('sectionType',)
+
     def __init__(self,
             sectionType: SectionTypes = SectionTypes.Enumerate):
 
-        self.sectionType = sectionType.value
+        self.sectionType = int(sectionType)
 
-    def Encode(self) -> bytes:
-        length = 3
-        return length.to_bytes(2, 'big')\
-            + self.sectionType.to_bytes(1, 'big')
+    def EncodedSize(self) -> int:
+        return 3
 
-    def Decode(data:bytes) -> Section:
-        VerifyLength(data)
-
-        result = Section()
-        result.sectionType = int.from_bytes(data[2:3], 'big')
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        _SECTION_HEADER.pack_into(buffer, offset, 3, self.sectionType)
+        return offset + 3
 
+    def Encode(self) -> bytearray:
+        result = bytearray(self.EncodedSize())
+        self.EncodeInto(result, 0)
         return result
 
+    def Decode(data:bytes) -> Section:
+        return Section.DecodeFrom(data, 0, VerifyLength(data))
+
+    # the DecodeFrom methods read the section spanning data[offset:end], the caller has already checked that it fits and has a header
+    def DecodeFrom(data:bytes, offset:int, end:int) -> Section:
+        return Section(data[offset + 2])
+
     def __repr__(self):
         if self.sectionType == SectionTypes.Enumerate.value: return "{Enumerate Cmd}"
         elif self.sectionType == SectionTypes.Reset.value: return "{Reset Cmd}"
         else: return "{Section}"
 
+class EnumerateSection(Section):
+    # clients that want capabilities add a byte to the Enumerate command, older devices ignore it
+    __slots__ = ('capabilities',)
+
+    def __init__(self,
+            capabilities: int = Capabilities.none):
+
+        super().__init__(SectionTypes.Enumerate)
+
+        self.capabilities = int(capabilities)
+
+    def EncodedSize(self) -> int:
+        return 3 if self.capabilities == 0 else 4
+
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        if self.capabilities == 0:
+            return super().EncodeInto(buffer, offset)
+
+        _ENUMERATION_HEADER.pack_into(buffer, offset, 4, self.sectionType, self.capabilities)
+        return offset + 4
+
+    def Decode(data:bytes) -> EnumerateSection:
+        result = EnumerateSection.DecodeFrom(data, 0, VerifyLength(data))
+
+        if result.sectionType != SectionTypes.Enumerate.value:
+            raise Exception("Invalid section. Expecting section type to be {}, but was {}".format(SectionTypes.Enumerate.value, result.sectionType))
+
+        return result
+
+    def DecodeFrom(data:bytes, offset:int, end:int) -> EnumerateSection:
+        result = EnumerateSection(data[offset + 3] if end - offset > 3 else 0)
+        result.sectionType = data[offset + 2]
+        return result
+
 class GetPropertySection(Section):
+    __slots__ = ('elementId',)
+
     def __init__(self,
             elementId: int = 0):
 
@@ -140,28 +503,35 @@ class GetPropertySection(Section):
 
         self.elementId = elementId
 
-    def Encode(self) -> bytes:
-        length = 5
-        return length.to_bytes(2, 'big')\
-            + self.sectionType.to_bytes(1, 'big')\
-            + self.elementId.to_bytes(2, 'big')
+    def EncodedSize(self) -> int:
+        return 5
 
-    def Decode(data:bytes) -> GetPropertySection:
-        VerifyLength(data)
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        _ELEMENT_SECTION_HEADER.pack_into(buffer, offset, 5, self.sectionType, self.elementId)
+        return offset + 5
 
-        result = GetPropertySection()
-        result.sectionType = int.from_bytes(data[2:3], 'big')
-        result.elementId = int.from_bytes(data[3:5], 'big')
+    def Decode(data:bytes) -> GetPropertySection:
+        result = GetPropertySection.DecodeFrom(data, 0, VerifyLength(data))
 
         if result.sectionType != SectionTypes.GetProperty.value:
             raise Exception("Invalid section. Expecting section type to be {}, but was {}".format(SectionTypes.GetProperty.value, result.sectionType))
 
         return result
 
+    def DecodeFrom(data:bytes, offset:int, end:int) -> GetPropertySection:
+        if end - offset < 5:
+            raise Exception("Invalid section. A property section needs at least 5 bytes, but only {} were provided".format(end - offset))
+
+        result = GetPropertySection()
+        result.sectionType, result.elementId = _ELEMENT_SECTION_HEADER.unpack_from(data, offset)[1:]
+        return result
+
     def __repr__(self):
         return "{{Get Property {}}}".format(self.elementId)
 
 class PropertyValueSection(Section):
+    __slots__ = ('elementId', 'propertyValueBytes')
+
     def __init__(self,
             sectionType: SectionTypes = SectionTypes.NotifyProperty,
             elementId:int = 0,
@@ -172,25 +542,30 @@ class PropertyValueSection(Section):
         self.elementId = elementId
         self.propertyValueBytes = propertyValueBytes
 
-    def Encode(self) -> bytes:
-        return (len(self.propertyValueBytes) + 5).to_bytes(2, 'big')\
-            + self.sectionType.to_bytes(1, 'big')\
-            + self.elementId.to_bytes(2, 'big')\
-            + self.propertyValueBytes
+    def EncodedSize(self) -> int:
+        return 5 + len(self.propertyValueBytes)
 
-    def Decode(data:bytes) -> PropertyValueSection:
-        VerifyLength(data)
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        end = offset + 5 + len(self.propertyValueBytes)
+        _ELEMENT_SECTION_HEADER.pack_into(buffer, offset, _SectionLength(end - offset), self.sectionType, self.elementId)
+        buffer[offset + 5 : end] = self.propertyValueBytes
+        return end
 
-        result = PropertyValueSection()
-        result.sectionType = int.from_bytes(data[2:3], 'big')
-        result.elementId = int.from_bytes(data[3:5], 'big')
-        result.propertyValueBytes = data[5:]
+    def Decode(data:bytes) -> PropertyValueSection:
+        result = PropertyValueSection.DecodeFrom(data, 0, VerifyLength(data))
 
         if result.sectionType != SectionTypes.SetProperty.value and result.sectionType != SectionTypes.NotifyProperty.value:
             raise Exception("Invalid section. Expecting section type to be {} or {}, but was {}".format(SectionTypes.SetProperty.value, SectionTypes.NotifyProperty.value, result.sectionType))
 
         return result
 
+    def DecodeFrom(data:bytes, offset:int, end:int) -> PropertyValueSection:
+        if end - offset < 5:
+            raise Exception("Invalid section. A property section needs at least 5 bytes, but only {} were provided".format(end - offset))
+
+        sectionType, elementId = _ELEMENT_SECTION_HEADER.unpack_from(data, offset)[1:]
+        return PropertyValueSection(sectionType, elementId, data[offset + 5 : end])
+
     def __repr__(self):
         if self.sectionType == SectionTypes.SetProperty.value:
             return "{{Set Property {}}}".format(self.elementId)
@@ -199,52 +574,52 @@ class PropertyValueSection(Section):
         else: return "{{Property Value Section}}"
 
 class DataSection(Section):
+    __slots__ = ('streamId', 'dataBytes', 'metadata')
+
     def __init__(self,
             sectionType:SectionTypes = SectionTypes.ClientToDeviceStream,
             streamId: int = 0,
             data: bytes = b'',
-            metadata:list[MetadataItem] = []):
+            metadata:list[MetadataItem] = None):
 
         super().__init__(sectionType)
 
         self.streamId = streamId
         self.dataBytes = data
-        self.metadata = metadata.copy()
+        self.metadata = [] if metadata is None else metadata
 
-    def Encode(self) -> bytes:
-        mresult = b''
+    def EncodedSize(self) -> int:
+        size = 7 + len(self.dataBytes)
         for m in self.metadata:
-            mresult += m.Encode()
-        
-        result = self.sectionType.to_bytes(1, 'big')
-        result += self.streamId.to_bytes(2, 'big')
-        result += (2 + len(mresult)).to_bytes(2, 'big')
-        result += mresult
-        result +=  self.dataBytes
+            size += m.EncodedSize()
+        return size
 
-        result = (2 + len(result)).to_bytes(2, 'big') + result
-        return result
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        start = offset
+        offset += 7
+        for m in self.metadata:
+            offset = m.EncodeInto(buffer, offset)
+
+        metadataLength = offset - start - 5
+        end = offset + len(self.dataBytes)
+        buffer[offset : end] = self.dataBytes
+
+        _DATA_SECTION_HEADER.pack_into(buffer, start, _SectionLength(end - start), self.sectionType, self.streamId, metadataLength)
+        return end
 
     def Decode(bytestream: bytes) -> DataSection:
-        VerifyLength(bytestream)
-        result = DataSection()
-        result.sectionType = int.from_bytes(bytestream[2:3], 'big')
-        result.streamId = int.from_bytes(bytestream[3:5], 'big')
+        result = DataSection.DecodeFrom(bytestream, 0, VerifyLength(bytestream))
 
         if result.sectionType != SectionTypes.ClientToDeviceStream.value and result.sectionType != SectionTypes.DeviceToClientStream.value:
             raise Exception("Invalid section. Expecting section type to be {} or {}, but was {}".format(SectionTypes.ClientToDeviceStream.value, SectionTypes.DeviceToClientStream.value, result.sectionType))
-        
-        metadataChunk = GetNextChunk(bytestream, 5)
-        expectedLength = VerifyLength(metadataChunk)
-        i = 2
-        while i < expectedLength:
-            chunk = GetNextChunk(metadataChunk, i)
-            result.metadata.append(MetadataItem.Decode(chunk))
-            i += len(chunk)
 
-        result.dataBytes = bytestream[5 + len(metadataChunk):]
         return result
 
+    def DecodeFrom(data:bytes, offset:int, end:int) -> DataSection:
+        metadataEnd = _DataSectionMetadataEnd(data, offset, end)
+        sectionType, streamId = _DATA_SECTION_HEADER.unpack_from(data, offset)[1:3]
+        return DataSection(sectionType, streamId, data[metadataEnd : end], _DecodeMetadataItems(data, offset + 5, metadataEnd))
+
     def __repr__(self):
         if self.sectionType == SectionTypes.ClientToDeviceStream.value:
             return "{{Client To Device Stream {}}}".format(self.streamId)
@@ -253,62 +628,243 @@ class DataSection(Section):
         else:
             return "{{Stream?}}"
 
+class LazyDataSection(DataSection):
+    # the metadata block is only parsed and the payload only sliced when first accessed, both stay views into the frame
+    __slots__ = ('_view', '_offset', '_metadataEnd', '_end', '_metadata', '_dataBytes')
+
+    def __init__(self, view:memoryview, offset:int = 0, end:int = None):
+        if end is None:
+            end = VerifyLength(view)
+
+        self._metadataEnd = _DataSectionMetadataEnd(view, offset, end)
+        self.sectionType, self.streamId = _DATA_SECTION_HEADER.unpack_from(view, offset)[1:3]
+
+        if self.sectionType != SectionTypes.ClientToDeviceStream.value and self.sectionType != SectionTypes.DeviceToClientStream.value:
+            raise Exception("Invalid section. Expecting section type to be {} or {}, but was {}".format(SectionTypes.ClientToDeviceStream.value, SectionTypes.DeviceToClientStream.value, self.sectionType))
+
+        self._view = view
+        self._offset = offset
+        self._end = end
+        self._metadata = None
+        self._dataBytes = None
+
+    @property
+    def metadata(self) -> list[MetadataItem]:
+        if self._metadata is None:
+            self._metadata = _DecodeMetadataItems(self._view, self._offset + 5, self._metadataEnd)
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value:list[MetadataItem]):
+        self._metadata = value
+
+    @property
+    def dataBytes(self) -> memoryview:
+        if self._dataBytes is None:
+            self._dataBytes = self._view[self._metadataEnd : self._end]
+        return self._dataBytes
+
+    @dataBytes.setter
+    def dataBytes(self, value:bytes):
+        self._dataBytes = value
+
+class FragmentSection(Section):
+    __slots__ = ('totalLength', 'fragmentOffset', 'fragmentBytes')
+
+    HEADER_LENGTH = 11
+
+    def __init__(self,
+            totalLength: int = 0,
+            fragmentOffset: int = 0,
+            fragmentBytes: bytes = b''):
+
+        super().__init__(SectionTypes.Fragment)
+
+        self.totalLength = totalLength
+        self.fragmentOffset = fragmentOffset
+        self.fragmentBytes = fragmentBytes
+
+    def EncodedSize(self) -> int:
+        return self.HEADER_LENGTH + len(self.fragmentBytes)
+
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        end = offset + self.HEADER_LENGTH + len(self.fragmentBytes)
+        _FRAGMENT_HEADER.pack_into(buffer, offset, end - offset, self.sectionType, self.totalLength, self.fragmentOffset)
+        buffer[offset + self.HEADER_LENGTH : end] = self.fragmentBytes
+        return end
+
+    def Decode(data:bytes) -> FragmentSection:
+        result = FragmentSection.DecodeFrom(data, 0, VerifyLength(data))
+
+        if result.sectionType != SectionTypes.Fragment.value:
+            raise Exception("Invalid section. Expecting section type to be {}, but was {}".format(SectionTypes.Fragment.value, result.sectionType))
+
+        return result
+
+    def DecodeFrom(data:bytes, offset:int, end:int) -> FragmentSection:
+        if end - offset < FragmentSection.HEADER_LENGTH:
+            raise Exception("Invalid section. A fragment section needs at least {} bytes, but only {} were provided".format(FragmentSection.HEADER_LENGTH, end - offset))
+
+        result = FragmentSection()
+        result.sectionType, result.totalLength, result.fragmentOffset = _FRAGMENT_HEADER.unpack_from(data, offset)[1:]
+        result.fragmentBytes = data[offset + FragmentSection.HEADER_LENGTH : end]
+        return result
+
+    def __repr__(self):
+        return "{{Fragment {}+{} of {}}}".format(self.fragmentOffset, len(self.fragmentBytes), self.totalLength)
+
 class EnumerationSection(Section):
+    __slots__ = ('protocolVersion', 'capabilities', 'elements', '_encodedFrames', '_elementsByName', '_elementsById', '_elementsByDisposition', '_metadataTemplates')
+
     def __init__(self,
             protocolVersion: int = 0,
-            elements:list[ElementDescription] = []):
+            elements:list[ElementDescription] = (),
+            capabilities: int = Capabilities.none):
 
         super().__init__(SectionTypes.Enumeration)
 
         self.protocolVersion = protocolVersion
-        self.elements = elements.copy()
+        self.capabilities = int(capabilities)
+        self.elements = []
+        self._encodedFrames:dict[int, bytes] = {}
+        self._elementsByName:dict[str, ElementDescription] = {}
+        self._elementsById:dict[int, ElementDescription] = {}
+        self._elementsByDisposition:dict[int, dict[int, ElementDescription]] = {d.value: {} for d in DispositionTypes}
+        self._metadataTemplates:dict[tuple[str, ...], MetadataTemplate] = {}
+
+        for e in elements:
+            self.Append(e)
+
+    # go through Append and Clear to change the elements, so the indexes stay current and the cached frame is dropped
+    def Append(self, element:ElementDescription):
+        self.elements.append(element)
+        self._encodedFrames.clear()
+        self._metadataTemplates.clear()
+        element.littleEndian = bool(self.capabilities & Capabilities.LittleEndian)
+
+        # the first element with a given name or id wins, as it did with the linear search
+        self._elementsByName.setdefault(element.name, element)
+        if element.elementId not in self._elementsById:
+            self._elementsById[element.elementId] = element
+            self._elementsByDisposition.setdefault(element.disposition, {})[element.elementId] = element
+
+    def Clear(self):
+        self.elements.clear()
+        self._encodedFrames.clear()
+        self._metadataTemplates.clear()
+        self._elementsByName.clear()
+        self._elementsById.clear()
+        for view in self._elementsByDisposition.values():
+            view.clear()
+
+    def SetCapabilities(self, capabilities:int):
+        # rebinds every element to the negotiated byte order, encoded metadata of the old order is dropped with the templates
+        self.capabilities = int(capabilities)
+        self._metadataTemplates.clear()
+
+        littleEndian = bool(self.capabilities & Capabilities.LittleEndian)
+        for e in self.elements:
+            e.littleEndian = littleEndian
 
-    def Encode(self) -> bytes:
-        result = self.sectionType.to_bytes(1, 'big')
-        result += self.protocolVersion.to_bytes(1, 'big')
+    def EncodeFrame(self, capabilities:int = None) -> bytes:
+        # a device answers each Enumerate with the capabilities it accepted, so a frame is kept for each
+        if capabilities is None:
+            capabilities = self.capabilities
 
-        for p in self.elements:
-            result += p.Encode()
+        frame = self._encodedFrames.get(capabilities)
+        if frame is None:
+            current = self.capabilities
+            self.capabilities = capabilities
+            try:
+                frame = bytes(Packet([self]).Encode())
+            finally:
+                self.capabilities = current
 
-        result = (len(result) + 2).to_bytes(2, 'big') + result
-        return result
+            self._encodedFrames[capabilities] = frame
+
+        return frame
+
+    def _WireVersion(self) -> int:
+        if self.capabilities != 0:
+            return max(self.protocolVersion, CAPABILITIES_PROTOCOL_VERSION)
+
+        return self.protocolVersion
+
+    def EncodedSize(self) -> int:
+        size = 5 if self._WireVersion() >= CAPABILITIES_PROTOCOL_VERSION else 4
+        for e in self.elements:
+            size += e.EncodedSize()
+        return size
+
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        start = offset
+        version = self._WireVersion()
+        offset += 4
+        if version >= CAPABILITIES_PROTOCOL_VERSION:
+            buffer[offset] = self.capabilities
+            offset += 1
+
+        for e in self.elements:
+            offset = e.EncodeInto(buffer, offset)
+
+        _ENUMERATION_HEADER.pack_into(buffer, start, _SectionLength(offset - start), self.sectionType, version)
+        return offset
 
     def Decode(data:bytes) -> EnumerationSection:
-        VerifyLength(data)
+        result = EnumerationSection.DecodeFrom(data, 0, VerifyLength(data))
+
+        if result.sectionType != SectionTypes.Enumeration.value:
+            raise Exception("Invalid section. Expecting section type to be 7, but was {}".format(result.sectionType))
+
+        return result
+
+    def DecodeFrom(data:bytes, offset:int, end:int) -> EnumerationSection:
+        if end - offset < 4:
+            raise Exception("Invalid section. An enumeration section needs at least 4 bytes, but only {} were provided".format(end - offset))
 
         result = EnumerationSection()
-        result.sectionType = int.from_bytes(data[2:3], 'big')
+        result.sectionType, result.protocolVersion = _ENUMERATION_HEADER.unpack_from(data, offset)[1:]
 
-        if result.sectionType != SectionTypes.Enumeration.value:
-            raise Exception("Invalid section. Expecting section type to be 7, but was {}".format(self.sectionType))
+        i = offset + 4
+        if result.protocolVersion >= CAPABILITIES_PROTOCOL_VERSION:
+            if end - i < 1:
+                raise Exception("Invalid section. Enumeration version {} is missing its capabilities byte".format(result.protocolVersion))
+
+            result.capabilities = data[i]
+            i += 1
 
-        result.protocolVersion = int.from_bytes(data[3:4], 'big')
-        i = 4
-        while i < len(data):
-            chunk = GetNextChunk(data, i)
-            i += len(chunk)
-            result.elements.append(ElementDescription.Decode(chunk))
+        while i < end:
+            elementEnd = _ItemEnd(data, i, end, 6)
+            result.Append(ElementDescription.DecodeFrom(data, i, elementEnd))
+            i = elementEnd
 
         return result
 
     def GetPropertyByName(self, name: str) -> ElementDescription:
-        for e in self.elements:
-            if e.name == name:
-                return e
-
-        return None
+        return self._elementsByName.get(name)
 
     def GetPropertyById(self, id: int) -> ElementDescription:
-        for e in self.elements:
-            if e.elementId == id:
-                return e
+        return self._elementsById.get(id)
+
+    def ElementsWithDisposition(self, disposition: DispositionTypes) -> dict[int, ElementDescription]:
+        # a live view keyed by element id, treat it as read only
+        return self._elementsByDisposition.setdefault(int(disposition), {})
 
-        return None
+    def GetMetadataTemplate(self, names) -> MetadataTemplate:
+        key = tuple(names)
+        template = self._metadataTemplates.get(key)
+        if template is None:
+            template = MetadataTemplate(self, key)
+            self._metadataTemplates[key] = template
+
+        return template
 
     def __repr__(self):
         return "{Enumeration}"
 
 class ElementDescription:
+    __slots__ = ('elementId', 'disposition', '_dataType', '_codec', '_littleEndian', 'name')
+
     def __init__(self,
             elementId: int = 0,
             disposition: DispositionTypes = DispositionTypes.EditableProperty,
@@ -316,100 +872,74 @@ class ElementDescription:
             name: str = ''):
 
         self.elementId = elementId
-        self.disposition = disposition.value
-        self.dataType = dataType.value
+        self.disposition = int(disposition)
+        self._littleEndian = False
+        self.dataType = int(dataType)
         self.name = name
 
-    def Encode(self) -> bytes:
-        length = 6 + len(self.name)
-        return length.to_bytes(2, 'big')\
-            + self.elementId.to_bytes(2, 'big')\
-            + self.disposition.to_bytes(1, 'big')\
-            + self.dataType.to_bytes(1, 'big')\
-            + self.name.encode('utf-8')
+    def EncodedSize(self) -> int:
+        return 6 + len(self.name.encode('utf-8'))
+
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        nameBytes = self.name.encode('utf-8')
+        end = offset + 6 + len(nameBytes)
+        _ELEMENT_DESCRIPTION_HEADER.pack_into(buffer, offset, end - offset, self.elementId, self.disposition, self.dataType)
+        buffer[offset + 6 : end] = nameBytes
+        return end
+
+    def Encode(self) -> bytearray:
+        result = bytearray(self.EncodedSize())
+        self.EncodeInto(result, 0)
+        return result
 
     def Decode(data:bytes) -> ElementDescription:
-        VerifyLength(data)
+        return ElementDescription.DecodeFrom(data, 0, VerifyLength(data))
 
-        result = ElementDescription()
-        result.elementId = int.from_bytes(data[2:4], 'big')
-        result.disposition = int.from_bytes(data[4:5], 'big')
-        result.dataType = int.from_bytes(data[5:6], 'big')
-        result.name = data[6:].decode('utf-8')
+    def DecodeFrom(data:bytes, offset:int, end:int) -> ElementDescription:
+        if end - offset < 6:
+            raise Exception("Invalid element description. It needs at least 6 bytes, but only {} were provided".format(end - offset))
 
-        return result
+        elementId, disposition, dataType = _ELEMENT_DESCRIPTION_HEADER.unpack_from(data, offset)[1:]
+        return ElementDescription(elementId, disposition, dataType, str(data[offset + 6 : end], 'utf-8'))
+
+    @property
+    def dataType(self) -> int:
+        return self._dataType
+
+    @dataType.setter
+    def dataType(self, value:int):
+        self._dataType = value
+        self._codec = GetCodec(value, self._littleEndian)
+
+    @property
+    def littleEndian(self) -> bool:
+        return self._littleEndian
+
+    @littleEndian.setter
+    def littleEndian(self, value:bool):
+        self._littleEndian = value
+        self._codec = GetCodec(self._dataType, value)
 
     def EncodeValue(self, value) -> bytes:
-        if   self.dataType == DataTypes.raw.value and isinstance(value, bytes): return value
-        elif self.dataType == DataTypes.utf8.value:       return str(value).encode('utf-8')
-        elif self.dataType == DataTypes.sint8.value:      return int(value).to_bytes(1, 'big', signed=True)
-        elif self.dataType == DataTypes.uint8.value:      return int(value).to_bytes(1, 'big', signed=False)
-        elif self.dataType == DataTypes.sint16.value:     return int(value).to_bytes(2, 'big', signed=True)
-        elif self.dataType == DataTypes.uint16.value:     return int(value).to_bytes(2, 'big', signed=False)
-        elif self.dataType == DataTypes.sint32.value:     return int(value).to_bytes(4, 'big', signed=True)
-        elif self.dataType == DataTypes.uint32.value:     return int(value).to_bytes(4, 'big', signed=False)
-        elif self.dataType == DataTypes.sint64.value:     return int(value).to_bytes(8, 'big', signed=True)
-        elif self.dataType == DataTypes.uint64.value:     return int(value).to_bytes(8, 'big', signed=False)
-        elif self.dataType == DataTypes.float32.value:    return struct.pack(">f", float(value))
-        elif self.dataType == DataTypes.float64.value:    return struct.pack(">d", float(value))
-        elif self.dataType == DataTypes.complex64.value:  return struct.pack(">ff", complex(value).real, complex(value).imag)
-        elif self.dataType == DataTypes.complex128.value: return struct.pack(">dd", complex(value).real, complex(value).imag)
-        else: raise Exception("Either data type {} is not supported or the value passed is not compatible with that data type.".format(self.dataType))
+        return self._codec.EncodeValue(value)
 
     def EncodeStream(self, streamValues) -> bytes:
-        if   self.dataType == DataTypes.raw.value        and isinstance(streamValues, bytes): return streamValues
-        elif self.dataType == DataTypes.utf8.value       and isinstance(streamValues, str):  return streamValues.encode('utf-8') 
-        elif self.dataType == DataTypes.sint8.value      and isinstance(streamValues, list): return struct.pack('>{}b'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.uint8.value      and isinstance(streamValues, list): return struct.pack('>{}B'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.sint16.value     and isinstance(streamValues, list): return struct.pack('>{}h'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.uint16.value     and isinstance(streamValues, list): return struct.pack('>{}H'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.sint32.value     and isinstance(streamValues, list): return struct.pack('>{}i'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.uint32.value     and isinstance(streamValues, list): return struct.pack('>{}I'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.sint64.value     and isinstance(streamValues, list): return struct.pack('>{}q'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.uint64.value     and isinstance(streamValues, list): return struct.pack('>{}Q'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.float32.value    and isinstance(streamValues, list): return struct.pack('>{}f'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.float64.value    and isinstance(streamValues, list): return struct.pack('>{}d'.format(len(streamValues)), *streamValues)
-        elif self.dataType == DataTypes.complex64.value  and isinstance(streamValues, list): return struct.pack('>{0}f{0}f'.format(len(streamValues)), *[f for c in streamValues for f in [c.real, c.imag]])
-        elif self.dataType == DataTypes.complex128.value and isinstance(streamValues, list): return struct.pack('>{0}d{0}d'.format(len(streamValues)), *[f for c in streamValues for f in [c.real, c.imag]])
-        else: raise Exception("Either data type {} is not supported or the value passed is not compatible with that data type.".format(self.dataType))
-        
-    def DecodeStream(self, streamBytes: bytes) -> any:
-        if   self.dataType == DataTypes.raw.value:        return streamBytes
-        elif self.dataType == DataTypes.utf8.value:       return streamBytes.decode('utf-8')
-        elif self.dataType == DataTypes.sint8.value:      return [u[0] for u in struct.iter_unpack('>b', streamBytes)]
-        elif self.dataType == DataTypes.uint8.value:      return [u[0] for u in struct.iter_unpack('>B', streamBytes)]
-        elif self.dataType == DataTypes.sint16.value:     return [u[0] for u in struct.iter_unpack('>h', streamBytes)]
-        elif self.dataType == DataTypes.uint16.value:     return [u[0] for u in struct.iter_unpack('>H', streamBytes)]
-        elif self.dataType == DataTypes.sint32.value:     return [u[0] for u in struct.iter_unpack('>i', streamBytes)]
-        elif self.dataType == DataTypes.uint32.value:     return [u[0] for u in struct.iter_unpack('>I', streamBytes)]
-        elif self.dataType == DataTypes.sint64.value:     return [u[0] for u in struct.iter_unpack('>q', streamBytes)]
-        elif self.dataType == DataTypes.uint64.value:     return [u[0] for u in struct.iter_unpack('>Q', streamBytes)]
-        elif self.dataType == DataTypes.float32.value:    return [u[0] for u in struct.iter_unpack(">f", streamBytes)]
-        elif self.dataType == DataTypes.float64.value:    return [u[0] for u in struct.iter_unpack(">d", streamBytes)]
-        elif self.dataType == DataTypes.complex64.value:  return [complex(u[0], u[1]) for u in struct.iter_unpack(">ff", streamBytes)]
-        elif self.dataType == DataTypes.complex128.value: return [complex(u[0], u[1]) for u in struct.iter_unpack(">dd", streamBytes)]
-        else: raise Exception("Either data type {} is not supported or the value passed is not compatible with that data type.".format(self.dataType))
+        return self._codec.EncodeStream(streamValues)
+
+    def DecodeStream(self, streamBytes: bytes, asNumpy: bool = False, scale: bool = False) -> any:
+        if scale:
+            if asNumpy:
+                return self._codec.DecodeScaledStreamAsNumpy(streamBytes)
+
+            return self._codec.DecodeScaledStream(streamBytes)
+
+        if asNumpy:
+            return self._codec.DecodeStreamAsNumpy(streamBytes)
+
+        return self._codec.DecodeStream(streamBytes)
 
     def DecodeValue(self, valueBytes: bytes):
-        if   self.dataType == DataTypes.raw.value:                              return valueBytes
-        elif self.dataType == DataTypes.utf8.value:                             return valueBytes.decode('utf-8')
-        elif self.dataType == DataTypes.sint8.value   and len(valueBytes) == 1: return int.from_bytes(valueBytes, 'big', signed=True)
-        elif self.dataType == DataTypes.uint8.value   and len(valueBytes) == 1: return int.from_bytes(valueBytes, 'big', signed=False)
-        elif self.dataType == DataTypes.sint16.value  and len(valueBytes) == 2: return int.from_bytes(valueBytes, 'big', signed=True)
-        elif self.dataType == DataTypes.uint16.value  and len(valueBytes) == 2: return int.from_bytes(valueBytes, 'big', signed=False)
-        elif self.dataType == DataTypes.sint32.value  and len(valueBytes) == 4: return int.from_bytes(valueBytes, 'big', signed=True)
-        elif self.dataType == DataTypes.uint32.value  and len(valueBytes) == 4: return int.from_bytes(valueBytes, 'big', signed=False)
-        elif self.dataType == DataTypes.sint64.value  and len(valueBytes) == 8: return int.from_bytes(valueBytes, 'big', signed=True)
-        elif self.dataType == DataTypes.uint64.value  and len(valueBytes) == 8: return int.from_bytes(valueBytes, 'big', signed=False)
-        elif self.dataType == DataTypes.float32.value and len(valueBytes) == 4: return struct.unpack('>f', valueBytes)[0]
-        elif self.dataType == DataTypes.float64.value and len(valueBytes) == 8: return struct.unpack('>d', valueBytes)[0]
-        elif self.dataType == DataTypes.complex64.value and len(valueBytes) == 8:
-            unpacked = struct.unpack('>ff', valueBytes)
-            return complex(unpacked[0], unpacked[1])
-        elif self.dataType == DataTypes.complex128.value and len(valueBytes) == 16:
-            unpacked = struct.unpack('>dd', valueBytes)
-            return complex(unpacked[0], unpacked[1])
-        else: raise Exception("Either data type {} is not supported or value byte length does not match the data type.".format(self.dataType))
+        return self._codec.DecodeValue(valueBytes)
 
     def __repr__(self):
         if self.disposition == DispositionTypes.EditableProperty.value:
@@ -424,7 +954,44 @@ class ElementDescription:
             return "{{Stream (device -> client) '{}'}}".format(self.name)
         return "{{?}}"
 
+def DecodeMetadataBlock(metadataChunk:bytes) -> list[MetadataItem]:
+    return _DecodeMetadataItems(metadataChunk, 0, VerifyLength(metadataChunk))
+
+def _ItemEnd(data:bytes, offset:int, end:int, headerLength:int) -> int:
+    # length-prefixed items nested in a section must hold their own header and stay inside the section
+    if end - offset < 2:
+        raise Exception("Invalid bytes: expecting at least two to define the length at position {}".format(offset))
+
+    itemEnd = offset + _LENGTH.unpack_from(data, offset)[0]
+    if itemEnd - offset < headerLength or itemEnd > end:
+        raise Exception("Invalid bytes: item at position {} with length {} does not fit before position {}".format(offset, itemEnd - offset, end))
+
+    return itemEnd
+
+def _DataSectionMetadataEnd(data:bytes, offset:int, end:int) -> int:
+    if end - offset < 7:
+        raise Exception("Invalid section. A data section needs at least 7 bytes, but only {} were provided".format(end - offset))
+
+    metadataLength = _LENGTH.unpack_from(data, offset + 5)[0]
+    if metadataLength < 2 or offset + 5 + metadataLength > end:
+        raise Exception("Invalid section. Metadata block length {} does not fit in a {} byte section".format(metadataLength, end - offset))
+
+    return offset + 5 + metadataLength
+
+def _DecodeMetadataItems(data:bytes, offset:int, end:int) -> list[MetadataItem]:
+    # offset points at the metadata block's own length field
+    result = []
+    i = offset + 2
+    while i < end:
+        itemEnd = _ItemEnd(data, i, end, 4)
+        result.append(MetadataItem(_METADATA_HEADER.unpack_from(data, i)[1], data[i + 4 : itemEnd]))
+        i = itemEnd
+
+    return result
+
 class MetadataItem:
+    __slots__ = ('metadataId', 'metadataValueBytes')
+
     def __init__(self,
             metadataId: int = 0,
             metadataValueBytes: bytes = b''):
@@ -432,18 +999,85 @@ class MetadataItem:
         self.metadataId = metadataId
         self.metadataValueBytes = metadataValueBytes
 
-    def Encode(self) -> bytes:
-        return (4 + len(self.metadataValueBytes)).to_bytes(2, 'big')\
-            + self.metadataId.to_bytes(2, 'big')\
-            + self.metadataValueBytes
+    def EncodedSize(self) -> int:
+        return 4 + len(self.metadataValueBytes)
 
-    def Decode(bytestream: bytes) -> MetadataItem:
-        VerifyLength(bytestream)
-        result = MetadataItem()
-        result.metadataId = int.from_bytes(bytestream[2:4], 'big')
-        result.metadataValueBytes = bytestream[4:]
+    def EncodeInto(self, buffer:bytearray, offset:int) -> int:
+        end = offset + 4 + len(self.metadataValueBytes)
+        _METADATA_HEADER.pack_into(buffer, offset, end - offset, self.metadataId)
+        buffer[offset + 4 : end] = self.metadataValueBytes
+        return end
 
+    def Encode(self) -> bytearray:
+        result = bytearray(self.EncodedSize())
+        self.EncodeInto(result, 0)
         return result
 
+    def Decode(bytestream: bytes) -> MetadataItem:
+        end = VerifyLength(bytestream)
+
+        if end < 4:
+            raise Exception("Invalid metadata item. It needs at least 4 bytes, but only {} were provided".format(end))
+
+        return MetadataItem(_METADATA_HEADER.unpack_from(bytestream)[1], bytestream[4:end])
+
     def __repr__(self):
-        return "{{Metadata Id {}}}".format(self.metadataId)
\ No newline at end of file
+        return "{{Metadata Id {}}}".format(self.metadataId)
+
+class MetadataTemplate:
+    # a set of metadata names resolved once against an enumeration, reusing the encoded items while the values stay the same
+    __slots__ = ('names', 'unknownNames', '_elements', '_lastKeys', '_lastItems')
+
+    def __init__(self,
+            enumeration: EnumerationSection,
+            names: tuple[str, ...] = ()):
+
+        self.names = tuple(names)
+        self.unknownNames:list[str] = []
+        self._elements:list[ElementDescription] = []
+
+        for name in self.names:
+            element = enumeration.GetPropertyByName(name)
+            if element is None or element.disposition != DispositionTypes.Metadata.value:
+                self.unknownNames.append(name)
+            else:
+                self._elements.append(element)
+
+        self._lastKeys = None
+        self._lastItems:list[MetadataItem] = []
+
+    def Encode(self, metadata:dict[str, any]) -> list[MetadataItem]:
+        values = [metadata[e.name] for e in self._elements]
+        keys = [_MetadataKey(v) for v in values]
+        if keys != self._lastKeys:
+            self._lastItems = [MetadataItem(e.elementId, e.EncodeValue(v)) for e, v in zip(self._elements, values)]
+            self._lastKeys = keys
+
+        # shared between frames, so the returned list must not be modified
+        return self._lastItems
+
+def _MetadataKey(value:any) -> tuple:
+    # == alone would reuse the bytes of 0.0 for -0.0 and of 1 for 1.0 or True, so the type and a float's sign are compared too
+    if isinstance(value, float):
+        return (type(value), value, math.copysign(1.0, value))
+
+    return (type(value), value)
+
+# section decoders keyed by section type, lazy decoding only differs in leaving stream sections as views into the frame
+_SECTION_DECODERS = {
+    SectionTypes.Enumerate.value: EnumerateSection.DecodeFrom,
+    SectionTypes.Reset.value: Section.DecodeFrom,
+    SectionTypes.NotAllowed.value: Section.DecodeFrom,
+    SectionTypes.Confirmed.value: Section.DecodeFrom,
+    SectionTypes.GetProperty.value: GetPropertySection.DecodeFrom,
+    SectionTypes.SetProperty.value: PropertyValueSection.DecodeFrom,
+    SectionTypes.NotifyProperty.value: PropertyValueSection.DecodeFrom,
+    SectionTypes.ClientToDeviceStream.value: DataSection.DecodeFrom,
+    SectionTypes.DeviceToClientStream.value: DataSection.DecodeFrom,
+    SectionTypes.Enumeration.value: EnumerationSection.DecodeFrom,
+    SectionTypes.Fragment.value: FragmentSection.DecodeFrom,
+}
+
+_LAZY_SECTION_DECODERS = dict(_SECTION_DECODERS)
+_LAZY_SECTION_DECODERS[SectionTypes.ClientToDeviceStream.value] = LazyDataSection
+_LAZY_SECTION_DECODERS[SectionTypes.DeviceToClientStream.value] = LazyDataSection
@@ -40,10 +40,10 @@ class SampleDeviceImplementation(DeviceBase):
                     self.ReportPropertyChanged("prop1", newValue)
 
                 else: # send "Nothing to report." through stream0
-                    self.ReportStreamData("stream0", "Nothing to report.", {})
+                    await self.ReportStreamDataAsync("stream0", "Nothing to report.", {})
 
             elif whattodo == 1: # send data through stream0
-                self.ReportStreamData("stream0", self.device.provideIncomingStreamData(), {})
+                await self.ReportStreamDataAsync("stream0", self.device.provideIncomingStreamData(), {})
 
     async def OnDefine(self):
         self.DefineProperty("prop1", DataTypes.utf8, isReadOnly=True)
@@ -0,0 +1,389 @@
+from sdrcat_protocol.action import ActionHub, ActionItem, Communicator
+import pytest
+
+class Recorder(Communicator):
+    def __init__(self, name:str, log:list, replies:dict[str, list[ActionItem]] = None):
+        super().__init__()
+        self.name = name
+        self.log = log
+        self.replies = {} if replies is None else replies
+
+    def HandleActionItem(self, action:ActionItem) -> list[ActionItem]:
+        self.log.append((self.name, action.action))
+        return self.replies.get(action.action, [])
+
+def test_reentrant_send_is_queued():
+    log = []
+
+    class Reentrant(Recorder):
+        def HandleActionItem(self, action):
+            result = super().HandleActionItem(action)
+            if action.action == "start":
+                # handled by the running drain loop after this returns, not in a nested one
+                self.hub.SendAction(ActionItem("a", "b", "nested"))
+                assert log[-1] == ("a", "start")
+            return result
+
+    hub = ActionHub()
+    hub.Register(Reentrant("a", log, {"start": [ActionItem("a", "b", "reply")]}), "a")
+    hub.Register(Recorder("b", log), "b")
+
+    hub.SendAction(ActionItem("x", "a", "start"))
+
+    # sent while the handler ran, so it is queued ahead of the handler's returned actions
+    assert log == [("a", "start"), ("b", "nested"), ("b", "reply")]
+
+def test_action_handlers_take_precedence():
+    log = []
+
+    class Handlers(Recorder):
+        def ActionHandlers(self):
+            return {"fast": lambda a: log.append(("handler", a.action))}
+
+    hub = ActionHub()
+    hub.Register(Handlers("h", log), "h")
+
+    hub.SendAction(ActionItem("x", "h", "fast"))
+    hub.SendAction(ActionItem("x", "h", "slow"))
+
+    assert log == [("handler", "fast"), ("h", "slow")]
+
+def test_broadcast_reaches_each_communicator_once():
+    log = []
+    shared = Recorder("shared", log)
+
+    hub = ActionHub()
+    hub.Register(shared, "device")
+    hub.Register(shared, "comm")
+    hub.Register(Recorder("other", log, {"ping": [ActionItem("other", "comm", "pong")]}), "other")
+
+    hub.SendAction(ActionItem("x", "*", "ping"))
+
+    assert sorted(log) == [("other", "ping"), ("shared", "ping"), ("shared", "pong")]
+
+def test_unknown_target():
+    hub = ActionHub()
+    with pytest.raises(Exception):
+        hub.SendAction(ActionItem("x", "nobody", "ping"))
+
+    with pytest.raises(Exception):
+        hub.SendAction(ActionItem("x", None, "ping"))
+
+    log = []
+    hub = ActionHub(strictRouting=False)
+    hub.Register(Recorder("a", log), "a")
+    hub.SendAction(ActionItem("x", "nobody", "ping"))
+    hub.SendAction(ActionItem("x", "a", "ping"))
+    assert log == [("a", "ping")]
+
+def test_exception_leaves_hub_usable():
+    log = []
+
+    class Failing(Recorder):
+        def HandleActionItem(self, action):
+            if action.action == "fail":
+                raise ValueError()
+            return super().HandleActionItem(action)
+
+    hub = ActionHub()
+    hub.Register(Failing("a", log, {"start": [ActionItem("a", "a", "fail"), ActionItem("a", "a", "dropped")]}), "a")
+
+    with pytest.raises(ValueError):
+        hub.SendAction(ActionItem("x", "a", "start"))
+
+    hub.SendAction(ActionItem("x", "a", "again"))
+    assert log == [("a", "start"), ("a", "again")]
+
+def test_action_queue_keeps_order():
+    import asyncio
+    from sdrcat_protocol.action import ActionQueue
+
+    async def Run():
+        log = []
+        queue = ActionQueue()
+
+        async def Slow(value):
+            await asyncio.sleep(0.001 * (5 - value))
+            log.append(value)
+
+        for value in range(5):
+            queue.Put(Slow, (value,))
+
+        await queue.JoinAsync()
+        queue.Close()
+        return log
+
+    assert asyncio.run(Run()) == [0, 1, 2, 3, 4]
+
+@pytest.mark.parametrize("policy, expected, dropped", [
+    ("DropOldest", [2, 3, 4], 2),
+    ("DropNewest", [0, 1, 2], 2),
+    ("Block", [0, 1, 2, 3, 4], 0),
+])
+def test_action_queue_policies(policy, expected, dropped):
+    import asyncio
+    from sdrcat_protocol.action import ActionQueue, QueuePolicies
+
+    async def Run():
+        log = []
+        queue = ActionQueue(limit=3, policy=getattr(QueuePolicies, policy))
+
+        async def Record(value):
+            log.append(value)
+
+        # nothing runs until this coroutine yields, so the queue fills past its limit
+        for value in range(5):
+            queue.Put(Record, (value,))
+
+        assert queue.depth == len(expected)
+        assert queue.Saturated() == (policy == "Block")
+
+        await queue.JoinAsync()
+        assert queue.depth == 0 and not queue.Saturated()
+        queue.Close()
+        return log, queue
+
+    log, queue = asyncio.run(Run())
+    assert log == expected
+    assert queue.dropped == dropped
+    assert queue.peakDepth == len(expected)
+
+def test_blocking_queue_overflows_at_its_ceiling():
+    import asyncio
+    from sdrcat_protocol.action import ActionQueue, QueuePolicies
+
+    async def Run():
+        log = []
+        queue = ActionQueue(limit=2, policy=QueuePolicies.Block, ceiling=3)
+
+        async def Record(value):
+            log.append(value)
+
+        # a producer that does not wait keeps adding past the limit, up to the ceiling
+        for value in range(6):
+            queue.Put(Record, (value,))
+
+        assert queue.depth == 3 and queue.Saturated()
+        await queue.JoinAsync()
+        queue.Close()
+        return log, queue
+
+    log, queue = asyncio.run(Run())
+    assert log == [0, 1, 2]
+    assert queue.overflowed == 3 and queue.dropped == 0
+    assert queue.peakDepth == 3
+
+    with pytest.raises(Exception):
+        ActionQueue(limit=4, ceiling=2)
+
+def test_wait_for_space_checks_every_queue_again():
+    import asyncio
+    from sdrcat_protocol.action import ActionQueue
+
+    class Owner(Recorder):
+        def __init__(self, name):
+            super().__init__(name, [])
+            self.actionQueue = ActionQueue(limit=1)
+
+    async def Run():
+        first = Owner("first")
+        second = Owner("second")
+        hub = ActionHub()
+        hub.Register(first, "first")
+        hub.Register(second, "second")
+
+        async def Refill():
+            # runs while the waiter is parked on the second queue, filling the first one again
+            first.actionQueue.Put(asyncio.sleep, (0.02,))
+
+        first.actionQueue.Put(asyncio.sleep, (0.01,))
+        second.actionQueue.Put(Refill, ())
+        second.actionQueue.Put(asyncio.sleep, (0.01,))
+
+        await hub.WaitForSpaceAsync()
+        saturated = hub.Saturated()
+
+        for owner in (first, second):
+            owner.actionQueue.Close()
+        return saturated
+
+    assert not asyncio.run(Run())
+
+def test_client_callbacks_run_through_queue():
+    import asyncio
+    from sdrcat_protocol.action import ActionQueue, QueuePolicies, GenerateFromClientCoordinator as Generate
+    from sdrcat_protocol.client import ClientBase
+
+    class Client(ClientBase):
+        def __init__(self):
+            super().__init__()
+            self.received = []
+
+        async def OnReceiveDataAsync(self, streamName, streamValues, metadata):
+            await asyncio.sleep(0)
+            self.received.append(streamValues)
+
+    async def Run():
+        client = Client()
+        client.actionQueue = ActionQueue(limit=2, policy=QueuePolicies.Block)
+
+        hub = ActionHub()
+        hub.Register(client, "client")
+        assert not hub.Saturated()
+
+        for value in range(4):
+            hub.SendAction(Generate.ClientStreamData("rx", [value], None))
+
+        # a blocking queue keeps everything but tells the socket reads to wait
+        assert hub.Saturated()
+        await hub.WaitForSpaceAsync()
+        assert not hub.Saturated()
+
+        await client.actionQueue.JoinAsync()
+        client.actionQueue.Close()
+        return client.received
+
+    assert asyncio.run(Run()) == [[0], [1], [2], [3]]
+
+def test_action_codes():
+    from sdrcat_protocol.action import Actions, GenerateFromDevice
+
+    codes = [value for name, value in vars(Actions).items() if not name.startswith("_") and isinstance(value, int)]
+    assert len(codes) == len(set(codes))
+
+    action = GenerateFromDevice.StreamData("rx", [1], None)
+    assert action.action == Actions.FromDeviceStreamData
+    assert Actions.Name(action.action) == "FromDeviceStreamData"
+    assert Actions.Name("custom") == "custom"
+
+def test_instrumentation_snapshot():
+    log = []
+    hub = ActionHub()
+    relay = Recorder("a", log, {"start": [ActionItem("a", "b", "reply")] * 3})
+    hub.Register(relay, "a")
+    hub.Register(Recorder("b", log), "b")
+    assert hub.InstrumentationSnapshot() is None
+
+    hub.EnableInstrumentation()
+    for _ in range(2):
+        hub.SendAction(ActionItem("x", "a", "start"))
+    hub.SendAction(ActionItem("x", "*", "ping"))
+
+    snapshot = hub.InstrumentationSnapshot()
+    start = snapshot["communicators"]["a"]["start"]
+    assert start["count"] == 2
+    assert start["timed"] == 1
+    assert start["produced"]["2-3"] == 2
+    assert 0 <= start["mean_ns"] <= start["max_ns"]
+    assert snapshot["communicators"]["b"]["reply"]["count"] == 6
+    assert snapshot["communicators"]["b"]["ping"]["produced"]["0"] == 1
+    assert snapshot["max_queue_depth"] == 3
+    assert snapshot["queues"] == {}
+
+    # switched off, the routes lead straight to the communicators again
+    hub.DisableInstrumentation()
+    assert hub._routes["a"][1] == relay.HandleActionItem
+    assert hub.InstrumentationSnapshot() is None
+
+    for sampleEvery in (0, -1):
+        with pytest.raises(ValueError):
+            hub.EnableInstrumentation(sampleEvery)
+    assert hub.statistics is None
+
+def test_action_handlers_built_once():
+    from sdrcat_protocol.client import ClientBase
+    from sdrcat_protocol.action import Actions
+
+    built = []
+
+    class Client(ClientBase):
+        def ActionHandlers(self):
+            built.append(1)
+            return {Actions.ToClientStatus: lambda a: []}
+
+    client = Client()
+    hub = ActionHub()
+    hub.Register(client, "client")
+    hub.Register(Recorder("other", []), "other")
+
+    for _ in range(3):
+        client.HandleActionItem(ActionItem("coordinator", "client", Actions.ToClientStatus))
+        hub.SendAction(ActionItem("coordinator", "client", Actions.ToClientStatus))
+
+    assert len(built) == 1
+
+def test_callback_errors_are_reported_through_hub():
+    import asyncio
+    from sdrcat_protocol.action import GenerateFromClientCoordinator as Generate
+    from sdrcat_protocol.client import ClientBase
+
+    class Client(ClientBase):
+        async def OnReceiveStatusChangeAsync(self, status):
+            raise Exception(f"status {status}")
+
+    class Watcher(Recorder):
+        def OnError(self, source, exception):
+            self.log.append((source, str(exception)))
+            return True
+
+    async def Run():
+        log = []
+        client = Client()
+        hub = ActionHub()
+        hub.Register(client, "client")
+        hub.Register(Watcher("watcher", log), "watcher")
+        hub.EnableInstrumentation()
+
+        hub.SendAction(Generate.ClientStatus(3))
+        await client.actionQueue.JoinAsync()
+        client.actionQueue.Close()
+        return log, hub.InstrumentationSnapshot()
+
+    log, snapshot = asyncio.run(Run())
+    assert log == [("client", "status 3")]
+    assert snapshot["queues"]["client"]["errors"] == 1
+
+def test_report_stream_data_async_waits_for_comm_queue():
+    import asyncio
+    from sdrcat_protocol.action import ActionQueue, QueuePolicies, GenerateFromDeviceCoordinator as Generate
+    from sdrcat_protocol.comm.commbase import CommBase
+    from sdrcat_protocol.device import DeviceBase
+
+    class Comm(CommBase):
+        def __init__(self):
+            super().__init__()
+            self.written = []
+            self.peak = 0
+
+        async def OnCommRequestWriteAsync(self, data):
+            self.peak = max(self.peak, self.actionQueue.depth)
+            await asyncio.sleep(0.001)
+            self.written.append(data)
+
+    class Coordinator(Recorder):
+        def HandleActionItem(self, action):
+            return [Generate.CommTransmit(bytes(action.params.data))]
+
+    async def Run():
+        device = DeviceBase()
+        comm = Comm()
+        comm.actionQueue = ActionQueue(limit=2, policy=QueuePolicies.Block)
+
+        hub = ActionHub()
+        hub.Register(device, "device")
+        hub.Register(comm, "comm")
+        hub.Register(Coordinator("coordinator", []), "coordinator")
+
+        # the device's own queue is never waited on, so this may run from one of its callbacks
+        device.actionQueue.Put(asyncio.sleep, (0.1,))
+
+        for value in range(6):
+            await device.ReportStreamDataAsync("tx", [value], None)
+            assert comm.actionQueue.depth <= 2
+
+        await comm.actionQueue.JoinAsync()
+        comm.actionQueue.Close()
+        device.actionQueue.Close()
+        return comm.written
+
+    assert asyncio.run(Run()) == [bytes([value]) for value in range(6)]
@@ -3,6 +3,7 @@ from sdrcat_protocol.definitions import SectionTypes, DataTypes, DispositionType
 from sdrcat_protocol.network import Packet, Section, GetPropertySection, DataSection, PropertyValueSection, EnumerationSection, ElementDescription
 from sdrcat_protocol.deviceinfo import DeviceInfo
 from sdrcat_protocol.action import Actions, GenerateFromClient as CliGen, GenerateFromComm as ComGen
+import pytest
 
 # TODO: Write tests involving sending/receiving streams with metadata
 
@@ -289,4 +290,196 @@ def test11():
     assert len(client.calls[0][2]) == 3
     assert client.calls[0][2][0] == 4
     assert client.calls[0][2][1] == 5
-    assert client.calls[0][2][2] == 6
\ No newline at end of file
+    assert client.calls[0][2][2] == 6
+
+def test_configure_stream_numpy():
+    np = pytest.importorskip("numpy")
+    dut = ClientCoordinator()
+    dut.HandleActionItem(ComGen.Connect())
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.complex64, "iq")])]).Encode()))
+    dut.HandleActionItem(CliGen.ConfigureStream("iq", True))
+
+    res = dut.HandleActionItem(ComGen.Receive(Packet([DataSection(SectionTypes.DeviceToClientStream, 5, b'\x3F\x80\x00\x00\x40\x00\x00\x00', [])]).Encode()))
+
+    assert len(res) == 1
+    assert res[0].action == Actions.ToClientStreamData
+    assert isinstance(res[0].params.data, np.ndarray)
+    assert res[0].params.data.tolist() == [1 + 2j]
+
+def test_unconfigured_stream_decodes_to_list():
+    dut = ClientCoordinator()
+    dut.HandleActionItem(ComGen.Connect())
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.uint16, "samples")])]).Encode()))
+
+    res = dut.HandleActionItem(ComGen.Receive(Packet([DataSection(SectionTypes.DeviceToClientStream, 5, b'\x00\x01\x00\x02', [])]).Encode()))
+
+    assert len(res) == 1
+    assert res[0].params.data == [1, 2]
+
+def test_crc_stamped_and_verified():
+    dut = ClientCoordinator()
+    dut.encode_crc = True
+    dut.verify_crc = True
+
+    res = [r for r in dut.HandleActionItem(ComGen.Connect()) if r.action == Actions.ToCommTransmit]
+    assert len(res) == 1
+    assert res[0].params.data == Packet([Section(SectionTypes.Enumerate)]).Encode(crc=True)
+
+    # a zeroed CRC is dropped by the reader, so the enumeration is never applied
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.uint16, "samples")])]).Encode()))
+    assert dut._reader.crcErrors == 1
+    assert dut._state == ClientProtocolState.Enumerating
+
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.uint16, "samples")])]).Encode(crc=True)))
+    assert dut._state == ClientProtocolState.LinkEstablished
+
+def test_receive_fragmented_stream():
+    dut = ClientCoordinator()
+    dut.HandleActionItem(ComGen.Connect())
+    element = ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.uint16, "samples")
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [element])]).Encode()))
+
+    samples = [i % 65536 for i in range(100000)]
+    frames = Packet([DataSection(SectionTypes.DeviceToClientStream, 5, element.EncodeStream(samples), [])]).Encode()
+
+    res = []
+    for i in range(0, len(frames), 4096):
+        res.extend(dut.HandleActionItem(ComGen.Receive(frames[i : i + 4096])))
+
+    assert len(res) == 1
+    assert res[0].action == Actions.ToClientStreamData
+    assert res[0].params.data == samples
+
+def test_multi_section_packet():
+    dut = ClientCoordinator()
+    dut.HandleActionItem(ComGen.Connect())
+    enumeration = EnumerationSection(0, [ElementDescription(5, DispositionTypes.ReadonlyProperty, DataTypes.uint8, "gain")])
+
+    res = dut.HandleActionItem(ComGen.Receive(Packet([enumeration, PropertyValueSection(SectionTypes.NotifyProperty, 5, b'\x07'), PropertyValueSection(SectionTypes.NotifyProperty, 5, b'\x08')]).Encode()))
+    values = [r.params.value for r in res if r.action == Actions.ToClientPropertyValue]
+
+    assert dut._state == ClientProtocolState.LinkEstablished
+    assert values == [7, 8]
+
+def test_receive_compressed_stream():
+    from sdrcat_protocol.network import MetadataItem
+    from sdrcat_protocol.compression import Compress, COMPRESSION_METADATA_NAME
+    from sdrcat_protocol.definitions import CompressionTypes
+
+    dut = ClientCoordinator()
+    dut.HandleActionItem(ComGen.Connect())
+    element = ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.uint16, "samples")
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [element,
+                                                                       ElementDescription(6, DispositionTypes.Metadata, DataTypes.uint8, COMPRESSION_METADATA_NAME),
+                                                                       ElementDescription(7, DispositionTypes.Metadata, DataTypes.uint8, "gain")])]).Encode()))
+
+    samples = [i % 7 for i in range(2000)]
+    payload = Compress(CompressionTypes.lzma, element.EncodeStream(samples))
+    res = dut.HandleActionItem(ComGen.Receive(Packet([DataSection(SectionTypes.DeviceToClientStream, 5, payload, [MetadataItem(7, b'\x03'), MetadataItem(6, b'\x02')])]).Encode()))
+
+    assert len(res) == 1
+    assert res[0].params.data == samples
+    assert res[0].params.metadata == {"gain": 3}
+
+    # a payload that does not decompress is dropped instead of being decoded as samples
+    res = dut.HandleActionItem(ComGen.Receive(Packet([DataSection(SectionTypes.DeviceToClientStream, 5, b'\x00\x01', [MetadataItem(6, b'\x01')])]).Encode()))
+    assert len(res) == 0
+
+def test_configure_stream_scale():
+    dut = ClientCoordinator()
+    dut.HandleActionItem(ComGen.Connect())
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.cs8, "iq")])]).Encode()))
+
+    res = dut.HandleActionItem(ComGen.Receive(Packet([DataSection(SectionTypes.DeviceToClientStream, 5, b'\x40\xC0', [])]).Encode()))
+    assert res[0].params.data == [64 - 64j]
+
+    dut.HandleActionItem(CliGen.ConfigureStream("iq", False, True))
+    res = dut.HandleActionItem(ComGen.Receive(Packet([DataSection(SectionTypes.DeviceToClientStream, 5, b'\x40\xC0', [])]).Encode()))
+    assert res[0].params.data == [0.5 - 0.5j]
+
+@pytest.mark.parametrize("clientWants, deviceAllows, expectedData", [
+    (True, True, b'\x01\x00\x02\x00'),
+    (True, False, b'\x00\x01\x00\x02'),
+    (False, True, b'\x00\x01\x00\x02'),
+])
+def test_negotiated_byte_order(clientWants, deviceAllows, expectedData):
+    from sdrcat_protocol.coordinator import DeviceCoordinator
+    from sdrcat_protocol.action import GenerateFromDevice as DevGen
+
+    def Frames(res):
+        return [r.params.data for r in res if r.action == Actions.ToCommTransmit]
+
+    device = DeviceCoordinator()
+    device.little_endian_payloads = deviceAllows
+    device.HandleActionItem(DevGen.Start({}))
+    device.HandleActionItem(DevGen.DefineStream("rx", DataTypes.uint16, True))
+    device.HandleActionItem(DevGen.DefineProperty("gain", DataTypes.sint32))
+    device.HandleActionItem(DevGen.Ready())
+    device.HandleActionItem(ComGen.Connect())
+
+    dut = ClientCoordinator()
+    dut.little_endian_payloads = clientWants
+    for frame in Frames(dut.HandleActionItem(ComGen.Connect())):
+        for reply in Frames(device.HandleActionItem(ComGen.Receive(frame))):
+            dut.HandleActionItem(ComGen.Receive(reply))
+
+    assert dut._state == ClientProtocolState.LinkEstablished
+
+    frame = Frames(device.HandleActionItem(DevGen.StreamData("rx", [1, 2], None)))[0]
+    assert Packet.Decode(frame).sections[0].dataBytes == expectedData
+    res = dut.HandleActionItem(ComGen.Receive(frame))
+    assert res[0].params.data == [1, 2]
+
+    # property values follow the same order in both directions
+    res = device.HandleActionItem(ComGen.Receive(Frames(dut.HandleActionItem(CliGen.SetProperty("gain", -2)))[0]))
+    assert [r.params.value for r in res if r.action == Actions.ToDeviceSetProperty] == [-2]
+
+def test_coalesced_stream_delivery():
+    from sdrcat_protocol.network import MetadataItem
+
+    dut = ClientCoordinator()
+    dut.HandleActionItem(ComGen.Connect())
+    element = ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.sint16, "samples")
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [element,
+                                                                       ElementDescription(6, DispositionTypes.Metadata, DataTypes.uint8, "gain"),
+                                                                       ElementDescription(7, DispositionTypes.ReadonlyProperty, DataTypes.uint8, "temp")])]).Encode()))
+
+    def Frame(values, gain):
+        return Packet([DataSection(SectionTypes.DeviceToClientStream, 5, element.EncodeStream(values), [MetadataItem(6, bytes([gain]))])]).Encode()
+
+    burst = Frame([1, 2], 3) + Frame([3], 3) + Frame([4, 5], 3)
+
+    # one action per frame until the stream opts in
+    res = dut.HandleActionItem(ComGen.Receive(burst))
+    assert [r.params.data for r in res] == [[1, 2], [3], [4, 5]]
+
+    dut.HandleActionItem(CliGen.ConfigureStream("samples", False, coalesce=True))
+    res = dut.HandleActionItem(ComGen.Receive(burst))
+    assert len(res) == 1
+    assert res[0].params.data == [1, 2, 3, 4, 5]
+    assert res[0].params.metadata == {"gain": 3}
+
+    # a metadata change or any other section ends the run, and the order of deliveries is kept
+    notify = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 7, b'\x2A')]).Encode()
+    res = dut.HandleActionItem(ComGen.Receive(Frame([1], 3) + Frame([2], 4) + Frame([3], 4) + notify + Frame([4], 4)))
+    assert [(r.action, r.params[1]) for r in res] == [
+        (Actions.ToClientStreamData, [1]),
+        (Actions.ToClientStreamData, [2, 3]),
+        (Actions.ToClientPropertyValue, 42),
+        (Actions.ToClientStreamData, [4])]
+
+def test_coalesced_stream_delivery_numpy():
+    np = pytest.importorskip("numpy")
+
+    dut = ClientCoordinator()
+    dut.HandleActionItem(ComGen.Connect())
+    element = ElementDescription(5, DispositionTypes.DeviceToClientStream, DataTypes.cs8, "iq")
+    dut.HandleActionItem(ComGen.Receive(Packet([EnumerationSection(0, [element])]).Encode()))
+    dut.HandleActionItem(CliGen.ConfigureStream("iq", True, True, True))
+
+    frames = b''.join(Packet([DataSection(SectionTypes.DeviceToClientStream, 5, bytes([64, 192]) * 4, [])]).Encode() for _ in range(8))
+    res = dut.HandleActionItem(ComGen.Receive(frames))
+
+    assert len(res) == 1
+    assert isinstance(res[0].params.data, np.ndarray)
+    assert res[0].params.data.tolist() == [0.5 - 0.5j] * 32
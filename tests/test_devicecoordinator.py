@@ -411,4 +411,231 @@ def test18():
     assert decoded.sections[0].dataBytes[8] == 0
     assert decoded.sections[0].dataBytes[9] == 0
     assert decoded.sections[0].dataBytes[10] == 0
-    assert decoded.sections[0].dataBytes[11] == 4
\ No newline at end of file
+    assert decoded.sections[0].dataBytes[11] == 4
+
+def test_multi_section_packet_coalesced_reply():
+    dut = DeviceCoordinator()
+    dut.coalesce_window_us = 500
+    dut.HandleActionItem(DevGen.Start({}))
+    dut.HandleActionItem(DevGen.Ready())
+    dut.HandleActionItem(ComGen.Connect())
+
+    res = dut.HandleActionItem(ComGen.Receive(Packet([Section(SectionTypes.Enumerate), GetPropertySection(98), GetPropertySection(99)]).Encode()))
+
+    # the enumerate moves the link forward, so both get requests are answered in the new state
+    assert dut._state == DeviceProtocolState.LinkEstablished
+
+    transmits = [r for r in res if r.action == Actions.ToCommTransmit]
+    assert len(transmits) == 1
+
+    reply = Packet.Decode(transmits[0].params.data)
+    assert [s.sectionType for s in reply.sections] == [SectionTypes.Enumeration.value, SectionTypes.NotAllowed.value, SectionTypes.NotAllowed.value]
+
+def test_coalesce_window_flushes_on_timer():
+    import asyncio
+    from sdrcat_protocol.action import ActionHub, Communicator
+
+    class Capture(Communicator):
+        def __init__(self):
+            super().__init__()
+            self.items = []
+
+        def HandleActionItem(self, action):
+            self.items.append(action)
+            return []
+
+    async def Run():
+        hub = ActionHub()
+        dut = DeviceCoordinator()
+        comm = Capture()
+        hub.Register(dut, "coordinator")
+        hub.Register(comm, "comm")
+        hub.Register(Capture(), "device")
+
+        dut.coalesce_window_us = 2000
+        hub.SendAction(DevGen.Start({}))
+        hub.SendAction(DevGen.Ready())
+        hub.SendAction(ComGen.Connect())
+        hub.SendAction(ComGen.Receive(Packet([Section(SectionTypes.Enumerate)]).Encode()))
+        hub.SendAction(ComGen.Receive(Packet([GetPropertySection(98)]).Encode()))
+
+        assert [i for i in comm.items if i.action == Actions.ToCommTransmit] == []
+        await asyncio.sleep(0.05)
+        return [i for i in comm.items if i.action == Actions.ToCommTransmit]
+
+    items = asyncio.run(Run())
+
+    assert len(items) == 1
+    assert len(Packet.Decode(items[0].params.data).sections) == 2
+
+def test_reset_clears_cached_enumeration():
+    dut = DeviceCoordinator()
+    dut.HandleActionItem(DevGen.Start({}))
+    dut.HandleActionItem(DevGen.DefineProperty("gain", DataTypes.uint8))
+    dut.HandleActionItem(DevGen.Ready())
+    dut.HandleActionItem(ComGen.Connect())
+
+    res = dut.HandleActionItem(ComGen.Receive(Packet([Section(SectionTypes.Enumerate)]).Encode()))
+    first = [r for r in res if r.action == Actions.ToCommTransmit][0].params.data
+    assert [e.name for e in Packet.Decode(first).sections[0].elements] == ["gain"]
+
+    dut.HandleActionItem(DevGen.Reset())
+    dut.HandleActionItem(DevGen.DefineProperty("frequency", DataTypes.uint64))
+    dut.HandleActionItem(DevGen.Ready())
+
+    res = dut.HandleActionItem(ComGen.Receive(Packet([Section(SectionTypes.Enumerate)]).Encode()))
+    second = [r for r in res if r.action == Actions.ToCommTransmit][-1].params.data
+    assert [e.name for e in Packet.Decode(second).sections[0].elements] == ["frequency"]
+
+def test_crc_reply_uses_stamped_control_frame():
+    from sdrcat_protocol.controlframes import ControlFrames
+
+    dut = DeviceCoordinator()
+    dut.encode_crc = True
+    dut.HandleActionItem(DevGen.Start({}))
+    dut.HandleActionItem(ComGen.Connect())
+
+    res = dut.HandleActionItem(ComGen.Receive(Packet([GetPropertySection(98)]).Encode()))
+    transmits = [r for r in res if r.action == Actions.ToCommTransmit]
+
+    assert len(transmits) == 1
+    assert transmits[0].params.data is ControlFrames.STAMPED[ControlFrames.NotAllowed]
+
+def test_stream_data_metadata_uses_element_ids():
+    dut = DeviceCoordinator()
+    dut.include_informational_messages = True
+    dut.HandleActionItem(DevGen.Start({}))
+    dut.HandleActionItem(DevGen.DefineStream("rx", DataTypes.uint8, True))
+    dut.HandleActionItem(DevGen.DefineMetadata("rate", DataTypes.uint32))
+    dut.HandleActionItem(DevGen.Ready())
+    dut.HandleActionItem(ComGen.Connect())
+    dut.HandleActionItem(ComGen.Receive(Packet([Section(SectionTypes.Enumerate)]).Encode()))
+    assert dut._state == DeviceProtocolState.LinkEstablished
+
+    rateId = dut._enumeration.GetPropertyByName("rate").elementId
+    frames = []
+    for _ in range(2):
+        res = dut.HandleActionItem(DevGen.StreamData("rx", [1, 2], {"rate": 48000, "bogus": 1}))
+        frames.append([r for r in res if r.action == Actions.ToCommTransmit][0].params.data)
+        assert any(r.action == Actions.CoordinatorInformation and "bogus" in r.params.message for r in res)
+
+    assert frames[0] == frames[1]
+    metadata = Packet.Decode(frames[0]).sections[0].metadata
+    assert len(metadata) == 1
+    assert metadata[0].metadataId == rateId
+    assert metadata[0].metadataValueBytes == (48000).to_bytes(4, 'big')
+
+def test_stream_compression():
+    from sdrcat_protocol.compression import StreamCompressor, COMPRESSION_METADATA_NAME
+    from sdrcat_protocol.definitions import CompressionTypes
+    import os
+    import zlib
+
+    ratios = []
+    dut = DeviceCoordinator()
+    dut.stream_compression["rx"] = StreamCompressor(CompressionTypes.zlib, minimumBytes=256, retryInterval=1, onRatio=lambda raw, compressed: ratios.append(raw / compressed))
+    dut.HandleActionItem(DevGen.Start({}))
+    dut.HandleActionItem(DevGen.DefineStream("rx", DataTypes.uint8, True))
+    dut.HandleActionItem(DevGen.DefineCompression())
+    dut.HandleActionItem(DevGen.Ready())
+    dut.HandleActionItem(ComGen.Connect())
+    dut.HandleActionItem(ComGen.Receive(Packet([Section(SectionTypes.Enumerate)]).Encode()))
+    compressionId = dut._enumeration.GetPropertyByName(COMPRESSION_METADATA_NAME).elementId
+
+    def Send(data):
+        res = dut.HandleActionItem(DevGen.StreamData("rx", data, None))
+        return Packet.Decode([r for r in res if r.action == Actions.ToCommTransmit][0].params.data).sections[0]
+
+    section = Send([0] * 4096)
+    assert [(m.metadataId, m.metadataValueBytes) for m in section.metadata] == [(compressionId, b'\x01')]
+    assert zlib.decompress(section.dataBytes) == bytes(4096)
+    assert len(ratios) == 1 and ratios[0] > 10
+
+    # below the threshold, and incompressible data, go out as they are
+    assert Send([1] * 100).metadata == []
+    noise = list(os.urandom(4096))
+    assert Send(noise).metadata == []
+    assert len(ratios) == 2
+
+    # the frame after a poor ratio is not even tried
+    assert Send([0] * 4096).metadata == []
+    assert len(ratios) == 2
+    assert len(Send([0] * 4096).metadata) == 1
+
+def test_stream_compression_needs_advertised_metadata():
+    from sdrcat_protocol.compression import StreamCompressor
+
+    dut = DeviceCoordinator()
+    dut.stream_compression["rx"] = StreamCompressor(minimumBytes=0)
+    dut.HandleActionItem(DevGen.Start({}))
+    dut.HandleActionItem(DevGen.DefineStream("rx", DataTypes.uint8, True))
+    dut.HandleActionItem(DevGen.Ready())
+    dut.HandleActionItem(ComGen.Connect())
+    dut.HandleActionItem(ComGen.Receive(Packet([Section(SectionTypes.Enumerate)]).Encode()))
+
+    res = dut.HandleActionItem(DevGen.StreamData("rx", [0] * 4096, None))
+    section = Packet.Decode([r for r in res if r.action == Actions.ToCommTransmit][0].params.data).sections[0]
+    assert section.metadata == []
+    assert section.dataBytes == bytes(4096)
+
+def test_diagnostics_levels():
+    from sdrcat_protocol.definitions import DiagnosticLevels
+
+    def Messages(level):
+        dut = DeviceCoordinator()
+        dut.diagnostics_level = level
+        res = []
+        res.extend(dut.HandleActionItem(DevGen.Start({})))
+        res.extend(dut.HandleActionItem(DevGen.DefineStream("rx", DataTypes.uint8, True)))
+        res.extend(dut.HandleActionItem(DevGen.Ready()))
+        res.extend(dut.HandleActionItem(ComGen.Connect()))
+        res.extend(dut.HandleActionItem(ComGen.Receive(Packet([Section(SectionTypes.Enumerate)]).Encode())))
+        res.extend(dut.HandleActionItem(DevGen.StreamData("rx", [1, 2], None)))
+        return [r.params.message for r in res if r.action == Actions.CoordinatorInformation]
+
+    assert Messages(DiagnosticLevels.Off) == []
+
+    # state changes are reported from Info, the per packet chatter only from Trace
+    info = Messages(DiagnosticLevels.Info)
+    assert "Changing state to ReadyConnected." in info
+    assert "Receiving data." not in info and "Sending data through stream rx" not in info
+
+    trace = Messages(DiagnosticLevels.Trace)
+    assert set(info) < set(trace)
+    assert "Receiving data." in trace and "Received Enumerate." in trace and "Sending data through stream rx" in trace
+
+def test_diagnostics_level_is_per_coordinator():
+    from sdrcat_protocol.definitions import DiagnosticLevels
+    from sdrcat_protocol.coordinator import devicecoordinatorcore as core
+
+    verbose = DeviceCoordinator()
+    verbose.diagnostics_level = DiagnosticLevels.Trace
+    quiet = DeviceCoordinator()
+
+    # interleaved, neither coordinator picks up the other's level
+    for dut in [verbose, quiet, verbose, quiet]:
+        res = dut.HandleActionItem(ComGen.Receive(b''))
+        assert any(r.action == Actions.CoordinatorInformation for r in res) == (dut is verbose)
+
+    # called directly, a core function builds no messages, whatever the coordinator that ran last wanted
+    verbose.HandleActionItem(ComGen.Receive(b''))
+    assert all(r.action != Actions.CoordinatorInformation for r in core.DeviceStarting(DeviceProtocolState.Startup, {}))
+
+def test_enumerate_capabilities_apply_to_rest_of_packet():
+    from sdrcat_protocol.network import EnumerateSection
+    from sdrcat_protocol.definitions import Capabilities
+
+    dut = DeviceCoordinator()
+    dut.little_endian_payloads = True
+    dut.HandleActionItem(DevGen.Start({}))
+    dut.HandleActionItem(DevGen.DefineProperty("gain", DataTypes.uint16))
+    dut.HandleActionItem(DevGen.Ready())
+    dut.HandleActionItem(ComGen.Connect())
+
+    # the SetProperty value is little endian already, since the Enumerate ahead of it in the packet negotiated that
+    gainId = dut._enumeration.GetPropertyByName("gain").elementId
+    res = dut.HandleActionItem(ComGen.Receive(Packet([EnumerateSection(Capabilities.LittleEndian),
+                                                      PropertyValueSection(SectionTypes.SetProperty, gainId, (0x1234).to_bytes(2, 'little'))]).Encode()))
+
+    sets = [r for r in res if r.action == Actions.ToDeviceSetProperty]
+    assert [(s.params.name, s.params.value) for s in sets] == [("gain", 0x1234)]
@@ -409,4 +409,23 @@ def test18():
     assert decoded.sections[0].dataBytes[8] == 0
     assert decoded.sections[0].dataBytes[9] == 0
     assert decoded.sections[0].dataBytes[10] == 0
-    assert decoded.sections[0].dataBytes[11] == 4
\ No newline at end of file
+    assert decoded.sections[0].dataBytes[11] == 4
+
+def test_enumerate_capabilities_apply_to_rest_of_packet():
+    from sdrcat_protocol.network import EnumerateSection
+    from sdrcat_protocol.definitions import Capabilities
+
+    dut = DeviceCoordinator()
+    dut.little_endian_payloads = True
+    dut.HandleActionItem(DevGen.Start({}))
+    dut.HandleActionItem(DevGen.DefineProperty("gain", DataTypes.uint16))
+    dut.HandleActionItem(DevGen.Ready())
+    dut.HandleActionItem(ComGen.Connect())
+
+    # the SetProperty value is little endian already, since the Enumerate ahead of it in the packet negotiated that
+    gainId = dut._enumeration.GetPropertyByName("gain").elementId
+    res = dut.HandleActionItem(ComGen.Receive(Packet([EnumerateSection(Capabilities.LittleEndian),
+                                                      PropertyValueSection(SectionTypes.SetProperty, gainId, (0x1234).to_bytes(2, 'little'))]).Encode()))
+
+    sets = [r for r in res if r.action == Actions.ToDeviceSetProperty]
+    assert [(s.params.name, s.params.value) for s in sets] == [("gain", 0x1234)]
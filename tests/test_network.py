@@ -1,5 +1,7 @@
 from sdrcat_protocol.network import *
+from sdrcat_protocol import network
 from sdrcat_protocol.util import PrintHex
+from sdrcat_protocol.controlframes import ControlFrames
 import pytest
 
 def test_getNextChunkZeroOffset():
@@ -200,6 +202,224 @@ def test_streamReader_multiple_random_boundary():
 
    assert p3 is None
 
+def test_streamReader_byte_by_byte():
+   frames = b''.join(Packet([PropertyValueSection(SectionTypes.NotifyProperty, i, i.to_bytes(4, 'big'))]).Encode() for i in range(100))
+   r = StreamReader()
+   for i in range(len(frames)):
+      r.ProcessBytes(frames[i:i+1])
+
+   for i in range(100):
+      p = r.GetNextPacket()
+      assert p is not None
+      assert p.sections[0].elementId == i
+      assert p.sections[0].propertyValueBytes == i.to_bytes(4, 'big')
+
+   assert r.GetNextPacket() is None
+
+def test_streamReader_compaction_keeps_partial_packet():
+   frame = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 7, b'\x00' * 100)]).Encode()
+   count = StreamReader.COMPACT_THRESHOLD // len(frame) + 10
+   stream = frame * count
+   r = StreamReader()
+   r.ProcessBytes(stream[:-3])
+   r.ProcessBytes(stream[-3:])
+
+   received = 0
+   while r.GetNextPacket() is not None:
+      received += 1
+
+   assert received == count
+
+def test_streamReader_invalid_length():
+   r = StreamReader()
+   with pytest.raises(Exception):
+      r.ProcessBytes(bytes([0, 1, 0, 0]))
+
+def test_crc16_check_value():
+   assert Crc16(b'123456789') == 0x29B1
+   assert Crc16(memoryview(b'56789'), Crc16(b'1234')) == 0x29B1
+
+def test_packet_crc_roundtrip():
+   frame = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 7, b'\x01\x02')]).Encode(crc=True)
+   assert frame[2:4] != b'\x00\x00'
+   assert Packet.Decode(frame, verifyCrc=True).sections[0].elementId == 7
+
+   frame[-1] ^= 0xFF
+   with pytest.raises(Exception):
+      Packet.Decode(frame, verifyCrc=True)
+
+   Packet.Decode(frame)
+
+def test_streamReader_drops_bad_crc():
+   good = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 1, b'\x01')]).Encode(crc=True)
+   bad = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 2, b'\x02')]).Encode()
+
+   r = StreamReader(verifyCrc=True)
+   r.ProcessBytes(bytes(bad) + bytes(good))
+
+   assert r.crcErrors == 1
+   assert r.GetNextPacket().sections[0].elementId == 1
+   assert r.GetNextPacket() is None
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_packet_fragmented_roundtrip(lazy):
+   payload = bytes(range(256)) * 4
+   sections = [PropertyValueSection(SectionTypes.NotifyProperty, 1, b'\x01'),
+               DataSection(SectionTypes.DeviceToClientStream, 3, payload, [MetadataItem(2, b'\xFE')]),
+               PropertyValueSection(SectionTypes.NotifyProperty, 4, b'\x04')]
+   frames = Packet(sections).Encode(crc=True, maxFrameLength=100)
+
+   r = StreamReader(lazy=lazy, verifyCrc=True)
+   for i in range(0, len(frames), 37):
+      r.ProcessBytes(frames[i : i + 37])
+
+   p1 = r.GetNextPacket()
+   p2 = r.GetNextPacket()
+   p3 = r.GetNextPacket()
+
+   assert r.GetNextPacket() is None
+   assert r.crcErrors == 0 and r.fragmentErrors == 0
+   assert p1.sections[0].elementId == 1
+   assert p2.sections[0].streamId == 3
+   assert p2.sections[0].dataBytes == payload
+   assert p2.sections[0].metadata[0].metadataValueBytes == b'\xFE'
+   assert p3.sections[0].elementId == 4
+
+def test_packet_fragmented_beyond_frame_length():
+   payload = bytes(200000)
+   frames = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 9, payload)]).Encode()
+
+   r = StreamReader()
+   r.ProcessBytes(frames)
+   p = r.GetNextPacket()
+
+   assert len(p.sections) == 1
+   assert p.sections[0].elementId == 9
+   assert p.sections[0].propertyValueBytes == payload
+
+def test_streamReader_drops_oversized_reassembly():
+   frames = Packet([DataSection(SectionTypes.DeviceToClientStream, 3, bytes(300), [])]).Encode(maxFrameLength=100)
+
+   r = StreamReader(maxReassemblyLength=200)
+   r.ProcessBytes(frames)
+
+   # the first fragment is refused before anything is allocated, the rest no longer belong to a packet
+   assert r.GetNextPacket() is None
+   assert r.fragmentErrors > 0
+
+   r.maxReassemblyLength = 1024
+   r.ProcessBytes(frames)
+   assert r.GetNextPacket().sections[0].dataBytes == bytes(300)
+
+def test_streamReader_drops_out_of_order_fragment():
+   frames = Packet([DataSection(SectionTypes.DeviceToClientStream, 3, bytes(300), [])]).Encode(maxFrameLength=100)
+   first = Packet.Decode(frames).EncodedSize()
+
+   r = StreamReader()
+   r.ProcessBytes(frames[first:])
+
+   assert r.GetNextPacket() is None
+   assert r.fragmentErrors > 0
+
+@pytest.mark.parametrize("carried", [False, True])
+def test_streamReader_bad_frame_is_not_read_again(carried):
+   good = Packet([Section(SectionTypes.Enumerate)]).Encode()
+   bad = b'\x00\x07\x00\x00\x00\x09\x00'
+
+   r = StreamReader()
+   data = good + bad
+   if carried:
+      # an incomplete length field is kept, so the next call reads from the reader's own buffer
+      r.ProcessBytes(data[:1])
+      data = data[1:]
+
+   with pytest.raises(Exception):
+      r.ProcessBytes(data)
+   r.ProcessBytes(good)
+
+   packets = []
+   while (p := r.GetNextPacket()) is not None:
+      packets.append(p)
+
+   assert [p.sections[0].sectionType for p in packets] == [SectionTypes.Enumerate.value] * 2
+
+def test_frameCoalescer_merges_sections():
+   c = FrameCoalescer()
+   assert c.Add(Packet([PropertyValueSection(SectionTypes.NotifyProperty, 1, b'\x01')]).Encode()) == []
+   assert c.Add(Packet([Section(SectionTypes.Confirmed)]).Encode()) == []
+
+   frame = c.Flush()
+   p = Packet.Decode(frame)
+
+   assert c.IsEmpty() and c.Flush() is None
+   assert len(frame) == 4 + 6 + 3
+   assert [s.sectionType for s in p.sections] == [SectionTypes.NotifyProperty.value, SectionTypes.Confirmed.value]
+
+def test_frameCoalescer_byte_cap_and_fragments():
+   c = FrameCoalescer(maxBytes=16)
+   small = Packet([PropertyValueSection(SectionTypes.NotifyProperty, 1, b'\x01\x02\x03')]).Encode()
+   assert c.Add(small) == []
+
+   ready = c.Add(small)
+   assert len(ready) == 1 and ready[0] == small
+
+   fragmented = Packet([DataSection(SectionTypes.DeviceToClientStream, 3, bytes(300), [])]).Encode(maxFrameLength=100)
+   ready = c.Add(fragmented)
+   assert len(ready) == 2
+   assert ready[0] == small
+   assert ready[1] == fragmented
+   assert c.IsEmpty()
+
+def test_enumerationSection_frame_cache():
+   e = EnumerationSection(1, [ElementDescription(1024, DispositionTypes.EditableProperty, DataTypes.uint8, "gain")])
+   frame = e.EncodeFrame()
+
+   assert frame == Packet([e]).Encode()
+   assert e.EncodeFrame() is frame
+
+   e.Append(ElementDescription(1025, DispositionTypes.Metadata, DataTypes.utf8, "label"))
+   assert e.EncodeFrame() is not frame
+   assert len(Packet.Decode(e.EncodeFrame()).sections[0].elements) == 2
+
+   e.Clear()
+   assert Packet.Decode(e.EncodeFrame()).sections[0].elements == []
+
+def test_enumerationSection_indexes():
+   gain = ElementDescription(1024, DispositionTypes.EditableProperty, DataTypes.uint8, "gain")
+   iq = ElementDescription(1025, DispositionTypes.DeviceToClientStream, DataTypes.complex64, "iq")
+   e = EnumerationSection(0, [gain, iq])
+   e.Append(ElementDescription(1024, DispositionTypes.Metadata, DataTypes.uint8, "duplicate"))
+
+   assert e.GetPropertyByName("iq") is iq
+   assert e.GetPropertyById(1024) is gain
+   assert e.GetPropertyByName("missing") is None
+   assert e.ElementsWithDisposition(DispositionTypes.DeviceToClientStream) == {1025: iq}
+   assert e.ElementsWithDisposition(DispositionTypes.Metadata) == {}
+
+   decoded = EnumerationSection.Decode(bytes(e.Encode()))
+   assert decoded.GetPropertyByName("iq").elementId == 1025
+   assert decoded.GetPropertyById(1024).name == "gain"
+
+   e.Clear()
+   assert e.GetPropertyById(1024) is None
+   assert e.ElementsWithDisposition(DispositionTypes.DeviceToClientStream) == {}
+
+def test_controlFrames_match_encoded():
+   assert ControlFrames.Confirmed == Packet([Section(SectionTypes.Confirmed)]).Encode()
+   assert ControlFrames.STAMPED[ControlFrames.Reset] == Packet([Section(SectionTypes.Reset)]).Encode(crc=True)
+
+def test_streamReader_knownFrames():
+   r = StreamReader(verifyCrc=True, knownFrames=ControlFrames.PACKETS)
+   r.ProcessBytes(ControlFrames.STAMPED[ControlFrames.NotAllowed] + ControlFrames.NotAllowed + ControlFrames.STAMPED[ControlFrames.Confirmed])
+
+   p1 = r.GetNextPacket()
+   p2 = r.GetNextPacket()
+
+   assert p1 is ControlFrames.PACKETS[ControlFrames.NotAllowed]
+   assert p2.sections[0].sectionType == SectionTypes.Confirmed.value
+   assert r.GetNextPacket() is None
+   assert r.crcErrors == 1
+
 def test_section_encode():
    expected_bytestream = bytes([0,3,1])
    s = Section(SectionTypes.Reset)
@@ -283,6 +503,40 @@ def test_dataSection_decode_invalid_section():
    with pytest.raises(Exception):
       DataSection.Decode()
 
+def test_dataSection_decode_lazy():
+   bytestream = bytes([0,40,0,0,0,36,6,0,42,0,27,0,5,0,1,254,0,5,0,2,237,0,5,0,3,192,0,5,0,4,255,0,5,0,5,238,222,173,190,239])
+   p = Packet.Decode(bytestream, lazy=True)
+   s = p.sections[0]
+
+   assert isinstance(s, DataSection)
+   assert s.streamId == 42
+   assert s._metadata is None
+
+   assert isinstance(s.dataBytes, memoryview)
+   assert s.dataBytes == b'\xDE\xAD\xBE\xEF'
+   assert ElementDescription(dataType=DataTypes.raw).DecodeStream(s.dataBytes) == b'\xDE\xAD\xBE\xEF'
+   assert ElementDescription(dataType=DataTypes.uint16).DecodeStream(s.dataBytes) == [0xDEAD, 0xBEEF]
+
+   assert len(s.metadata) == 5
+   assert s.metadata[4].metadataId == 5
+   assert s.metadata[4].metadataValueBytes == b'\xEE'
+   assert bytes(s.Encode()) == bytestream[4:]
+
+def test_dataSection_decode_lazy_invalid_metadata_length():
+   with pytest.raises(Exception):
+      DecodeSection(memoryview(bytes([0,9,6,0,42,0,9,0,0])), lazy=True)
+
+def test_streamReader_lazy():
+   r = StreamReader(lazy=True)
+   r.ProcessBytes(Packet([DataSection(SectionTypes.DeviceToClientStream, 3, b'\x01\x02', [MetadataItem(1, b'\xFE')]),
+                          PropertyValueSection(SectionTypes.NotifyProperty, 7, b'\x2A')]).Encode())
+   p = r.GetNextPacket()
+
+   assert isinstance(p.sections[0], LazyDataSection)
+   assert p.sections[0].dataBytes == b'\x01\x02'
+   assert p.sections[0].metadata[0].metadataValueBytes == b'\xFE'
+   assert p.sections[1].propertyValueBytes == b'\x2A'
+
 def test_metadataItem_encode():
    expected_bytestream = bytes([0,8,0,1,1,2,3,4])
    s = MetadataItem(1, b'\x01\x02\x03\x04')
@@ -313,6 +567,24 @@ def test_dataSection_encode_with_meta():
 
    assert result_bytestream == expected_bytestream
 
+def test_packet_encodeInto_offset():
+   sections = [PropertyValueSection(SectionTypes.NotifyProperty, 7, b'\x01\x02'),
+               DataSection(SectionTypes.DeviceToClientStream, 42, b'\xDE\xAD', [MetadataItem(1, b'\xFE')]),
+               EnumerationSection(1, [ElementDescription(3, DispositionTypes.Metadata, DataTypes.utf8, "n\u00e4me")])]
+   p = Packet(sections)
+   expected_bytestream = bytes(p.Encode())
+
+   buffer = bytearray(b'\xAA' * (3 + p.EncodedSize() + 2))
+   end = p.EncodeInto(buffer, 3)
+
+   assert p.EncodedSize() == len(expected_bytestream)
+   assert end == 3 + len(expected_bytestream)
+   assert buffer[3:end] == expected_bytestream
+   assert buffer[:3] == b'\xAA\xAA\xAA' and buffer[end:] == b'\xAA\xAA'
+
+   decoded = Packet.Decode(expected_bytestream)
+   assert decoded.sections[2].elements[0].name == "n\u00e4me"
+
 def test_dataSection_decode_with_meta():
    bytestream = bytes([0,36,6,0,42,0,27,0,5,0,1,254,0,5,0,2,237,0,5,0,3,192,0,5,0,4,255,0,5,0,5,238,222,173,190,239])
    s = DataSection.Decode(bytestream)
@@ -352,6 +624,17 @@ def test_elementDescription_decode():
    assert s.dataType == DataTypes.float32.value
    assert s.name == "test.testprop"
 
+def test_elementDescription_dataType_rebinds_codec():
+   s = ElementDescription(dataType=DataTypes.uint8)
+   assert s.EncodeValue(1) == b'\x01'
+
+   s.dataType = DataTypes.uint16.value
+   assert s.EncodeValue(1) == b'\x00\x01'
+   assert s.DecodeStream(b'\x00\x01\x00\x02') == [1, 2]
+
+   with pytest.raises(Exception):
+      s.DecodeValue(b'\x01')
+
 @pytest.mark.parametrize("datatype, value, expected_encoding", [
    (DataTypes.raw, b'\xDE\xEA\xBE\xEF', b'\xDE\xEA\xBE\xEF'),
    (DataTypes.utf8, "test", b'test'),
@@ -366,7 +649,10 @@ def test_elementDescription_decode():
    (DataTypes.float32, 3.1415926536, b'\x40\x49\x0F\xDB'),
    (DataTypes.float64, 3.1415926536, b'\x40\x09\x21\xFB\x54\x44\x86\xE0'),
    (DataTypes.complex64, 3.1415926536 + 3.1415926536j, b'\x40\x49\x0F\xDB\x40\x49\x0F\xDB'),
-   (DataTypes.complex128, 3.1415926536 + 3.1415926536j, b'\x40\x09\x21\xFB\x54\x44\x86\xE0\x40\x09\x21\xFB\x54\x44\x86\xE0')
+   (DataTypes.complex128, 3.1415926536 + 3.1415926536j, b'\x40\x09\x21\xFB\x54\x44\x86\xE0\x40\x09\x21\xFB\x54\x44\x86\xE0'),
+   (DataTypes.cs8, 100 - 100j, b'\x64\x9C'),
+   (DataTypes.cs16, 1000 - 1000j, b'\x03\xE8\xFC\x18'),
+   (DataTypes.cs12, 1000 - 1000j, b'\x3E\x8C\x18')
 ])
 def test_elementDescription_encodeValue(datatype, value, expected_encoding):
    s = ElementDescription(dataType=datatype)
@@ -387,7 +673,10 @@ def test_elementDescription_encodeValue(datatype, value, expected_encoding):
    (DataTypes.float32, 3.1415926536, b'\x40\x49\x0F\xDB'),
    (DataTypes.float64, 3.1415926536, b'\x40\x09\x21\xFB\x54\x44\x86\xE0'),
    (DataTypes.complex64, 3.1415926536 + 3.1415926536j, b'\x40\x49\x0F\xDB\x40\x49\x0F\xDB'),
-   (DataTypes.complex128, 3.1415926536 + 3.1415926536j, b'\x40\x09\x21\xFB\x54\x44\x86\xE0\x40\x09\x21\xFB\x54\x44\x86\xE0')
+   (DataTypes.complex128, 3.1415926536 + 3.1415926536j, b'\x40\x09\x21\xFB\x54\x44\x86\xE0\x40\x09\x21\xFB\x54\x44\x86\xE0'),
+   (DataTypes.cs8, 100 - 100j, b'\x64\x9C'),
+   (DataTypes.cs16, 1000 - 1000j, b'\x03\xE8\xFC\x18'),
+   (DataTypes.cs12, 1000 - 1000j, b'\x3E\x8C\x18')
 ])
 def test_elementDescription_decodeValue(datatype, expected_value, encoding):
    import math
@@ -419,6 +708,9 @@ def test_elementDescription_decodeValue(datatype, expected_value, encoding):
    (DataTypes.complex128, [1.100000000000000088817841970012523233890533447265625+1.1999999999999999555910790149937383830547332763671875j,
                         1.3000000000000000444089209850062616169452667236328125+1.399999999999999911182158029987476766109466552734375j],
                         b'\x3F\xF1\x99\x99\x99\x99\x99\x9A\x3F\xF3\x33\x33\x33\x33\x33\x33\x3F\xF4\xCC\xCC\xCC\xCC\xCC\xCD\x3F\xF6\x66\x66\x66\x66\x66\x66'),
+   (DataTypes.cs8, [1 - 2j, -128 + 127j], b'\x01\xFE\x80\x7F'),
+   (DataTypes.cs16, [1 - 2j, -32768 + 32767j], b'\x00\x01\xFF\xFE\x80\x00\x7F\xFF'),
+   (DataTypes.cs12, [1 - 2j, -2048 + 2047j], b'\x00\x1F\xFE\x80\x07\xFF'),
 ])
 def test_elementDescription_encodeStream(datatype, provided_stream, encoded_stream):
    s = ElementDescription(dataType=datatype)
@@ -444,12 +736,42 @@ def test_elementDescription_encodeStream(datatype, provided_stream, encoded_stre
    (DataTypes.complex128, [1.100000000000000088817841970012523233890533447265625+1.1999999999999999555910790149937383830547332763671875j,
                         1.3000000000000000444089209850062616169452667236328125+1.399999999999999911182158029987476766109466552734375j],
                         b'\x3F\xF1\x99\x99\x99\x99\x99\x9A\x3F\xF3\x33\x33\x33\x33\x33\x33\x3F\xF4\xCC\xCC\xCC\xCC\xCC\xCD\x3F\xF6\x66\x66\x66\x66\x66\x66'),
+   (DataTypes.cs8, [1 - 2j, -128 + 127j], b'\x01\xFE\x80\x7F'),
+   (DataTypes.cs16, [1 - 2j, -32768 + 32767j], b'\x00\x01\xFF\xFE\x80\x00\x7F\xFF'),
+   (DataTypes.cs12, [1 - 2j, -2048 + 2047j], b'\x00\x1F\xFE\x80\x07\xFF'),
 ])
 def test_elementDescription_decodeStream(datatype, expected_stream, encoded_stream):
    s = ElementDescription(dataType=datatype)
    result_stream = s.DecodeStream(encoded_stream)
    assert result_stream == expected_stream
 
+@pytest.mark.parametrize("datatype, dtype, encoded_stream", [
+   (DataTypes.uint8, 'u1', b'\x01\x02\x03\x04'),
+   (DataTypes.sint8, 'i1', b'\xFF\xFE\xFD\xFC'),
+   (DataTypes.uint16, 'u2', b'\x00\x01\x00\x02\x00\x03\x00\x04'),
+   (DataTypes.sint16, 'i2', b'\xFF\xFF\xFF\xFE\xFF\xFD\xFF\xFC'),
+   (DataTypes.uint32, 'u4', b'\x00\x00\x00\x01\x00\x00\x00\x02'),
+   (DataTypes.sint64, 'i8', b'\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFF\xFE'),
+   (DataTypes.float32, 'f4', b'\x3F\x8C\xCC\xCD\x3F\x99\x99\x9A\x3F\xA6\x66\x66\x3F\xB3\x33\x33'),
+   (DataTypes.complex64, 'c8', b'\x3F\x8C\xCC\xCD\x3F\x99\x99\x9A\x3F\xA6\x66\x66\x3F\xB3\x33\x33'),
+   (DataTypes.complex128, 'c16', b'\x3F\xF1\x99\x99\x99\x99\x99\x9A\x3F\xF3\x33\x33\x33\x33\x33\x33\x3F\xF4\xCC\xCC\xCC\xCC\xCC\xCD\x3F\xF6\x66\x66\x66\x66\x66\x66'),
+])
+def test_elementDescription_numpyStream(datatype, dtype, encoded_stream):
+   np = pytest.importorskip("numpy")
+   s = ElementDescription(dataType=datatype)
+
+   decoded = s.DecodeStream(encoded_stream, asNumpy=True)
+   assert isinstance(decoded, np.ndarray)
+   assert decoded.dtype == np.dtype('>' + dtype)
+   assert decoded.tolist() == s.DecodeStream(encoded_stream)
+
+   assert s.EncodeStream(decoded) == encoded_stream
+   assert s.EncodeStream(decoded.astype(np.dtype('<' + dtype))) == encoded_stream
+
+def test_elementDescription_numpyStream_rawIgnoresNumpy():
+   s = ElementDescription(dataType=DataTypes.utf8)
+   assert s.DecodeStream(b'test', asNumpy=True) == 'test'
+
 def test_enumerationSection_encoding():
    expected_bytestream = bytes([0,36,7,1,0,16,0,42,2,9,ord('t'),ord('e'),ord('s'),ord('t'),ord('.'),ord('p'),ord('r'),ord('o'),ord('p'),ord('1'),0,16,0,43,0,1,ord('t'),ord('e'),ord('s'),ord('t'),ord('.'),ord('p'),ord('r'),ord('o'),ord('p'),ord('2')])
    s = EnumerationSection(1, [
@@ -555,4 +877,286 @@ def test_packet_decoding():
 
     recoded = p.Encode()
 
-    assert recoded == bytestream
\ No newline at end of file
+    assert recoded == bytestream
+
+def test_decodedObjectsHaveNoInstanceDict():
+   enumeration = EnumerationSection(0, [ElementDescription(1, DispositionTypes.Metadata, DataTypes.uint8, 'm')])
+   frame = bytes(Packet([DataSection(SectionTypes.DeviceToClientStream, 3, b'\x01\x02', [MetadataItem(1, b'\x07')]), enumeration]).Encode())
+
+   for lazy in [False, True]:
+      p = Packet.Decode(frame, lazy)
+      objects = [p] + p.sections + p.sections[0].metadata + p.sections[1].elements
+
+      for o in objects:
+         assert not hasattr(o, '__dict__'), type(o).__name__
+
+def test_constructorsDoNotShareDefaultLists():
+   a = DataSection()
+   b = DataSection()
+   a.metadata.append(MetadataItem(1, b'\x01'))
+   Packet().sections.append(Section())
+
+   assert len(b.metadata) == 0
+   assert len(Packet().sections) == 0
+   assert len(EnumerationSection().elements) == 0
+
+def test_bytesAllocatedPerDecodedFrame():
+   import tracemalloc
+
+   frame = bytes(Packet([DataSection(SectionTypes.DeviceToClientStream, 3, bytes(32), [MetadataItem(1, b'\x01\x02')])]).Encode())
+   count = 1000
+   Packet.Decode(frame)
+
+   tracemalloc.start()
+   try:
+      before = tracemalloc.get_traced_memory()[0]
+      decoded = [Packet.Decode(frame) for _ in range(count)]
+      perFrame = (tracemalloc.get_traced_memory()[0] - before) / count
+   finally:
+      tracemalloc.stop()
+
+   assert len(decoded) == count
+   # packet, section, metadata item, their lists and the two payload copies, without an instance dict on any of them
+   assert perFrame < 512
+
+def test_metadataTemplateResolvesOnceAndReusesItems():
+   enumeration = EnumerationSection(0, [ElementDescription(1, DispositionTypes.DeviceToClientStream, DataTypes.uint8, 'rx'),
+                                        ElementDescription(2, DispositionTypes.Metadata, DataTypes.uint32, 'rate')])
+
+   template = enumeration.GetMetadataTemplate({'rate': 0, 'rx': 0, 'bogus': 0})
+   assert template is enumeration.GetMetadataTemplate(['rate', 'rx', 'bogus'])
+   assert template.unknownNames == ['rx', 'bogus']
+
+   first = template.Encode({'rate': 48000, 'rx': 0, 'bogus': 0})
+   assert [(m.metadataId, m.metadataValueBytes) for m in first] == [(2, b'\x00\x00\xbb\x80')]
+   assert template.Encode({'rate': 48000, 'rx': 5, 'bogus': 5}) is first
+
+   changed = template.Encode({'rate': 96000, 'rx': 0, 'bogus': 0})
+   assert changed is not first
+   assert changed[0].metadataValueBytes == b'\x00\x01\x77\x00'
+
+def test_metadataTemplateKeepsTheSignOfZero():
+   enumeration = EnumerationSection(0, [ElementDescription(2, DispositionTypes.Metadata, DataTypes.float64, 'gain')])
+   template = enumeration.GetMetadataTemplate(['gain'])
+
+   positive = template.Encode({'gain': 0.0})
+   negative = template.Encode({'gain': -0.0})
+   assert negative is not positive
+   assert positive[0].metadataValueBytes != negative[0].metadataValueBytes
+   assert negative[0].metadataValueBytes == enumeration.GetPropertyByName('gain').EncodeValue(-0.0)
+   assert template.Encode({'gain': -0.0}) is negative
+
+def test_metadataTemplatesAreDroppedWhenTheEnumerationChanges():
+   enumeration = EnumerationSection()
+   template = enumeration.GetMetadataTemplate(['rate'])
+   assert template.unknownNames == ['rate']
+
+   enumeration.Append(ElementDescription(2, DispositionTypes.Metadata, DataTypes.uint8, 'rate'))
+   assert enumeration.GetMetadataTemplate(['rate']).unknownNames == []
+
+   enumeration.Clear()
+   assert enumeration.GetMetadataTemplate(['rate']).unknownNames == ['rate']
+
+@pytest.mark.parametrize("datatype, encoded_stream", [
+   (DataTypes.cs8, b'\x40\xC0\x80\x00'),
+   (DataTypes.cs16, b'\x40\x00\xC0\x00\x80\x00\x00\x00'),
+   (DataTypes.cs12, b'\x40\x0C\x00\x80\x00\x00'),
+])
+def test_elementDescription_scaledIqStream(datatype, encoded_stream):
+   s = ElementDescription(dataType=datatype)
+   assert s.DecodeStream(encoded_stream, scale=True) == [0.5 - 0.5j, -1 + 0j]
+
+   np = pytest.importorskip("numpy")
+   decoded = s.DecodeStream(encoded_stream, asNumpy=True, scale=True)
+   assert decoded.dtype == np.complex64
+   assert decoded.tolist() == [0.5 - 0.5j, -1 + 0j]
+
+   unscaled = s.DecodeStream(encoded_stream, asNumpy=True)
+   assert s.EncodeStream(unscaled) == encoded_stream
+
+def test_elementDescription_scaleIgnoredForOtherTypes():
+   s = ElementDescription(dataType=DataTypes.sint16)
+   assert s.DecodeStream(b'\x40\x00', scale=True) == [16384]
+
+@pytest.mark.parametrize("datatype", [DataTypes.cs8, DataTypes.cs16, DataTypes.cs12])
+def test_elementDescription_iqStreamFromInterleavedIntegers(datatype):
+   np = pytest.importorskip("numpy")
+   s = ElementDescription(dataType=datatype)
+   samples = [complex(i % 200 - 100, 100 - i % 200) for i in range(1000)]
+
+   interleaved = np.array([[c.real, c.imag] for c in samples], dtype=np.int16)
+   assert s.EncodeStream(interleaved) == s.EncodeStream(samples)
+   assert s.DecodeStream(s.EncodeStream(samples), asNumpy=True).tolist() == samples
+
+def test_elementDescription_cs12RejectsOutOfRange():
+   s = ElementDescription(dataType=DataTypes.cs12)
+   with pytest.raises(Exception):
+      s.EncodeStream([2048 + 0j])
+   with pytest.raises(Exception):
+      s.DecodeStream(b'\x00\x00')
+
+def test_enumerateSection_capabilities():
+   assert Packet([EnumerateSection()]).Encode() == Packet([Section(SectionTypes.Enumerate)]).Encode()
+   assert EnumerateSection(Capabilities.LittleEndian).Encode() == b'\x00\x04\x00\x01'
+
+   assert DecodeSection(b'\x00\x03\x00').capabilities == 0
+   assert DecodeSection(b'\x00\x04\x00\x01').capabilities == Capabilities.LittleEndian
+
+   # a device without capability support still reads it as a plain Enumerate
+   assert Section.Decode(b'\x00\x04\x00\x01').sectionType == SectionTypes.Enumerate.value
+
+def test_enumerationSection_capabilities():
+   s = EnumerationSection(0, [ElementDescription(42, DispositionTypes.DeviceToClientStream, DataTypes.uint16, name="s")])
+   plain = s.EncodeFrame()
+   negotiated = s.EncodeFrame(Capabilities.LittleEndian)
+
+   assert plain[4:8] == b'\x00\x0B\x07\x00'
+   assert negotiated[4:9] == b'\x00\x0C\x07\x02\x01'
+   assert s.EncodeFrame() is plain
+
+   decoded = Packet.Decode(negotiated).sections[0]
+   assert decoded.capabilities == Capabilities.LittleEndian
+   assert decoded.elements[0].littleEndian
+   assert decoded.elements[0].EncodeStream([1, 2]) == b'\x01\x00\x02\x00'
+   assert Packet.Decode(plain).sections[0].elements[0].EncodeStream([1, 2]) == b'\x00\x01\x00\x02'
+
+def test_enumerationSection_setCapabilitiesRebindsElements():
+   s = EnumerationSection(0, [ElementDescription(1, DispositionTypes.Metadata, DataTypes.uint32, "rate")])
+   assert s.GetMetadataTemplate(["rate"]).Encode({"rate": 1})[0].metadataValueBytes == b'\x00\x00\x00\x01'
+
+   s.SetCapabilities(Capabilities.LittleEndian)
+   s.Append(ElementDescription(2, DispositionTypes.DeviceToClientStream, DataTypes.float32, "samples"))
+
+   assert s.GetMetadataTemplate(["rate"]).Encode({"rate": 1})[0].metadataValueBytes == b'\x01\x00\x00\x00'
+   assert s.GetPropertyById(2).DecodeStream(b'\x00\x00\x80\x3F') == [1.0]
+
+   s.SetCapabilities(Capabilities.none)
+   assert s.GetPropertyById(2).DecodeStream(b'\x3F\x80\x00\x00') == [1.0]
+
+def test_elementDescription_littleEndianNumpyIsNativeView():
+   np = pytest.importorskip("numpy")
+   s = ElementDescription(dataType=DataTypes.sint16)
+   s.littleEndian = True
+
+   encoded = bytearray(b'\x01\x00\xFF\xFF')
+   decoded = s.DecodeStream(encoded, asNumpy=True)
+   assert decoded.dtype == np.dtype('<i2')
+   assert decoded.tolist() == [1, -1]
+
+   # a view over the received bytes, not a converted copy
+   encoded[0] = 2
+   assert decoded[0] == 2
+
+def test_packet_decode_everySectionTypeHasADecoder():
+   for sectionType in SectionTypes:
+      assert sectionType.value in network._SECTION_DECODERS
+      assert sectionType.value in network._LAZY_SECTION_DECODERS
+
+def test_packet_decode_sectionsReadAtOffsets():
+   sections = [GetPropertySection(7),
+               PropertyValueSection(SectionTypes.NotifyProperty, 8, b'\x2A'),
+               DataSection(SectionTypes.DeviceToClientStream, 9, b'\x01\x02', [MetadataItem(1, b'\xFE')]),
+               FragmentSection(10, 0, b'\x03'),
+               EnumerationSection(CAPABILITIES_PROTOCOL_VERSION, [ElementDescription(11, DispositionTypes.Metadata, DataTypes.uint16, "räte")], Capabilities.LittleEndian),
+               EnumerateSection(Capabilities.LittleEndian),
+               Section(SectionTypes.Confirmed)]
+   frame = bytes(Packet(sections).Encode())
+
+   for lazy in [False, True]:
+      decoded = Packet.Decode(frame, lazy).sections
+      assert [s.sectionType for s in decoded] == [s.sectionType for s in sections]
+      assert decoded[0].elementId == 7
+      assert decoded[1].propertyValueBytes == b'\x2A'
+      assert decoded[2].dataBytes == b'\x01\x02'
+      assert decoded[2].metadata[0].metadataValueBytes == b'\xFE'
+      assert decoded[3].fragmentBytes == b'\x03'
+      assert decoded[4].GetPropertyById(11).name == "räte"
+      assert decoded[4].capabilities == Capabilities.LittleEndian
+      assert decoded[5].capabilities == Capabilities.LittleEndian
+
+@pytest.mark.parametrize("frame", [
+   bytes([0,9,0,0,0,6,2,0,1]),                  # section runs past the end of the packet
+   bytes([0,7,0,0,0,2,2]),                      # section shorter than its header
+   bytes([0,6,0,0,0,0]),                        # zero length section
+   bytes([0,6,0,0,0,3]),                        # trailing bytes too short for a section header
+   bytes([0,7,0,0,0,3,99]),                     # unknown section type
+   bytes([0,11,0,0,0,7,6,0,1,0,9]),             # metadata block runs past the end of the section
+   bytes([0,13,0,0,0,9,6,0,1,0,4,0,9]),         # metadata item runs past the end of the block
+   bytes([0,11,0,0,0,7,7,0,0,9,0]),             # element description runs past the end of the section
+])
+def test_packet_decode_invalidBounds(frame):
+   for lazy in [False, True]:
+      with pytest.raises(Exception):
+         p = Packet.Decode(frame, lazy)
+         for s in p.sections:
+            s.metadata
+
+def test_bufferPool_reusesOnlyUnviewedBuffers():
+   from sdrcat_protocol.bufferpool import BufferPool
+
+   pool = BufferPool(bufferSize=16, maxBuffers=2)
+   a = pool.Acquire()
+   view = memoryview(a)[2:4]
+   pool.Release(a)
+
+   # still viewed, so a fresh buffer is allocated
+   b = pool.Acquire()
+   assert b is not a
+   assert (pool.hits, pool.misses) == (0, 2)
+
+   view.release()
+   assert pool.Acquire() is a
+   assert pool.hits == 1
+
+   pool.Release(a)
+   pool.Release(b)
+   pool.Release(bytearray(16))
+   pool.Release(bytearray(8))
+   assert pool.dropped == 2
+
+def test_streamReader_pooledFrames():
+   from sdrcat_protocol.bufferpool import BufferPool
+
+   pool = BufferPool(bufferSize=1024, maxBuffers=4)
+   r = StreamReader(lazy=True, knownFrames=ControlFrames.PACKETS, pool=pool)
+   frames = [bytes(Packet([DataSection(SectionTypes.DeviceToClientStream, 3, bytes([i]) * 100, [MetadataItem(1, bytes([i]))])]).Encode()) for i in range(200)]
+   stream = b''.join(f + ControlFrames.Confirmed for f in frames)
+
+   received = bytearray(700)
+   for i in range(0, len(stream), 700):
+      chunk = stream[i : i + 700]
+      received[:len(chunk)] = chunk
+      r.ProcessBytes(memoryview(received)[:len(chunk)])
+      # the reader copies what it keeps, so the read buffer can be refilled straight away
+      received[:] = bytes(700)
+
+      while True:
+         p = r.GetNextPacket()
+         if p is None:
+            break
+         if p.sections[0].sectionType == SectionTypes.Confirmed.value:
+            assert p is ControlFrames.PACKETS[ControlFrames.Confirmed]
+            continue
+
+         i = p.sections[0].metadata[0].metadataValueBytes[0]
+         assert p.sections[0].dataBytes == bytes([i]) * 100
+
+   # with every decoded packet dropped the slabs keep being reused
+   assert pool.misses <= 2
+   assert pool.hits > 10
+
+def test_streamReader_pooledSlabHeldWhileViewed():
+   from sdrcat_protocol.bufferpool import BufferPool
+
+   pool = BufferPool(bufferSize=64, maxBuffers=4)
+   r = StreamReader(lazy=True, pool=pool)
+   frame = bytes(Packet([DataSection(SectionTypes.DeviceToClientStream, 3, b'\xAA' * 40, [])]).Encode())
+
+   r.ProcessBytes(frame)
+   kept = r.GetNextPacket().sections[0].dataBytes
+   for _ in range(8):
+      r.ProcessBytes(frame)
+      r.GetNextPacket()
+
+   assert kept == b'\xAA' * 40
+   assert pool.misses == 2